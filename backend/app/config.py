@@ -32,6 +32,46 @@ class Settings(BaseSettings):
     ssh_max_connections: int = 10
     ssh_connect_timeout: int = 15
 
+    # Configuration push
+    # Pushes with at least this many commands are uploaded as one script
+    # (on vendors that support it) instead of being sent line by line
+    config_upload_threshold: int = 50
+    # Stop a line-by-line push at the first command the device rejects
+    config_fail_fast: bool = False
+    # Save a device-side checkpoint before each push and stop at the first
+    # error; the checkpoint is kept on the device for a manual restore
+    config_transactional: bool = False
+
+    # Fleet plan (dry run): devices read and planned per batch, and how many
+    # batches may be queued for planning while the next one is read
+    plan_batch_size: int = 500
+    plan_concurrency: int = 4
+
+    # Translation cache bounds
+    translation_cache_max_entries: int = 4096
+    translation_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Cached effective (layer-merged) device configurations
+    config_layer_cache_size: int = 10000
+
+    # Device ID/name/serial number lookups kept in memory for check-ins
+    device_identity_cache_size: int = 50000
+
+    # Drift detection: compare running and desired config of every device
+    # once per period, querying at most drift_concurrency devices at a time
+    drift_detection_enabled: bool = False
+    drift_check_period: int = 3600  # seconds
+    drift_concurrency: int = 10
+    drift_timeout: int = 120  # seconds per device
+
+    # Reconciliation: enqueue a config push when a device's desired and
+    # applied configs differ, on check-in and (if enabled) fleet-wide every
+    # reconcile_interval seconds
+    reconcile_on_checkin: bool = True
+    reconcile_enabled: bool = False
+    reconcile_interval: int = 60  # seconds
+    reconcile_batch_size: int = 1000
+
     # Task Processor
     task_poll_interval: int = 10
     task_max_retries: int = 3
@@ -39,6 +79,10 @@ class Settings(BaseSettings):
     # Agent communication
     agent_check_in_interval: int = 60  # seconds
     agent_timeout: int = 300  # seconds
+    # Buffer check-in heartbeats (last_check_in, status, firmware) and write
+    # them in one bulk UPDATE per flush interval instead of per check-in
+    checkin_buffer_enabled: bool = True
+    checkin_flush_interval: float = 5.0  # seconds
 
     # Logging
     log_level: str = "INFO"
@@ -47,6 +91,33 @@ class Settings(BaseSettings):
     # UniFi Controller Defaults
     unifi_site: str = "default"
     unifi_verify_ssl: bool = False
+    # Pooled connections per shared controller session
+    unifi_connection_limit: int = 20
+    # Seconds a controller's stat/device snapshot serves status lookups
+    unifi_stat_ttl: int = 15
+    # Independent configuration operations sent to a controller at once
+    unifi_apply_concurrency: int = 8
+    # Track UniFi device state from the controllers' event websockets,
+    # writing status changes to the database every flush interval
+    unifi_events_enabled: bool = False
+    unifi_events_flush_interval: float = 2.0  # seconds
+    unifi_events_discover_interval: int = 300  # seconds between controller scans
+
+    # WireGuard VPN
+    # Devices get addresses from wireguard_subnet (a /16 holds ~65k peers)
+    wireguard_subnet: str = "10.99.0.0/24"
+    wireguard_server_ip: str = "10.99.0.1"
+    wireguard_listen_port: int = 51820
+    wireguard_config_path: str = "/etc/wireguard"
+    # Interfaces (wg0, wg1, ...) sharing the fleet; wireguard_subnet is split
+    # evenly between them (use a power of two to use all of it) and shard i
+    # listens on wireguard_listen_port + i
+    wireguard_shards: int = 1
+    # Collect peer stats (handshakes, traffic) in the background instead of
+    # per request; a handshake younger than the threshold means ONLINE
+    wireguard_stats_enabled: bool = False
+    wireguard_stats_interval: int = 30  # seconds
+    wireguard_online_threshold: int = 180  # seconds
 
     # Redis (optional)
     redis_url: Optional[str] = None
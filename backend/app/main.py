@@ -8,8 +8,20 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .database import engine, Base
-from .routers import devices, tasks, checkin, wireguard, webcli, provision
+from .routers import devices, tasks, checkin, wireguard, webcli, provision, plan, config_groups, drift, config_versions
 from .services.task_processor import task_processor
+from .services.config_executor import config_executor
+from .services.config_layers import config_layers
+from .services.drift_detector import drift_detector
+from .services.reconciler import config_reconciler
+from .services.unifi_controller import unifi_sessions
+from .services.unifi_events import unifi_events
+from .services.ip_allocator import vpn_ip_allocator
+from .services.checkin_buffer import checkin_buffer
+from .services.device_identity import device_identities
+from .services.wireguard_hub import wireguard_hub
+from .services.wireguard_monitor import wireguard_stats
+from .config import settings
 
 # Configure logging
 logging.basicConfig(
@@ -36,12 +48,36 @@ async def lifespan(app: FastAPI):
     await task_processor.start()
     logger.info("Task processor started")
 
+    if settings.checkin_buffer_enabled:
+        await checkin_buffer.start()
+
+    if settings.drift_detection_enabled:
+        await drift_detector.start()
+
+    if settings.reconcile_enabled:
+        await config_reconciler.start()
+
+    if settings.unifi_events_enabled:
+        await unifi_events.start()
+
+    # Cache the WireGuard server identity so requests don't read its config
+    await wireguard_hub.load_identity()
+
+    if settings.wireguard_stats_enabled:
+        await wireguard_stats.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down OrcheNet API server...")
     await task_processor.stop()
     logger.info("Task processor stopped")
+    await drift_detector.stop()
+    await config_reconciler.stop()
+    await unifi_events.stop()
+    await wireguard_stats.stop()
+    await checkin_buffer.stop()
+    await unifi_sessions.close_all()
 
 
 app = FastAPI(
@@ -61,12 +97,17 @@ app.add_middleware(
 )
 
 # Include routers
+# plan is registered before devices so /api/devices/plan isn't taken as a device id
+app.include_router(plan.router)
 app.include_router(devices.router)
 app.include_router(tasks.router)
 app.include_router(checkin.router)
 app.include_router(wireguard.router)
 app.include_router(webcli.router)
 app.include_router(provision.router)
+app.include_router(config_groups.router)
+app.include_router(drift.router)
+app.include_router(config_versions.router)
 
 @app.get("/")
 async def root():
@@ -83,5 +124,15 @@ async def health():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "task_processor": "running" if task_processor.running else "stopped"
+        "task_processor": "running" if task_processor.running else "stopped",
+        "drift_detector": "running" if drift_detector.running else "stopped",
+        "translation_cache": config_executor.translation_cache.stats(),
+        "config_layers": config_layers.stats(),
+        "reconciler": config_reconciler.stats(),
+        "unifi_sessions": unifi_sessions.stats(),
+        "unifi_events": unifi_events.stats(),
+        "vpn_ip_pools": vpn_ip_allocator.stats(),
+        "checkin_buffer": checkin_buffer.stats(),
+        "device_identities": device_identities.stats(),
+        "wireguard_stats": wireguard_stats.stats()
     }
@@ -0,0 +1,38 @@
+"""
+Configuration group database model
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum
+import enum
+
+from ..database import Base
+
+
+class ConfigScope(str, enum.Enum):
+    """Configuration layer scope, in merge order"""
+    GLOBAL = "global"
+    SITE = "site"
+    ROLE = "role"
+
+
+class ConfigGroup(Base):
+    """
+    Shared configuration layer.
+
+    A device's effective configuration is its global groups, then the groups
+    for its site, then the groups for its role, with the device's own
+    desired_config merged on top.
+    """
+    __tablename__ = "config_groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    scope = Column(SQLEnum(ConfigScope), nullable=False, index=True)
+    match = Column(String, nullable=True)  # Site or role name (unused for global groups)
+    priority = Column(Integer, default=0)  # Higher priority merges later within a scope
+
+    config = Column(JSON, nullable=False, default=dict)
+    revision = Column(Integer, default=1, nullable=False)  # Bumped on every change
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
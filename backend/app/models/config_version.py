@@ -0,0 +1,50 @@
+"""
+Configuration version database models
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, LargeBinary, ForeignKey, Index, Enum as SQLEnum
+import enum
+
+from ..database import Base
+
+
+class ConfigVersionKind(str, enum.Enum):
+    """Which configuration a version records"""
+    DESIRED = "desired"  # desired_config as set through the API
+    APPLIED = "applied"  # configuration successfully pushed to the device
+    IMPORTED = "imported"  # running configuration read from the device
+
+
+class ConfigBlob(Base):
+    """
+    Compressed configuration section, addressed by content hash.
+
+    Shared by every version (of any device) containing an identical section.
+    """
+    __tablename__ = "config_blobs"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the canonical JSON
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed canonical JSON
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ConfigVersion(Base):
+    """One configuration version of a device: a manifest of section blobs"""
+    __tablename__ = "config_versions"
+    __table_args__ = (
+        Index("ix_config_versions_device_kind_version", "device_id", "kind", "version", unique=True),
+        Index("ix_config_versions_device_created_at", "device_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(SQLEnum(ConfigVersionKind), nullable=False)
+    version = Column(Integer, nullable=False)  # Sequential per device and kind
+
+    config_hash = Column(String(64), nullable=False, index=True)  # Hash of the whole config
+    sections = Column(JSON, nullable=False)  # Section name -> blob hash
+    size = Column(Integer, default=0)  # Uncompressed size of the whole config
+
+    source = Column(String, nullable=True)  # What created it, e.g. "api" or "task:42"
+    created_at = Column(DateTime, default=datetime.utcnow)
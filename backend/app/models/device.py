@@ -2,7 +2,7 @@
 Device database model
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 import enum
 
@@ -28,6 +28,12 @@ class DeviceVendor(str, enum.Enum):
 class Device(Base):
     """Device model representing a managed network device"""
     __tablename__ = "devices"
+    __table_args__ = (
+        # Lets the reconciler find out-of-sync devices from the index alone
+        Index("ix_devices_config_hashes", "desired_config_hash", "applied_config_hash"),
+        # Finds the devices of a site and role computed from an older group stack
+        Index("ix_devices_layers", "site", "role", "desired_layers_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
@@ -38,6 +44,10 @@ class Device(Base):
     ip_address = Column(String)
     mac_address = Column(String)
 
+    # Placement (selects site and role configuration groups)
+    site = Column(String, nullable=True, index=True)
+    role = Column(String, nullable=True, index=True)
+
     # Status
     status = Column(SQLEnum(DeviceStatus), default=DeviceStatus.PENDING)
     last_check_in = Column(DateTime, nullable=True)
@@ -45,7 +55,13 @@ class Device(Base):
 
     # Configuration
     current_config = Column(JSON, nullable=True)  # YAML config as JSON
-    desired_config = Column(JSON, nullable=True)
+    desired_config = Column(JSON, nullable=True)  # Device overlay on top of config groups
+
+    # Reconciliation state (see services/reconciler.py)
+    desired_config_hash = Column(String(64), nullable=True)  # Effective config hash; NULL = recompute
+    desired_layers_key = Column(String(64), nullable=True)  # Group stack the desired hash was computed from
+    applied_config_hash = Column(String(64), nullable=True)  # Hash of the config last pushed or imported
+    failed_config_hash = Column(String(64), nullable=True)  # Desired hash whose reconciler push failed
 
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -53,7 +69,7 @@ class Device(Base):
 
     # Additional device info
     firmware_version = Column(String)
-    serial_number = Column(String)
+    serial_number = Column(String, index=True)
     device_data = Column(JSON)  # Flexible field for vendor-specific data (renamed from metadata)
 
     # Connection credentials (encrypted in production)
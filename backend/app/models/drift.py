@@ -0,0 +1,38 @@
+"""
+Configuration drift database model
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index, Enum as SQLEnum
+import enum
+
+from ..database import Base
+
+
+class DriftStatus(str, enum.Enum):
+    """Drift check outcome"""
+    IN_SYNC = "in_sync"
+    DRIFTED = "drifted"
+    UNSUPPORTED = "unsupported"
+    ERROR = "error"
+
+
+class DriftRecord(Base):
+    """Latest drift check result for a device (one row per device)"""
+    __tablename__ = "drift_records"
+    __table_args__ = (
+        Index("ix_drift_records_status_checked_at", "status", "checked_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    status = Column(SQLEnum(DriftStatus), nullable=False)
+    drifted_sections = Column(JSON, default=list)  # Top-level sections that differ
+    section_hashes = Column(JSON, nullable=True)  # Running config hash per desired section
+
+    desired_hash = Column(String, nullable=True)  # Hash of the desired section hashes
+    running_hash = Column(String, nullable=True)  # Hash of the raw running config
+    error_message = Column(String, nullable=True)
+
+    checked_at = Column(DateTime, default=datetime.utcnow, index=True)
+    changed_at = Column(DateTime, default=datetime.utcnow)  # Last status change
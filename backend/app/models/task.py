@@ -2,7 +2,7 @@
 Task database model for device operations
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 import enum
 
@@ -26,9 +26,23 @@ class TaskType(str, enum.Enum):
     STATUS_COLLECTION = "status_collection"
 
 
+# Rows covered by the in-flight configuration update index (enums are stored by name)
+INFLIGHT_CONFIG_UPDATE = "task_type = 'CONFIG_UPDATE' AND status IN ('PENDING', 'IN_PROGRESS')"
+
+
 class Task(Base):
     """Task model for operations to be executed on devices"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # At most one pending or running configuration update per device
+        Index(
+            "uq_tasks_inflight_config_update",
+            "device_id",
+            unique=True,
+            sqlite_where=text(INFLIGHT_CONFIG_UPDATE),
+            postgresql_where=text(INFLIGHT_CONFIG_UPDATE)
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
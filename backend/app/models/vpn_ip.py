@@ -0,0 +1,28 @@
+"""
+VPN address reservation database model
+"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+
+from ..database import Base
+
+
+class VpnIpReservation(Base):
+    """
+    VPN address held by a device in an address pool.
+
+    The unique indexes make reservations atomic across API workers: an
+    address can be inserted once per pool, and a device holds at most one
+    address per pool.
+    """
+    __tablename__ = "vpn_ip_reservations"
+    __table_args__ = (
+        Index("ix_vpn_ip_reservations_pool_address", "pool", "address", unique=True),
+        Index("ix_vpn_ip_reservations_pool_device", "pool", "device_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    pool = Column(String(64), nullable=False)  # Pool network, e.g. "10.99.0.0/16"
+    address = Column(String(45), nullable=False)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
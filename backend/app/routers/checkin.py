@@ -5,13 +5,22 @@ Handles periodic device check-ins and returns pending tasks.
 from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Header
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models.device import Device, DeviceStatus
-from ..models.task import Task, TaskStatus
+from ..models.device import Device
+from ..models.task import Task, TaskStatus, TaskType
+from ..models.config_version import ConfigVersionKind
 from ..schemas.device import DeviceCheckIn
 from ..schemas.task import TaskResponse
+from ..config import settings
+from ..services.checkin_buffer import checkin_buffer
+from ..services.config_hash import content_hash
+from ..services.config_layers import config_layers
+from ..services.config_store import config_store
+from ..services.device_identity import device_identities
+from ..services.reconciler import config_reconciler
 
 router = APIRouter(prefix="/api/checkin", tags=["checkin"])
 
@@ -32,55 +41,64 @@ async def device_checkin(
 
     Authentication via Authorization header (Bearer token or device-specific key).
     """
-    # Find device by ID, name, or serial number
-    device = None
-
-    if checkin_data.device_id:
-        device = db.query(Device).filter(Device.id == checkin_data.device_id).first()
-    elif checkin_data.device_name:
-        device = db.query(Device).filter(Device.name == checkin_data.device_name).first()
-    elif checkin_data.serial_number:
-        device = db.query(Device).filter(Device.serial_number == checkin_data.serial_number).first()
-
-    if not device:
+    # Find device by ID, name, or serial number (cached after the first check-in)
+    identity = device_identities.resolve(
+        db,
+        device_id=checkin_data.device_id,
+        name=checkin_data.device_name,
+        serial_number=checkin_data.serial_number
+    )
+    if not identity:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Device not found"
         )
 
-    # TODO: Verify authorization token matches device
-
-    # Update device status
-    device.last_check_in = datetime.utcnow()
-    device.status = DeviceStatus.ONLINE
-
-    # Update firmware version if provided
-    if checkin_data.firmware_version:
-        device.firmware_version = checkin_data.firmware_version
-
-    # Update status data in metadata
-    if checkin_data.status_data:
-        if not device.device_data:
-            device.device_data = {}
-        device.device_data["last_status"] = checkin_data.status_data
-        device.device_data["last_status_time"] = datetime.utcnow().isoformat()
-
-    db.commit()
+    # Push the desired configuration if the device isn't running it yet;
+    # reads the hash columns only, never the full row
+    if settings.reconcile_on_checkin:
+        if config_reconciler.reconcile_device_id(db, identity.id) is None:
+            device_identities.invalidate(identity.id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Device not found"
+            )
 
-    # Get pending tasks for this device
-    pending_tasks = db.query(Task).filter(
-        Task.device_id == device.id,
-        Task.status == TaskStatus.PENDING
-    ).order_by(Task.created_at).all()
+    # TODO: Verify authorization token matches device
 
-    # Mark tasks as in progress
+    # Heartbeat (last_check_in, ONLINE status, firmware, status report) is
+    # written with other devices' in the buffer's next bulk UPDATE
+    checkin_buffer.record(
+        identity.id,
+        firmware_version=checkin_data.firmware_version,
+        status_data=checkin_data.status_data
+    )
+
+    # Claim pending tasks in one statement
+    pending_tasks = db.scalars(
+        update(Task)
+        .where(Task.device_id == identity.id, Task.status == TaskStatus.PENDING)
+        .values(status=TaskStatus.IN_PROGRESS, started_at=datetime.utcnow())
+        .returning(Task),
+        execution_options={"synchronize_session": False}
+    ).all()
+    pending_tasks.sort(key=lambda task: (task.created_at, task.id))
+
+    # Reconciler tasks carry no config; hand out the current desired one
+    device = None
     for task in pending_tasks:
-        task.status = TaskStatus.IN_PROGRESS
-        task.started_at = datetime.utcnow()
+        if task.task_type == TaskType.CONFIG_UPDATE and not (task.payload or {}).get("config"):
+            device = device or db.get(Device, identity.id)
+            task.payload = {**(task.payload or {}), "config": config_layers.effective_config(db, device)}
+
+    if not pending_tasks:
+        return []
 
+    # Serialized before the commit expires them (which would reload each task)
+    response = [TaskResponse.model_validate(task) for task in pending_tasks]
     db.commit()
 
-    return pending_tasks
+    return response
 
 
 @router.post("/result/{task_id}")
@@ -109,6 +127,15 @@ async def submit_task_result(
 
     if success:
         task.status = TaskStatus.COMPLETED
+
+        config = (task.payload or {}).get("config")
+        if task.task_type == TaskType.CONFIG_UPDATE and config:
+            device = db.query(Device).filter(Device.id == task.device_id).first()
+            if device:
+                device.current_config = config
+                device.applied_config_hash = content_hash(config)
+                device.last_config_update = datetime.utcnow()
+                config_store.record(db, device.id, ConfigVersionKind.APPLIED, config, source=f"task:{task.id}")
     else:
         task.error_message = error_message
 
@@ -120,6 +147,9 @@ async def submit_task_result(
             task.completed_at = None
         else:
             task.status = TaskStatus.FAILED
+            device = db.query(Device).filter(Device.id == task.device_id).first()
+            if device:
+                config_reconciler.push_failed(device, task)
 
     db.commit()
 
@@ -0,0 +1,140 @@
+"""
+Configuration group API endpoints
+"""
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.config_group import ConfigGroup, ConfigScope
+from ..schemas.config_group import (
+    ConfigGroupCreate,
+    ConfigGroupUpdate,
+    ConfigGroupResponse
+)
+from ..services.config_layers import config_layers
+
+router = APIRouter(prefix="/api/config-groups", tags=["config-groups"])
+
+
+def _check_match(scope: ConfigScope, match: Optional[str]):
+    """Site and role groups must name the site or role they apply to"""
+    if scope != ConfigScope.GLOBAL and not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"'{scope.value}' groups require a match value"
+        )
+
+
+@router.post("/", response_model=ConfigGroupResponse, status_code=status.HTTP_201_CREATED)
+async def create_config_group(group: ConfigGroupCreate, db: Session = Depends(get_db)):
+    """
+    Create a configuration group.
+    """
+    existing = db.query(ConfigGroup).filter(ConfigGroup.name == group.name).first()
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Config group with name '{group.name}' already exists"
+        )
+    _check_match(group.scope, group.match)
+
+    db_group = ConfigGroup(
+        name=group.name,
+        scope=group.scope,
+        match=group.match if group.scope != ConfigScope.GLOBAL else None,
+        priority=group.priority,
+        config=group.config,
+        revision=1
+    )
+
+    db.add(db_group)
+    db.commit()
+    db.refresh(db_group)
+    config_layers.invalidate_groups()
+
+    return db_group
+
+
+@router.get("/", response_model=List[ConfigGroupResponse])
+async def list_config_groups(
+    scope: Optional[ConfigScope] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    List configuration groups in merge order.
+    """
+    query = db.query(ConfigGroup)
+    if scope:
+        query = query.filter(ConfigGroup.scope == scope)
+
+    groups = query.all()
+    order = {ConfigScope.GLOBAL: 0, ConfigScope.SITE: 1, ConfigScope.ROLE: 2}
+    return sorted(groups, key=lambda g: (order[g.scope], g.priority or 0, g.name))
+
+
+@router.get("/{group_id}", response_model=ConfigGroupResponse)
+async def get_config_group(group_id: int, db: Session = Depends(get_db)):
+    """
+    Get a configuration group by ID.
+    """
+    group = db.query(ConfigGroup).filter(ConfigGroup.id == group_id).first()
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Config group with id {group_id} not found"
+        )
+    return group
+
+
+@router.put("/{group_id}", response_model=ConfigGroupResponse)
+async def update_config_group(
+    group_id: int,
+    group_update: ConfigGroupUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Update a configuration group.
+
+    Bumps the group's revision so only effective configs derived from this
+    group are recomputed. No device rows are written here: the reconciler
+    recomputes the desired hash of devices whose group stack changed.
+    """
+    group = db.query(ConfigGroup).filter(ConfigGroup.id == group_id).first()
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Config group with id {group_id} not found"
+        )
+
+    update_data = group_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(group, field, value)
+    _check_match(group.scope, group.match)
+
+    group.revision = (group.revision or 0) + 1
+    group.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(group)
+    config_layers.invalidate_groups()
+
+    return group
+
+
+@router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_config_group(group_id: int, db: Session = Depends(get_db)):
+    """
+    Delete a configuration group.
+    """
+    group = db.query(ConfigGroup).filter(ConfigGroup.id == group_id).first()
+    if not group:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Config group with id {group_id} not found"
+        )
+
+    db.delete(group)
+    db.commit()
+    config_layers.invalidate_groups()
+    return None
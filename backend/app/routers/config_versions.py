@@ -0,0 +1,78 @@
+"""
+Configuration version history API endpoints
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.config_version import ConfigVersion, ConfigVersionKind
+from ..schemas.config_version import (
+    ConfigVersionResponse,
+    ConfigVersionWithConfig,
+    ConfigVersionDiff
+)
+from ..services.config_store import config_store
+
+router = APIRouter(prefix="/api/devices", tags=["config-versions"])
+
+
+def _get_version(db: Session, device_id: int, version_id: int) -> ConfigVersion:
+    version = db.query(ConfigVersion).filter(
+        ConfigVersion.id == version_id,
+        ConfigVersion.device_id == device_id
+    ).first()
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Config version {version_id} not found for device {device_id}"
+        )
+    return version
+
+
+@router.get("/{device_id}/config-versions", response_model=List[ConfigVersionResponse])
+async def list_config_versions(
+    device_id: int,
+    kind: Optional[ConfigVersionKind] = None,
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """
+    List a device's configuration history, newest first.
+    """
+    return config_store.history(db, device_id, kind=kind, skip=skip, limit=limit)
+
+
+@router.get("/{device_id}/config-versions/diff", response_model=ConfigVersionDiff)
+async def diff_config_versions(
+    device_id: int,
+    from_version: int,
+    to_version: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Compare two configuration versions of a device.
+    """
+    old = _get_version(db, device_id, from_version)
+    new = _get_version(db, device_id, to_version)
+    diff = config_store.diff(db, old, new)
+
+    return {
+        "from_version_id": old.id,
+        "to_version_id": new.id,
+        "identical": old.config_hash == new.config_hash,
+        **diff.to_dict()
+    }
+
+
+@router.get("/{device_id}/config-versions/{version_id}", response_model=ConfigVersionWithConfig)
+async def get_config_version(device_id: int, version_id: int, db: Session = Depends(get_db)):
+    """
+    Get a configuration version, including the configuration.
+    """
+    version = _get_version(db, device_id, version_id)
+    return {
+        **ConfigVersionResponse.model_validate(version).model_dump(),
+        "config": config_store.load(db, version)
+    }
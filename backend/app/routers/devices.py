@@ -1,6 +1,7 @@
 """
 Device management API endpoints
 """
+import asyncio
 from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -8,12 +9,24 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models.device import Device, DeviceStatus
+from ..models.config_version import ConfigVersionKind
 from ..schemas.device import (
     DeviceCreate,
     DeviceUpdate,
     DeviceResponse,
-    DeviceWithConfig
+    DeviceWithConfig,
+    EffectiveConfigResponse
 )
+from ..services.config_executor import config_executor, ConfigExecutorError
+from ..services.config_hash import content_hash
+from ..services.config_layers import config_delta, config_layers
+from ..services.config_store import config_store
+from ..services.device_identity import device_identities
+from ..services.drift_detector import comparable_desired, running_matches
+from ..services.ip_allocator import vpn_ip_allocator
+from ..services.reconciler import config_reconciler
+from ..services.ssh_manager import SSHConnectionError
+from ..services.unifi_controller import UniFiControllerError
 
 router = APIRouter(prefix="/api/devices", tags=["devices"])
 
@@ -38,6 +51,8 @@ async def create_device(device: DeviceCreate, db: Session = Depends(get_db)):
         model=device.model,
         ip_address=device.ip_address,
         mac_address=device.mac_address,
+        site=device.site,
+        role=device.role,
         ssh_username=device.ssh_username,
         ssh_password=device.ssh_password,  # TODO: Encrypt in production
         ssh_key=device.ssh_key,
@@ -52,8 +67,12 @@ async def create_device(device: DeviceCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_device)
+    db.flush()
+    config_store.record(db, db_device.id, ConfigVersionKind.DESIRED, db_device.desired_config, source="api")
+    config_reconciler.update_desired_hash(db, db_device)
     db.commit()
     db.refresh(db_device)
+    device_identities.refresh(db_device)
 
     return db_device
 
@@ -80,6 +99,19 @@ async def list_devices(
     return devices
 
 
+@router.post("/reconcile")
+async def reconcile_devices():
+    """
+    Run a fleet-wide reconcile cycle now.
+
+    Enqueues one configuration update for every device whose applied
+    configuration differs from its desired configuration and that has none
+    pending or running.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, config_reconciler.run_cycle)
+
+
 @router.get("/{device_id}", response_model=DeviceWithConfig)
 async def get_device(device_id: int, db: Session = Depends(get_db)):
     """
@@ -115,9 +147,15 @@ async def update_device(
     for field, value in update_data.items():
         setattr(device, field, value)
 
+    if "desired_config" in update_data:
+        config_store.record(db, device.id, ConfigVersionKind.DESIRED, device.desired_config, source="api")
+    if update_data.keys() & {"desired_config", "site", "role"}:
+        config_reconciler.update_desired_hash(db, device)
+
     device.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(device)
+    device_identities.refresh(device)
 
     return device
 
@@ -134,11 +172,43 @@ async def delete_device(device_id: int, db: Session = Depends(get_db)):
             detail=f"Device with id {device_id} not found"
         )
 
+    vpn_ip_allocator.release(db, device_id)
     db.delete(device)
     db.commit()
+    config_layers.invalidate_device(device_id)
+    device_identities.invalidate(device_id)
     return None
 
 
+@router.get("/{device_id}/effective-config", response_model=EffectiveConfigResponse)
+async def get_effective_config(device_id: int, db: Session = Depends(get_db)):
+    """
+    Get a device's effective configuration.
+
+    Merges the global, site and role configuration groups that apply to the
+    device with its own desired_config, in that order.
+    """
+    device = db.query(Device).filter(Device.id == device_id).first()
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Device with id {device_id} not found"
+        )
+
+    layers = config_layers.layers_for(db, device)
+    config = config_layers.effective_config(db, device)
+
+    return {
+        "device_id": device.id,
+        "layers": [
+            {"id": layer[0], "name": layer[1], "scope": layer[2].value, "revision": layer[3]}
+            for layer in layers
+        ],
+        "config": config,
+        "config_hash": content_hash(config)
+    }
+
+
 @router.put("/{device_id}/config", response_model=DeviceResponse)
 async def update_device_config(
     device_id: int,
@@ -157,6 +227,61 @@ async def update_device_config(
         )
 
     device.desired_config = config
+    config_store.record(db, device.id, ConfigVersionKind.DESIRED, config, source="api")
+    config_reconciler.update_desired_hash(db, device)
+    device.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(device)
+
+    return device
+
+
+@router.post("/{device_id}/import-config", response_model=DeviceWithConfig)
+async def import_device_config(
+    device_id: int,
+    set_desired: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Read a device's running configuration into current_config.
+
+    The running config is parsed back into the unified schema. With
+    set_desired, it also becomes the device's desired configuration
+    (useful when onboarding an already configured device): the part its
+    groups don't provide is stored as its desired_config overlay.
+    """
+    device = db.query(Device).filter(Device.id == device_id).first()
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Device with id {device_id} not found"
+        )
+
+    try:
+        config = await config_executor.import_running_config(device)
+    except ConfigExecutorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (SSHConnectionError, UniFiControllerError) as e:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+    device.current_config = config
+    config_store.record(db, device.id, ConfigVersionKind.IMPORTED, config, source="import")
+    if set_desired:
+        # Only what the device's groups don't already provide
+        device.desired_config = config_delta(config_layers.group_config(db, device), config)
+        config_store.record(db, device.id, ConfigVersionKind.DESIRED, device.desired_config, source="import")
+        config_reconciler.update_desired_hash(db, device)
+    elif config_reconciler.is_stale(db, device):
+        config_reconciler.update_desired_hash(db, device)
+
+    # Compared the way drift detection compares, so a device already
+    # running its desired config isn't pushed it again
+    translator = config_executor.translators[device.vendor]
+    desired = comparable_desired(translator, config_layers.effective_config(db, device), config)
+    if running_matches(translator, config, desired):
+        device.applied_config_hash = device.desired_config_hash
+    else:
+        device.applied_config_hash = content_hash(config)
     device.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(device)
@@ -0,0 +1,87 @@
+"""
+Configuration drift API endpoints
+"""
+from typing import List, Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models.device import Device, DeviceVendor
+from ..models.drift import DriftRecord, DriftStatus
+from ..schemas.drift import DriftRecordResponse, DriftSummary
+from ..services.drift_detector import drift_detector
+
+router = APIRouter(prefix="/api/drift", tags=["drift"])
+
+
+@router.get("/", response_model=List[DriftRecordResponse])
+async def list_drift(
+    status: Optional[DriftStatus] = None,
+    vendor: Optional[DeviceVendor] = None,
+    checked_since: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    List drift results, most recently changed first.
+    """
+    query = db.query(DriftRecord)
+
+    if status:
+        query = query.filter(DriftRecord.status == status)
+    if checked_since:
+        query = query.filter(DriftRecord.checked_at >= checked_since)
+    if vendor:
+        query = query.join(Device, Device.id == DriftRecord.device_id).filter(Device.vendor == vendor)
+
+    return query.order_by(DriftRecord.changed_at.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/summary", response_model=DriftSummary)
+async def drift_summary(db: Session = Depends(get_db)):
+    """
+    Count devices per drift status.
+    """
+    rows = db.query(DriftRecord.status, func.count(DriftRecord.id)).group_by(DriftRecord.status).all()
+    return {
+        "counts": {row[0].value: row[1] for row in rows},
+        "last_cycle": drift_detector.last_cycle
+    }
+
+
+@router.get("/{device_id}", response_model=DriftRecordResponse)
+async def get_device_drift(device_id: int, db: Session = Depends(get_db)):
+    """
+    Get the latest drift result for a device.
+    """
+    record = db.query(DriftRecord).filter(DriftRecord.device_id == device_id).first()
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No drift result for device {device_id}"
+        )
+    return record
+
+
+@router.post("/{device_id}/check", response_model=DriftRecordResponse)
+async def check_device_drift(device_id: int, db: Session = Depends(get_db)):
+    """
+    Check a device for drift now.
+    """
+    device = db.query(Device).filter(Device.id == device_id).first()
+    if not device:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Device with id {device_id} not found"
+        )
+
+    result = await drift_detector.check_device(device_id)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Device {device_id} has no desired configuration to compare"
+        )
+    return result
@@ -0,0 +1,166 @@
+"""
+Configuration plan (dry run) API endpoints
+Previews a candidate configuration across many devices without touching them.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device
+from ..schemas.device import ConfigPlanRequest, DeviceSelector
+from ..services.config_executor import config_executor
+from ..services.config_layers import config_layers
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/devices", tags=["plan"])
+
+
+def _load_batch(db: Session, selector: DeviceSelector, after_id: int, limit: int) -> List[Tuple]:
+    """
+    Load the next batch of selected devices with their effective configs.
+
+    Only the columns planning and layer resolution need are read.
+
+    Returns:
+        List of (id, name, vendor, effective config) tuples
+    """
+    query = db.query(
+        Device.id,
+        Device.name,
+        Device.vendor,
+        Device.site,
+        Device.role,
+        Device.desired_config
+    ).filter(Device.id > after_id)
+
+    if selector.device_ids is not None:
+        query = query.filter(Device.id.in_(selector.device_ids))
+    if selector.vendor:
+        query = query.filter(Device.vendor == selector.vendor)
+    if selector.status:
+        query = query.filter(Device.status == selector.status)
+    if selector.name_prefix:
+        query = query.filter(Device.name.startswith(selector.name_prefix))
+
+    return [
+        (row.id, row.name, row.vendor, config_layers.effective_config(db, row))
+        for row in query.order_by(Device.id).limit(limit).all()
+    ]
+
+
+def _plan_batch(
+    rows: List[Tuple],
+    request: ConfigPlanRequest,
+    validations: Dict[Any, tuple]
+) -> Tuple[List[str], Dict[str, int]]:
+    """Plan a batch of devices, returning NDJSON lines and counters"""
+    lines = []
+    counts = {"devices": 0, "valid": 0, "invalid": 0, "changed": 0}
+
+    for device_id, name, vendor, effective_config in rows:
+        plan = config_executor.plan_config(
+            vendor,
+            request.config,
+            current_config=effective_config,
+            validation=validations[vendor]
+        )
+
+        counts["devices"] += 1
+        if plan["valid"]:
+            counts["valid"] += 1
+            if plan["command_count"]:
+                counts["changed"] += 1
+        else:
+            counts["invalid"] += 1
+
+        if not request.include_commands:
+            plan.pop("commands", None)
+
+        lines.append(json.dumps({
+            "device_id": device_id,
+            "device_name": name,
+            "vendor": vendor.value,
+            **plan
+        }) + "\n")
+
+    return lines, counts
+
+
+async def _stream_plan(request: ConfigPlanRequest):
+    """
+    Generate plan results as NDJSON, one line per device plus a summary.
+
+    Devices are read in id-ordered batches. Validation runs once per vendor
+    and translation goes through the shared translation cache. Batches are
+    read and planned in the thread pool so the event loop never waits on
+    the database or on planning; planning is CPU-bound and the GIL keeps it
+    serial, so this overlaps a batch's planning with the next read rather
+    than planning batches in parallel.
+    """
+    loop = asyncio.get_running_loop()
+    db = SessionLocal()
+    validations: Dict[Any, tuple] = {}
+    totals = {"devices": 0, "valid": 0, "invalid": 0, "changed": 0}
+    in_flight = deque()
+
+    async def drain_one():
+        lines, counts = await in_flight.popleft()
+        for key, value in counts.items():
+            totals[key] += value
+        return "".join(lines)
+
+    try:
+        last_id = 0
+        while True:
+            # Off the event loop too; the session is only used by one thread at a time
+            # (layer resolution loads groups through it)
+            rows = await loop.run_in_executor(
+                None, _load_batch, db, request.selector, last_id, settings.plan_batch_size
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            for vendor in {row[2] for row in rows}:
+                if vendor not in validations:
+                    validations[vendor] = config_executor.validate(vendor, request.config)
+
+            in_flight.append(loop.run_in_executor(None, _plan_batch, rows, request, validations))
+            if len(in_flight) >= settings.plan_concurrency:
+                yield await drain_one()
+
+        while in_flight:
+            yield await drain_one()
+
+        yield json.dumps({
+            "summary": totals,
+            "translation_cache": config_executor.translation_cache.stats()
+        }) + "\n"
+
+    finally:
+        # Don't leave batches running if the client disconnects
+        for future in in_flight:
+            future.cancel()
+        db.close()
+
+
+@router.post("/plan")
+async def plan_config(request: ConfigPlanRequest):
+    """
+    Dry-run a candidate configuration against a set of devices.
+
+    Streams newline-delimited JSON: for each selected device, the validation
+    result, the translated commands and the diff against its effective
+    (layered desired) configuration, which is what the device is pushed,
+    followed by a final summary line. No device is contacted.
+    """
+    return StreamingResponse(_stream_plan(request), media_type="application/x-ndjson")
@@ -2,7 +2,6 @@
 Device provisioning API endpoints
 Generates provisioning scripts for devices
 """
-import subprocess
 import os
 from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -11,6 +10,8 @@ from pydantic import BaseModel
 
 from ..database import get_db
 from ..models.device import Device
+from ..services.wireguard_hub import wireguard_hub
+from ..services.wireguard_manager import generate_keypairs, WireGuardError
 
 router = APIRouter(prefix="/api/devices", tags=["provisioning"])
 
@@ -27,23 +28,13 @@ class ProvisionScriptResponse(BaseModel):
 
 
 def generate_wireguard_keypair():
-    """Generate a WireGuard key pair using wg command"""
+    """Generate a WireGuard key pair (in-process, falling back to the wg command)"""
     try:
-        # Generate private key
-        private_key = subprocess.check_output(["wg", "genkey"], text=True).strip()
-
-        # Generate public key from private key
-        public_key = subprocess.check_output(
-            ["wg", "pubkey"],
-            input=private_key,
-            text=True
-        ).strip()
-
-        return private_key, public_key
-    except FileNotFoundError:
+        return generate_keypairs(1)[0]
+    except WireGuardError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="WireGuard tools not installed on server"
+            detail=str(e)
         )
     except Exception as e:
         raise HTTPException(
@@ -65,7 +56,9 @@ def generate_mikrotik_provisioning_script(
     server_public_key: str,
     device_private_key: str,
     device_vpn_ip: str,
-    api_url: str
+    api_url: str,
+    vpn_subnet: str = "10.99.0.0/24",
+    server_vpn_ip: str = "10.99.0.1"
 ) -> str:
     """Generate MikroTik provisioning script"""
 
@@ -110,7 +103,7 @@ def generate_mikrotik_provisioning_script(
         public-key=$orchenetServerPublicKey \\
         endpoint-address=$orchenetServer \\
         endpoint-port=$orchenetPort \\
-        allowed-address=10.99.0.0/24 \\
+        allowed-address={vpn_subnet} \\
         persistent-keepalive=25s \\
         comment="OrcheNet Server"
     :put "  ✓ Server peer added"
@@ -130,7 +123,7 @@ def generate_mikrotik_provisioning_script(
 # 4. Add Route to OrcheNet Server via WireGuard
 :put "Step 4: Adding route to OrcheNet network..."
 :do {{{{
-    /ip route add dst-address=10.99.0.0/24 gateway=$tunnelName comment="OrcheNet VPN Route"
+    /ip route add dst-address={vpn_subnet} gateway=$tunnelName comment="OrcheNet VPN Route"
     :put "  ✓ Route added"
 }}}} on-error={{{{
     :put "  ! Route already exists or failed to add"
@@ -159,7 +152,7 @@ def generate_mikrotik_provisioning_script(
 :put "Step 7: Configuring firewall for OrcheNet access..."
 :do {{{{
     /ip firewall filter add chain=input protocol=tcp dst-port=22 \\
-        src-address=10.99.0.0/24 in-interface=$tunnelName \\
+        src-address={vpn_subnet} in-interface=$tunnelName \\
         action=accept place-before=0 \\
         comment="Allow SSH from OrcheNet VPN"
     :put "  ✓ Firewall rule added"
@@ -214,7 +207,7 @@ def generate_mikrotik_provisioning_script(
 :if ([/interface get [find name=$tunnelName] running]) do={{{{
     :put "  ✓ WireGuard interface '$tunnelName' is UP"
     :do {{{{
-        /ping 10.99.0.1 count=3
+        /ping {server_vpn_ip} count=3
         :put "  ✓ Ping to OrcheNet server successful"
     }}}} on-error={{{{
         :put "  ⚠ WARNING: Ping to OrcheNet server failed (check firewall/routing)"
@@ -237,7 +230,7 @@ def generate_mikrotik_provisioning_script(
 :put "===== Provisioning Complete ====="
 :put "Tunnel Name: $tunnelName"
 :put "Device VPN IP: {device_vpn_ip}"
-:put "Server VPN IP: 10.99.0.1"
+:put "Server VPN IP: {server_vpn_ip}"
 :put ""
 :put "⚠ CRITICAL NEXT STEPS:"
 :put "  1. Change SSH password: /user set $sshUser password=YOUR_SECURE_PASSWORD"
@@ -257,7 +250,9 @@ def generate_mikrotik_provisioning_script(
         server_public_key=server_public_key,
         device_private_key=device_private_key,
         device_vpn_ip=device_vpn_ip,
-        api_url=api_url
+        api_url=api_url,
+        vpn_subnet=vpn_subnet,
+        server_vpn_ip=server_vpn_ip
     )
 
     return script
@@ -304,8 +299,9 @@ async def generate_provision_script(
     # Call enable_wireguard_for_device
     peer_response = await enable_wireguard_for_device(peer_request, db)
 
-    # Get server info
+    # Get server info and the interface the device's address belongs to
     wireguard_info = await get_wireguard_info()
+    shard = wireguard_hub.shard_for_ip(peer_response.private_ip)
 
     # Get server IP from environment or config
     import socket
@@ -324,11 +320,13 @@ async def generate_provision_script(
         device_name=device.name,
         mac_address=request.mac_address,
         server_ip=server_ip,
-        server_port=wireguard_info.listen_port,
+        server_port=shard.listen_port,
         server_public_key=wireguard_info.server_public_key,
         device_private_key=device_private_key,
         device_vpn_ip=peer_response.private_ip,
-        api_url=api_url
+        api_url=api_url,
+        vpn_subnet=shard.subnet,
+        server_vpn_ip=shard.server_ip
     )
 
     # Generate filename
@@ -340,7 +338,7 @@ async def generate_provision_script(
         "filename": filename,
         "wireguard_info": {
             "vpn_ip": peer_response.private_ip,
-            "server_ip": "10.99.0.1",
+            "server_ip": shard.server_ip,
             "tunnel_name": tunnel_name,
             "public_key": device_public_key
         }
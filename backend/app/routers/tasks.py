@@ -3,6 +3,7 @@ Task management API endpoints
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -35,7 +36,14 @@ async def create_task(task: TaskCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_task)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Device {task.device_id} already has a configuration update pending or in progress"
+        )
     db.refresh(db_task)
 
     return db_task
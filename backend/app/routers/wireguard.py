@@ -1,6 +1,7 @@
 """
 WireGuard VPN Management API
 """
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -9,7 +10,10 @@ import logging
 
 from ..database import get_db
 from ..models.device import Device
-from ..services.wireguard_manager import wireguard_manager, WireGuardError
+from ..services.ip_allocator import vpn_ip_allocator
+from ..services.wireguard_hub import wireguard_hub
+from ..services.wireguard_manager import WireGuardError
+from ..services.wireguard_monitor import wireguard_stats
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -23,12 +27,28 @@ class WireGuardServerSetup(BaseModel):
     server_private_key: Optional[str] = None
 
 
+class WireGuardShardInfo(BaseModel):
+    """Response model for one WireGuard interface"""
+    interface: str
+    subnet: str
+    server_ip: str
+    listen_port: int
+
+
+class WireGuardShardStatus(WireGuardShardInfo):
+    """Response model for interface status"""
+    up: bool
+    peers: int  # Configured peers
+    connected: int  # Peers with a recent handshake
+
+
 class WireGuardServerInfo(BaseModel):
-    """Response model for server info"""
+    """Response model for server info (fields other than shards describe wg0)"""
     server_public_key: str
     server_ip: str
     listen_port: int
     interface: str
+    shards: List[WireGuardShardInfo] = []
 
 
 class WireGuardPeerRequest(BaseModel):
@@ -71,13 +91,15 @@ async def setup_wireguard_server(
     This should be run once during initial deployment.
     """
     try:
-        result = await wireguard_manager.setup_server(setup.server_private_key)
+        result = await wireguard_hub.setup_server(setup.server_private_key)
+        primary = wireguard_hub.shards[0]
 
         return WireGuardServerInfo(
             server_public_key=result["server_public_key"],
-            server_ip=result["server_ip"],
-            listen_port=result["listen_port"],
-            interface=wireguard_manager.interface,
+            server_ip=primary.server_ip,
+            listen_port=primary.listen_port,
+            interface=primary.interface,
+            shards=result["shards"],
         )
 
     except WireGuardError as e:
@@ -91,29 +113,22 @@ async def get_wireguard_info():
     Get WireGuard server information.
     """
     try:
-        # Read server public key from config using sudo
-        config_content = await wireguard_manager._run_command(f"sudo cat {wireguard_manager.config_file}")
-
-        # Extract private key and derive public key
-        import re
-        match = re.search(r'PrivateKey = (.+)', config_content)
-        if not match:
-            raise HTTPException(status_code=404, detail="WireGuard not configured")
-
-        private_key = match.group(1).strip()
-        from ..services.wireguard_manager import WireGuardManager
-        wg = WireGuardManager()
-        public_key = await wg._run_command(f"echo '{private_key}' | wg pubkey")
+        # Server identity cached at startup and on setup (all shards share it)
+        public_key = await wireguard_hub.server_public_key()
+        if not public_key:
+            raise HTTPException(status_code=404, detail="WireGuard not configured. Run /setup first.")
 
+        primary = wireguard_hub.shards[0]
         return WireGuardServerInfo(
             server_public_key=public_key,
-            server_ip=wireguard_manager.server_ip,
-            listen_port=wireguard_manager.listen_port,
-            interface=wireguard_manager.interface,
+            server_ip=primary.server_ip,
+            listen_port=primary.listen_port,
+            interface=primary.interface,
+            shards=wireguard_hub.shard_info(),
         )
 
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="WireGuard not configured. Run /setup first.")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get WireGuard info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -140,20 +155,29 @@ async def enable_wireguard_for_device(
             public_key = peer_request.public_key
             private_key = None
         else:
-            private_key, public_key = await wireguard_manager.generate_keypair()
-
-        # Allocate IP address
-        used_ips = [
-            d.wireguard_private_ip
-            for d in db.query(Device).filter(Device.wireguard_private_ip.isnot(None)).all()
-        ]
-
-        allocated_ip = await wireguard_manager.allocate_ip(used_ips)
+            private_key, public_key = await wireguard_hub.shards[0].generate_keypair()
+
+        # Reserve an IP address on the device's shard (its previous one if
+        # it had one), moving on along the ring if that shard is full. The
+        # allocator commits, so it runs off the event loop
+        loop = asyncio.get_running_loop()
+        allocated_ip = None
+        for shard in wireguard_hub.candidates(device):
+            allocated_ip = await loop.run_in_executor(
+                None,
+                vpn_ip_allocator.allocate,
+                db,
+                shard.network,
+                device.id,
+                [shard.server_ip]
+            )
+            if allocated_ip:
+                break
         if not allocated_ip:
             raise HTTPException(status_code=500, detail="No available IP addresses in VPN subnet")
 
         # Add peer to WireGuard
-        await wireguard_manager.add_peer(
+        await shard.add_peer(
             peer_name=device.name,
             peer_public_key=public_key,
             peer_ip=allocated_ip,
@@ -172,11 +196,11 @@ async def enable_wireguard_for_device(
 
         if not server_endpoint:
             # Try to determine server endpoint (you may want to make this configurable)
-            server_endpoint = f"YOUR_SERVER_IP:{server_info.listen_port}"
+            server_endpoint = f"YOUR_SERVER_IP:{shard.listen_port}"
 
         client_config = None
         if private_key:
-            client_config = await wireguard_manager.generate_peer_config(
+            client_config = await shard.generate_peer_config(
                 peer_private_key=private_key,
                 peer_ip=allocated_ip,
                 server_public_key=server_info.server_public_key,
@@ -223,7 +247,7 @@ async def disable_wireguard_for_device(
             raise HTTPException(status_code=400, detail="WireGuard not enabled for this device")
 
         # Remove peer from WireGuard
-        await wireguard_manager.remove_peer(device.wireguard_public_key)
+        await wireguard_hub.remove_peer(device.wireguard_public_key)
 
         # Update device record
         device.wireguard_enabled = 0
@@ -249,9 +273,8 @@ async def get_all_wireguard_peers(db: Session = Depends(get_db)):
         # Get all devices with WireGuard enabled
         devices = db.query(Device).filter(Device.wireguard_enabled == 1).all()
 
-        # Get peer statuses from WireGuard
-        wg_peers = await wireguard_manager.get_all_peers()
-        wg_peer_map = {p["public_key"]: p for p in wg_peers}
+        # Peer statuses from the collector's latest `wg show dump`
+        wg_peer_map = await wireguard_stats.peers()
 
         peer_statuses = []
         for device in devices:
@@ -291,18 +314,10 @@ async def get_wireguard_peer_status(
         if not device.wireguard_enabled:
             raise HTTPException(status_code=400, detail="WireGuard not enabled for this device")
 
-        # Get peer status from WireGuard
-        wg_status = await wireguard_manager.get_peer_status(device.wireguard_public_key)
-
-        if not wg_status:
-            wg_status = {}
-
-        # Update last handshake in database if changed
-        if wg_status.get("last_handshake"):
-            handshake_time = datetime.fromtimestamp(wg_status["last_handshake"])
-            if device.wireguard_last_handshake != handshake_time:
-                device.wireguard_last_handshake = handshake_time
-                db.commit()
+        # Peer status from the collector's latest `wg show dump` (which
+        # also records handshake changes in the database)
+        peers = await wireguard_stats.peers()
+        wg_status = peers.get(device.wireguard_public_key, {})
 
         return WireGuardPeerStatus(
             device_id=device.id,
@@ -320,16 +335,41 @@ async def get_wireguard_peer_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/shards", response_model=List[WireGuardShardStatus])
+async def get_wireguard_shards():
+    """
+    Get status of every WireGuard interface.
+    """
+    try:
+        shards = await wireguard_hub.status()
+
+        # Recent handshakes per interface from the collector's latest dump
+        fresh_after = datetime.utcnow().timestamp() - wireguard_stats.online_threshold
+        connected = {}
+        for peer in (await wireguard_stats.peers()).values():
+            if (peer.get("last_handshake") or 0) > fresh_after:
+                connected[peer["interface"]] = connected.get(peer["interface"], 0) + 1
+
+        return [
+            WireGuardShardStatus(**shard, connected=connected.get(shard["interface"], 0))
+            for shard in shards
+        ]
+
+    except Exception as e:
+        logger.error(f"Failed to get WireGuard shard status: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/restart")
 async def restart_wireguard():
     """
-    Restart WireGuard interface.
+    Restart WireGuard interfaces.
     Useful after configuration changes.
     """
     try:
-        success = await wireguard_manager.restart_interface()
+        success = await wireguard_hub.restart_interfaces()
         if success:
-            return {"message": "WireGuard interface restarted successfully"}
+            return {"message": "WireGuard interfaces restarted successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to restart WireGuard")
     except Exception as e:
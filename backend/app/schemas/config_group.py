@@ -0,0 +1,40 @@
+"""
+Pydantic schemas for Configuration Group API
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from ..models.config_group import ConfigScope
+
+
+class ConfigGroupBase(BaseModel):
+    """Base configuration group schema"""
+    name: str = Field(..., min_length=1, max_length=255)
+    scope: ConfigScope
+    match: Optional[str] = None
+    priority: int = 0
+
+
+class ConfigGroupCreate(ConfigGroupBase):
+    """Schema for creating a configuration group"""
+    config: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ConfigGroupUpdate(BaseModel):
+    """Schema for updating a configuration group"""
+    name: Optional[str] = None
+    match: Optional[str] = None
+    priority: Optional[int] = None
+    config: Optional[Dict[str, Any]] = None
+
+
+class ConfigGroupResponse(ConfigGroupBase):
+    """Schema for configuration group responses"""
+    id: int
+    config: Dict[str, Any]
+    revision: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,38 @@
+"""
+Pydantic schemas for Configuration Version API
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel
+from ..models.config_version import ConfigVersionKind
+
+
+class ConfigVersionResponse(BaseModel):
+    """Schema for a configuration version (manifest only)"""
+    id: int
+    device_id: int
+    kind: ConfigVersionKind
+    version: int
+    config_hash: str
+    sections: Dict[str, str]
+    size: int
+    source: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConfigVersionWithConfig(ConfigVersionResponse):
+    """Configuration version including the configuration itself"""
+    config: Dict[str, Any]
+
+
+class ConfigVersionDiff(BaseModel):
+    """Changes between two configuration versions"""
+    from_version_id: int
+    to_version_id: int
+    identical: bool
+    sections: List[str]
+    change_count: int
+    changes: List[Dict[str, Any]]
@@ -2,7 +2,7 @@
 Pydantic schemas for Device API
 """
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 from ..models.device import DeviceStatus, DeviceVendor
 
@@ -14,6 +14,8 @@ class DeviceBase(BaseModel):
     model: Optional[str] = None
     ip_address: Optional[str] = None
     mac_address: Optional[str] = None
+    site: Optional[str] = None
+    role: Optional[str] = None
 
 
 class DeviceCreate(DeviceBase):
@@ -36,6 +38,8 @@ class DeviceUpdate(BaseModel):
     model: Optional[str] = None
     ip_address: Optional[str] = None
     mac_address: Optional[str] = None
+    site: Optional[str] = None
+    role: Optional[str] = None
     ssh_username: Optional[str] = None
     ssh_password: Optional[str] = None
     ssh_key: Optional[str] = None
@@ -73,6 +77,22 @@ class DeviceWithConfig(DeviceResponse):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class EffectiveConfigLayer(BaseModel):
+    """A configuration group contributing to a device's effective config"""
+    id: int
+    name: str
+    scope: str
+    revision: int
+
+
+class EffectiveConfigResponse(BaseModel):
+    """Device configuration after merging all layers"""
+    device_id: int
+    layers: List[EffectiveConfigLayer]
+    config: Dict[str, Any]
+    config_hash: str
+
+
 class DeviceCheckIn(BaseModel):
     """Schema for device check-in"""
     device_id: Optional[int] = None
@@ -81,3 +101,18 @@ class DeviceCheckIn(BaseModel):
     serial_number: Optional[str] = None
     firmware_version: Optional[str] = None
     status_data: Optional[Dict[str, Any]] = None
+
+
+class DeviceSelector(BaseModel):
+    """Selects a set of devices; all given criteria must match"""
+    device_ids: Optional[List[int]] = None
+    vendor: Optional[DeviceVendor] = None
+    status: Optional[DeviceStatus] = None
+    name_prefix: Optional[str] = None
+
+
+class ConfigPlanRequest(BaseModel):
+    """Schema for a fleet-wide configuration dry run"""
+    selector: DeviceSelector = Field(default_factory=DeviceSelector)
+    config: Dict[str, Any]
+    include_commands: bool = True
@@ -0,0 +1,29 @@
+"""
+Pydantic schemas for Drift API
+"""
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+from pydantic import BaseModel
+from ..models.drift import DriftStatus
+
+
+class DriftRecordResponse(BaseModel):
+    """Schema for drift check results"""
+    device_id: int
+    status: DriftStatus
+    drifted_sections: List[str] = []
+    section_hashes: Optional[Dict[str, str]] = None
+    desired_hash: Optional[str] = None
+    running_hash: Optional[str] = None
+    error_message: Optional[str] = None
+    checked_at: datetime
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class DriftSummary(BaseModel):
+    """Device counts per drift status"""
+    counts: Dict[str, int]
+    last_cycle: Optional[Dict[str, Any]] = None
@@ -0,0 +1,182 @@
+"""
+Check-in Buffer
+Collects device heartbeats in memory and writes them to the database in batches.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import update
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device, DeviceStatus
+from .device_identity import device_identities
+
+logger = logging.getLogger(__name__)
+
+
+class CheckInBuffer:
+    """
+    Write-behind buffer for check-in heartbeats.
+
+    A check-in only records the device's last_check_in, firmware version
+    and status report here; every flush interval, the latest heartbeat of
+    each device is written (with status ONLINE) in one bulk UPDATE and one
+    commit. At 10k devices checking in every minute that replaces ~170
+    commits per second with one every few seconds. When the buffer isn't
+    running, heartbeats are written as they are recorded.
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        """
+        Initialize buffer.
+
+        Args:
+            flush_interval: Seconds between database flushes
+        """
+        self.flush_interval = flush_interval
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, Dict[str, Any]] = {}  # Device ID -> heartbeat
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    async def start(self):
+        """Start flushing periodically"""
+        if self.running:
+            logger.warning("Check-in buffer already running")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("Check-in buffer started")
+
+    async def stop(self):
+        """Stop flushing, writing buffered heartbeats"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        self._write(self._take())
+        logger.info("Check-in buffer stopped")
+
+    async def _run_loop(self):
+        """Main loop: one flush per interval"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await asyncio.sleep(self.flush_interval)
+
+            # Taken on the event loop, where record() runs
+            pending = self._take()
+            try:
+                await loop.run_in_executor(None, self._write, pending)
+            except Exception as e:
+                logger.error(f"Error flushing check-ins: {str(e)}", exc_info=True)
+                self._restore(pending)
+
+    def record(
+        self,
+        device_id: int,
+        firmware_version: Optional[str] = None,
+        status_data: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Record a device check-in.
+
+        Args:
+            device_id: Device that checked in
+            firmware_version: Reported firmware version
+            status_data: Reported status, stored in device_data["last_status"]
+        """
+        now = datetime.utcnow()
+        heartbeat = self._pending.setdefault(device_id, {})
+        heartbeat["last_check_in"] = now
+        if firmware_version:
+            heartbeat["firmware_version"] = firmware_version
+        if status_data:
+            heartbeat["status_data"] = (status_data, now)
+        self.recorded += 1
+
+        if not self.running:
+            self._write(self._take())
+
+    def last_check_in(self, device_id: int) -> Optional[datetime]:
+        """Buffered check-in time of a device not yet written"""
+        heartbeat = self._pending.get(device_id)
+        return heartbeat["last_check_in"] if heartbeat else None
+
+    def _take(self) -> Dict[int, Dict[str, Any]]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending: Dict[int, Dict[str, Any]]):
+        """Put back heartbeats that failed to flush (newer ones win)"""
+        for device_id, heartbeat in pending.items():
+            self._pending[device_id] = {**heartbeat, **self._pending.get(device_id, {})}
+
+    def _write(self, pending: Dict[int, Dict[str, Any]]) -> int:
+        """Write heartbeats in one bulk UPDATE"""
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            # Deleted devices are dropped; device_data is merged, not replaced
+            device_data = dict(db.query(Device.id, Device.device_data).filter(Device.id.in_(list(pending))))
+
+            rows = []
+            for device_id, heartbeat in pending.items():
+                if device_id not in device_data:
+                    # Deleted by another worker; its next check-in is rejected
+                    device_identities.invalidate(device_id)
+                    continue
+                row = {
+                    "id": device_id,
+                    "last_check_in": heartbeat["last_check_in"],
+                    "status": DeviceStatus.ONLINE,
+                }
+                if "firmware_version" in heartbeat:
+                    row["firmware_version"] = heartbeat["firmware_version"]
+                if "status_data" in heartbeat:
+                    status_data, reported_at = heartbeat["status_data"]
+                    row["device_data"] = {
+                        **(device_data[device_id] or {}),
+                        "last_status": status_data,
+                        "last_status_time": reported_at.isoformat(),
+                    }
+                rows.append(row)
+
+            if rows:
+                db.execute(update(Device), rows)
+                db.commit()
+        finally:
+            db.close()
+
+        self.flushed += len(rows)
+        self.flushes += 1
+        logger.debug(f"Flushed {len(rows)} device check-ins")
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer metrics"""
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+        }
+
+
+# Global buffer instance
+checkin_buffer = CheckInBuffer(flush_interval=settings.checkin_flush_interval)
@@ -2,17 +2,24 @@
 Configuration Executor Service
 Executes configuration changes on network devices using vendor-specific translators.
 """
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 from datetime import datetime
 
+from ..config import settings
 from ..models.device import Device, DeviceVendor
 from ..vendors.mikrotik.translator import MikroTikTranslator
 from ..vendors.fortinet.translator import FortinetTranslator
 from ..vendors.ubiquiti.translator import UniFiTranslator
 from ..vendors.watchguard.translator import WatchGuardTranslator
+from ..vendors.base import VendorInterface
+from ..vendors.diff import diff_configs
 from .ssh_manager import ssh_manager, SSHConnectionError
-from .unifi_controller import UniFiController
+from .unifi_controller import UniFiController, unifi_sessions
+from .unifi_events import unifi_events
+from .translation_cache import TranslationCache
+from .config_hash import content_hash
 
 logger = logging.getLogger(__name__)
 
@@ -35,11 +42,20 @@ class ConfigExecutor:
             DeviceVendor.UBIQUITI: UniFiTranslator(),
             DeviceVendor.WATCHGUARD: WatchGuardTranslator()
         }
+        self.translation_cache = TranslationCache(
+            max_entries=settings.translation_cache_max_entries,
+            max_bytes=settings.translation_cache_max_bytes
+        )
 
     async def execute_config(
         self,
         device: Device,
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        previous_config: Optional[Dict[str, Any]] = None,
+        upload: Optional[bool] = None,
+        fail_fast: Optional[bool] = None,
+        transactional: Optional[bool] = None,
+        resume: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Execute configuration on a device.
@@ -47,6 +63,18 @@ class ConfigExecutor:
         Args:
             device: Device object
             config: Unified YAML configuration as dictionary
+            previous_config: Configuration currently applied to the device.
+                When given, only the differences are pushed.
+            upload: Push the commands as one uploaded script. None selects
+                upload mode automatically for large pushes on vendors that
+                support it.
+            fail_fast: Stop sending commands after the first vendor error.
+                None uses the CONFIG_FAIL_FAST setting.
+            transactional: Wrap the push in a device-side checkpoint and roll
+                back on errors. None uses the CONFIG_TRANSACTIONAL setting.
+            resume: Resume state from a previous failed push ("index",
+                "commands_hash" and the "errors" of commands before index
+                that failed). Ignored if the commands have changed.
 
         Returns:
             Execution result dictionary with status and details
@@ -66,90 +94,554 @@ class ConfigExecutor:
         if not is_valid:
             raise ConfigExecutorError(f"Configuration validation failed: {error_msg}")
 
-        # Translate configuration
+        # Translate configuration, incrementally if we know what is applied
+        diff = None
         try:
-            commands = translator.yaml_to_commands(config)
-            logger.info(f"Translated configuration to {len(commands)} commands/operations")
+            if previous_config is not None:
+                previous = translator.normalize_config(previous_config)
+                diff = diff_configs(previous, translator.normalize_config(config, reference=previous))
+                commands = translator.diff_to_commands(
+                    diff,
+                    translate=lambda partial: self.translate(device.vendor, partial)
+                )
+                logger.info(
+                    f"Translated {len(diff.changes)} changes in {diff.sections} "
+                    f"to {len(commands)} commands/operations"
+                )
+            else:
+                commands = self.translate(device.vendor, config)
+                logger.info(f"Translated configuration to {len(commands)} commands/operations")
         except Exception as e:
             raise ConfigExecutorError(f"Configuration translation failed: {str(e)}")
 
+        if diff is not None and not commands:
+            logger.info(f"Configuration on {device.name} already up to date")
+            return {
+                "success": True,
+                "method": "none",
+                "commands_executed": 0,
+                "command_count": 0,
+                "diff": diff.to_dict(),
+                "executed_at": datetime.utcnow().isoformat()
+            }
+
+        if upload is None:
+            upload = len(commands) >= settings.config_upload_threshold
+        if fail_fast is None:
+            fail_fast = settings.config_fail_fast
+        if transactional is None:
+            transactional = settings.config_transactional
+
+        # Skip commands a previous attempt already applied, as long as the
+        # command list is the one that attempt was working through
+        commands_hash = content_hash(commands)
+        start_index = 0
+        prior_errors: List[Dict[str, Any]] = []
+        if resume and resume.get("commands_hash") == commands_hash:
+            start_index = min(int(resume.get("index", 0)), len(commands))
+            prior_errors = list(resume.get("errors") or [])
+            logger.info(f"Resuming push on {device.name} at command {start_index}/{len(commands)}")
+
+        if start_index >= len(commands) and prior_errors:
+            # Everything has been sent, but the commands that failed were
+            # never applied: a push with nothing left is not a success
+            return {
+                "success": False,
+                "method": "none",
+                "commands_executed": 0,
+                "command_count": len(commands),
+                "errors": prior_errors,
+                "error": f"{len(prior_errors)} command(s) failed in an earlier attempt: {prior_errors[0]['error']}",
+                "resume": resume,
+                "diff": diff.to_dict() if diff is not None else None,
+                "executed_at": datetime.utcnow().isoformat()
+            }
+
         # Execute based on vendor
         if device.vendor == DeviceVendor.UBIQUITI:
             result = await self._execute_unifi(device, commands)
         else:
-            result = await self._execute_ssh(device, commands)
+            if upload and translator.UPLOAD_METHOD:
+                async def apply():
+                    return await self._execute_upload(device, translator, commands, start_index)
+            else:
+                async def apply():
+                    # A transaction has to stop at the first error to roll back
+                    return await self._execute_ssh(
+                        device, translator, commands,
+                        fail_fast=fail_fast or transactional,
+                        start_index=start_index
+                    )
+
+            if transactional:
+                result = await self._execute_transactional(device, translator, apply, start_index)
+            else:
+                result = await apply()
+
+        if result.get("resume_from") is not None:
+            # Failures the retry will skip over stay on record until then
+            skipped = [error for error in prior_errors if error["command_index"] < result["resume_from"]]
+            skipped += result.pop("resume_errors", [])
+            result["resume"] = {
+                "index": result["resume_from"],
+                "commands_hash": commands_hash,
+                "errors": [
+                    {key: error[key] for key in ("command_index", "command", "error")}
+                    for error in skipped
+                ]
+            }
 
         # Update device status
         result["executed_at"] = datetime.utcnow().isoformat()
         result["command_count"] = len(commands)
+        if diff is not None:
+            result["diff"] = diff.to_dict()
 
         return result
 
+    def plan_config(
+        self,
+        vendor: DeviceVendor,
+        config: Dict[str, Any],
+        current_config: Optional[Dict[str, Any]] = None,
+        validation: Optional[tuple] = None
+    ) -> Dict[str, Any]:
+        """
+        Preview a configuration push without touching the device.
+
+        Args:
+            vendor: Device vendor
+            config: Candidate unified configuration
+            current_config: Configuration to diff the candidate against (e.g.
+                the device's effective config)
+            validation: Precomputed (is_valid, errors) result for this vendor
+                and config, to avoid revalidating the same input per device
+
+        Returns:
+            Dict with validation result, commands and diff
+        """
+        translator = self.translators.get(vendor)
+        if not translator:
+            return {"valid": False, "errors": [f"No translator found for vendor: {vendor}"]}
+
+        is_valid, errors = validation if validation is not None else self.validate(vendor, config)
+        if not is_valid:
+            return {"valid": False, "errors": errors}
+
+        try:
+            full_commands = self.translate(vendor, config)
+            diff = None
+            commands = full_commands
+            if current_config is not None:
+                current = translator.normalize_config(current_config)
+                diff = diff_configs(current, translator.normalize_config(config, reference=current))
+                commands = translator.diff_to_commands(
+                    diff,
+                    translate=lambda partial: self.translate(vendor, partial)
+                )
+        except Exception as e:
+            return {"valid": False, "errors": [f"Configuration translation failed: {str(e)}"]}
+
+        return {
+            "valid": True,
+            "errors": [],
+            "commands": commands,
+            "command_count": len(commands),
+            "full_command_count": len(full_commands),
+            "diff": diff.to_dict() if diff is not None else None
+        }
+
+    def applied_config(
+        self,
+        vendor: DeviceVendor,
+        config: Dict[str, Any],
+        previous_config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Configuration to record as applied after a successful push.
+
+        This is the config with the identifiers the push gave its items
+        (see VendorInterface.normalize_config), so the next diff addresses
+        the same entries on the device.
+
+        Args:
+            vendor: Device vendor
+            config: Configuration that was pushed
+            previous_config: Configuration the push was diffed against
+        """
+        translator = self.translators.get(vendor)
+        if not translator:
+            return config
+        reference = translator.normalize_config(previous_config) if previous_config is not None else None
+        return translator.normalize_config(config, reference=reference)
+
+    def validate(self, vendor: DeviceVendor, config: Dict[str, Any]) -> tuple:
+        """
+        Validate a configuration for a vendor.
+
+        Returns:
+            Tuple of (is_valid, list of error messages)
+        """
+        translator = self.translators.get(vendor)
+        if not translator:
+            return False, [f"No translator found for vendor: {vendor}"]
+
+        is_valid, errors = translator.validate_config(config)
+        # Translators report either a list of messages or a single string
+        if isinstance(errors, str):
+            errors = [errors] if errors else []
+        return is_valid, list(errors)
+
+    def translate(self, vendor: DeviceVendor, config: Dict[str, Any]) -> List[str]:
+        """
+        Translate a configuration through the translation cache.
+
+        Args:
+            vendor: Device vendor
+            config: Unified configuration dictionary
+
+        Returns:
+            List of vendor-specific commands/operations
+
+        Raises:
+            ConfigExecutorError: If no translator exists for the vendor
+        """
+        translator = self.translators.get(vendor)
+        if not translator:
+            raise ConfigExecutorError(f"No translator found for vendor: {vendor}")
+
+        return self.translation_cache.translate(vendor.value, translator, config)
+
     async def _execute_ssh(
         self,
         device: Device,
-        commands: List[str]
+        translator,
+        commands: List[str],
+        fail_fast: bool = False,
+        start_index: int = 0
     ) -> Dict[str, Any]:
         """
         Execute commands via SSH.
 
+        Output is classified with the vendor's error patterns as it streams
+        in; with fail_fast the remaining commands are skipped after the
+        first vendor error.
+
         Args:
             device: Device object
+            translator: Vendor translator for the device
             commands: List of CLI commands
+            fail_fast: Stop at the first command that reports an error
+            start_index: Index of the first command to send (for resumes)
 
         Returns:
             Execution result
         """
-        # Prefer WireGuard IP if enabled, otherwise use regular IP
-        host = device.wireguard_private_ip if device.wireguard_enabled else device.ip_address
-
-        if not host:
-            raise ConfigExecutorError("Device IP address not configured")
-
-        if not device.ssh_username:
-            raise ConfigExecutorError("SSH username not configured")
+        host = self._get_ssh_host(device)
 
         try:
             # Execute commands via SSH
-            outputs = await ssh_manager.execute_commands(
+            execution = await ssh_manager.execute_commands_checked(
                 host=host,
                 username=device.ssh_username,
                 password=device.ssh_password,
                 key_path=device.ssh_key,
-                commands=commands,
+                commands=commands[start_index:],
                 port=device.ssh_port or 22,
-                timeout=60
+                timeout=60,
+                classifier_factory=translator.error_classifier,
+                stop_on_error=fail_fast
             )
 
-            # Check for errors in output
-            errors = []
-            for idx, output in enumerate(outputs):
-                if output and ("error" in output.lower() or "failed" in output.lower()):
-                    errors.append({
-                        "command_index": idx,
-                        "command": commands[idx],
-                        "output": output
-                    })
-
+            errors = execution["errors"]
+            for error in errors:
+                error["command_index"] += start_index
             success = len(errors) == 0
+            resume_from = self._resume_point(execution, errors, start_index)
 
             return {
                 "success": success,
                 "method": "ssh",
-                "commands_executed": len(commands),
-                "outputs": outputs,
-                "errors": errors if errors else None
+                "commands_executed": len(execution["outputs"]),
+                "start_index": start_index,
+                "aborted": execution["aborted"],
+                "outputs": execution["outputs"],
+                "errors": errors if errors else None,
+                "error": errors[0]["error"] if errors else None,
+                "resume_from": resume_from,
+                # Errors the retry won't resend
+                "resume_errors": [error for error in errors if error["command_index"] < (resume_from or 0)]
             }
 
         except SSHConnectionError as e:
             logger.error(f"SSH connection failed for {device.name}: {str(e)}")
+            # Commands acknowledged before the drop are not sent again
             return {
                 "success": False,
                 "method": "ssh",
                 "error": str(e),
-                "commands_executed": 0
+                "commands_executed": e.completed,
+                "start_index": start_index,
+                "resume_from": start_index + e.completed
+            }
+
+    async def _execute_upload(
+        self,
+        device: Device,
+        translator,
+        commands: List[str],
+        start_index: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Execute commands as a single uploaded script.
+
+        The commands are rendered into one script by the translator. On
+        "import" vendors the script is transferred over SFTP and imported
+        with one command; on "batch" vendors it is streamed through a single
+        shell session. Either way N command round trips become about two.
+
+        Args:
+            device: Device object
+            translator: Vendor translator for the device
+            commands: List of CLI commands
+            start_index: Index of the first command to include (for resumes)
+
+        Returns:
+            Execution result
+        """
+        host = self._get_ssh_host(device)
+        script = translator.render_script(commands[start_index:])
+
+        try:
+            if translator.UPLOAD_METHOD == "import":
+                run_commands = translator.get_import_commands(translator.UPLOAD_FILENAME)
+                outputs = await ssh_manager.upload_and_execute(
+                    host=host,
+                    username=device.ssh_username,
+                    password=device.ssh_password,
+                    key_path=device.ssh_key,
+                    filename=translator.UPLOAD_FILENAME,
+                    content=script,
+                    commands=run_commands,
+                    port=device.ssh_port or 22,
+                    timeout=300
+                )
+            else:
+                run_commands = ["<script>"]
+                outputs = [await ssh_manager.execute_script(
+                    host=host,
+                    username=device.ssh_username,
+                    password=device.ssh_password,
+                    key_path=device.ssh_key,
+                    script=script,
+                    port=device.ssh_port or 22,
+                    timeout=300
+                )]
+
+            errors = self._classify_outputs(translator, run_commands, outputs)
+            success = len(errors) == 0
+
+            return {
+                "success": success,
+                "method": f"ssh_{translator.UPLOAD_METHOD}",
+                "commands_executed": len(commands) - start_index,
+                "start_index": start_index,
+                "script_bytes": len(script),
+                "outputs": outputs,
+                "errors": errors if errors else None,
+                "error": errors[0]["error"] if errors else None,
+                # The import doesn't report how far it got, so retry the script
+                "resume_from": start_index if errors else None
+            }
+
+        except SSHConnectionError as e:
+            logger.error(f"SSH upload failed for {device.name}: {str(e)}")
+            if not e.started:
+                # The script never ran; retry it whole
+                return {
+                    "success": False,
+                    "method": f"ssh_{translator.UPLOAD_METHOD}",
+                    "error": str(e),
+                    "commands_executed": 0,
+                    "resume_from": start_index
+                }
+
+            # The script was cut off somewhere; resending it would repeat
+            # whatever it applied, so the retry sends nothing and fails
+            error = {
+                "command_index": start_index,
+                "command": run_commands[min(e.completed, len(run_commands) - 1)],
+                "error": f"Connection lost while the script was running, progress unknown: {str(e)}"
+            }
+            return {
+                "success": False,
+                "method": f"ssh_{translator.UPLOAD_METHOD}",
+                "error": error["error"],
+                "errors": [error],
+                "commands_executed": 0,
+                "start_index": start_index,
+                "resume_from": len(commands),
+                "resume_errors": [error]
+            }
+
+    async def _execute_transactional(
+        self,
+        device: Device,
+        translator,
+        apply: Callable[[], Awaitable[Dict[str, Any]]],
+        start_index: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Apply a change inside a device-side checkpoint.
+
+        A checkpoint is saved with the vendor's native mechanism (RouterOS
+        backup, FortiOS config revision, WatchGuard config export) before
+        the change. If the change succeeds the checkpoint is discarded. If
+        it reports a classified error the checkpoint is restored where the
+        vendor can do that unattended; the supported vendors all prompt and
+        reboot to restore, so today the checkpoint is left on the device
+        and reported in "rollback_error" with "rolled_back" False.
+
+        Args:
+            device: Device object
+            translator: Vendor translator for the device
+            apply: Coroutine function performing the change
+            start_index: Index the change starts from; after a rollback the
+                device is back at this point
+
+        Returns:
+            Execution result with a "transaction" entry
+        """
+        checkpoint_name = f"orchenet-{device.id}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        checkpoint_commands = translator.checkpoint_commands(checkpoint_name)
+        if not checkpoint_commands:
+            raise ConfigExecutorError(f"Transactional apply not supported for vendor: {device.vendor}")
+
+        host = self._get_ssh_host(device)
+        connection = {
+            "host": host,
+            "username": device.ssh_username,
+            "password": device.ssh_password,
+            "key_path": device.ssh_key,
+            "port": device.ssh_port or 22,
+            "timeout": 120,
+            "classifier_factory": translator.error_classifier,
+            "stop_on_error": True
+        }
+
+        try:
+            saved = await ssh_manager.execute_commands_checked(commands=checkpoint_commands, **connection)
+        except SSHConnectionError as e:
+            # Nothing has been changed yet
+            return {
+                "success": False,
+                "error": f"Failed to create checkpoint: {str(e)}",
+                "commands_executed": 0,
+                "resume_from": start_index,
+                "transaction": {"checkpoint": None, "rolled_back": False}
+            }
+
+        if saved["errors"]:
+            # Nothing has been changed yet
+            return {
+                "success": False,
+                "error": f"Failed to create checkpoint: {saved['errors'][0]['error']}",
+                "commands_executed": 0,
+                "resume_from": start_index,
+                "transaction": {"checkpoint": None, "rolled_back": False}
             }
 
+        checkpoint = translator.parse_checkpoint(checkpoint_name, saved["outputs"])
+        logger.info(f"Saved checkpoint {checkpoint} on {device.name}")
+
+        result = await apply()
+        transaction = {"checkpoint": checkpoint, "rolled_back": False}
+
+        if result.get("success"):
+            cleanup = translator.release_checkpoint_commands(checkpoint)
+            try:
+                await ssh_manager.execute_commands_checked(commands=cleanup, **connection)
+            except SSHConnectionError as e:
+                logger.warning(f"Failed to release checkpoint on {device.name}: {str(e)}")
+        else:
+            rollback = translator.rollback_commands(checkpoint)
+            if not rollback:
+                # The checkpoint stays on the device for a manual restore
+                transaction["rollback_error"] = "Checkpoint cannot be restored automatically"
+            else:
+                try:
+                    restored = await ssh_manager.execute_commands_checked(commands=rollback, **connection)
+                    transaction["rolled_back"] = not restored["errors"]
+                    if restored["errors"]:
+                        transaction["rollback_error"] = restored["errors"][0]["error"]
+                except SSHConnectionError as e:
+                    transaction["rollback_error"] = str(e)
+
+            if transaction["rolled_back"]:
+                logger.warning(f"Rolled back {device.name} to checkpoint {checkpoint['name']}")
+                # The device is back where this attempt started
+                result["resume_from"] = start_index
+                result.pop("resume_errors", None)
+            else:
+                logger.error(f"Rollback failed on {device.name}: {transaction.get('rollback_error')}")
+
+        result["transaction"] = transaction
+        return result
+
+    @staticmethod
+    def _resume_point(execution: Dict[str, Any], errors: List[Dict[str, Any]], start_index: int) -> Optional[int]:
+        """
+        Index a retry of a line-by-line push should start from.
+
+        If the push stopped at an error, the retry starts with the failed
+        command. If it ran to the end, every command has been sent already
+        and resending any of them would duplicate RouterOS-style "add"
+        commands, so the retry starts past the last one; the failed
+        commands are kept in the resume state and make that retry fail.
+        """
+        if not errors:
+            return None
+        if execution["aborted"]:
+            return errors[-1]["command_index"]
+        return start_index + len(execution["outputs"])
+
+    def _get_ssh_host(self, device: Device) -> str:
+        """
+        Resolve the SSH target for a device.
+
+        Raises:
+            ConfigExecutorError: If the device has no address or SSH user
+        """
+        # Prefer WireGuard IP if enabled, otherwise use regular IP
+        host = device.wireguard_private_ip if device.wireguard_enabled else device.ip_address
+
+        if not host:
+            raise ConfigExecutorError("Device IP address not configured")
+
+        if not device.ssh_username:
+            raise ConfigExecutorError("SSH username not configured")
+
+        return host
+
+    def _classify_outputs(
+        self,
+        translator,
+        commands: List[str],
+        outputs: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Check complete command outputs for vendor error messages"""
+        errors = []
+        for idx, output in enumerate(outputs):
+            classifier = translator.error_classifier()
+            if classifier.classify(output):
+                errors.append({
+                    "command_index": idx,
+                    "command": commands[idx],
+                    "output": output,
+                    "error": classifier.first_error
+                })
+        return errors
+
     async def _execute_unifi(
         self,
         device: Device,
@@ -182,14 +674,16 @@ class ConfigExecutor:
                 except json.JSONDecodeError:
                     logger.warning(f"Failed to parse operation: {op_str}")
 
-            # Execute via UniFi Controller
-            async with UniFiController(
-                controller_url=device.api_url,
-                username=device.ssh_username or "admin",
-                password=device.ssh_password or device.api_key,
-                site=device.device_data.get("unifi_site", "default") if device.device_data else "default"
-            ) as controller:
-                results = await controller.apply_configuration(parsed_ops)
+            # Execute via the shared UniFi Controller session, updating
+            # objects that already exist instead of creating duplicates
+            controller = self._unifi_controller(device)
+            translator = self.translators[DeviceVendor.UBIQUITI]
+            skipped = 0
+            collections = translator.upsert_collections(parsed_ops)
+            if collections:
+                current = await controller.get_collections(collections)
+                parsed_ops, skipped = translator.plan_upserts(parsed_ops, current)
+            results = await controller.apply_configuration(parsed_ops)
 
             # Check for failures
             errors = [r for r in results if not r.get("success")]
@@ -199,6 +693,7 @@ class ConfigExecutor:
                 "success": success,
                 "method": "unifi_api",
                 "operations_executed": len(parsed_ops),
+                "operations_skipped": skipped,
                 "results": results,
                 "errors": errors if errors else None
             }
@@ -212,6 +707,91 @@ class ConfigExecutor:
                 "operations_executed": 0
             }
 
+    def _unifi_controller(self, device: Device) -> UniFiController:
+        """Get the shared controller session for a UniFi device"""
+        return unifi_sessions.for_device(device)
+
+    def supports_running_config(self, device: Device) -> bool:
+        """True if a device's running configuration can be retrieved and parsed"""
+        translator = self.translators.get(device.vendor)
+        if not translator or type(translator).config_to_yaml is VendorInterface.config_to_yaml:
+            return False
+        return device.vendor == DeviceVendor.UBIQUITI or bool(translator.RUNNING_CONFIG_COMMANDS)
+
+    async def get_running_config(self, device: Device, timeout: int = 120) -> Any:
+        """
+        Retrieve a device's raw running configuration.
+
+        Args:
+            device: Device object
+            timeout: Command timeout in seconds
+
+        Returns:
+            CLI output (str), or controller data (dict) for UniFi
+
+        Raises:
+            ConfigExecutorError: If retrieval isn't supported or not configured
+            SSHConnectionError: If the SSH session fails
+            UniFiControllerError: If the controller request fails
+        """
+        translator = self.translators.get(device.vendor)
+        if not translator:
+            raise ConfigExecutorError(f"No translator found for vendor: {device.vendor}")
+
+        if device.vendor == DeviceVendor.UBIQUITI:
+            if not device.api_url:
+                raise ConfigExecutorError("UniFi Controller URL not configured")
+
+            return await self._unifi_controller(device).get_running_config()
+
+        if not translator.RUNNING_CONFIG_COMMANDS:
+            raise ConfigExecutorError(
+                f"Running configuration retrieval not supported for {device.vendor.value}"
+            )
+
+        outputs = await ssh_manager.execute_commands(
+            host=self._get_ssh_host(device),
+            username=device.ssh_username,
+            password=device.ssh_password,
+            key_path=device.ssh_key,
+            commands=translator.RUNNING_CONFIG_COMMANDS,
+            port=device.ssh_port or 22,
+            timeout=timeout
+        )
+        return "\n".join(outputs)
+
+    def parse_running_config(self, vendor: DeviceVendor, running_config: Any) -> Dict[str, Any]:
+        """
+        Convert raw running configuration into the unified schema.
+
+        CPU-bound on large configs; async callers should run it in an executor.
+
+        Raises:
+            ConfigExecutorError: If the vendor has no reverse translation
+        """
+        translator = self.translators.get(vendor)
+        if not translator:
+            raise ConfigExecutorError(f"No translator found for vendor: {vendor}")
+        try:
+            return translator.normalize_config(translator.config_to_yaml(running_config))
+        except NotImplementedError as e:
+            raise ConfigExecutorError(str(e))
+
+    async def import_running_config(self, device: Device, timeout: int = 120) -> Dict[str, Any]:
+        """
+        Retrieve and parse a device's running configuration.
+
+        Args:
+            device: Device object
+            timeout: Command timeout in seconds
+
+        Returns:
+            Unified configuration dictionary
+        """
+        raw = await self.get_running_config(device, timeout=timeout)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.parse_running_config, device.vendor, raw)
+
     async def test_connection(self, device: Device) -> bool:
         """
         Test connection to a device.
@@ -228,13 +808,7 @@ class ConfigExecutor:
                 if not device.api_url:
                     return False
 
-                async with UniFiController(
-                    controller_url=device.api_url,
-                    username=device.ssh_username or "admin",
-                    password=device.ssh_password or device.api_key,
-                    site=device.device_data.get("unifi_site", "default") if device.device_data else "default"
-                ) as controller:
-                    await controller.get_devices()
+                await self._unifi_controller(device).get_devices(max_age=0)
                 return True
 
             else:
@@ -270,21 +844,19 @@ class ConfigExecutor:
 
         try:
             if device.vendor == DeviceVendor.UBIQUITI:
-                # Get status via UniFi Controller
-                async with UniFiController(
-                    controller_url=device.api_url,
-                    username=device.ssh_username or "admin",
-                    password=device.ssh_password or device.api_key,
-                    site=device.device_data.get("unifi_site", "default") if device.device_data else "default"
-                ) as controller:
-                    if device.mac_address:
+                # Get status via the shared UniFi Controller session,
+                # preferring state pushed over the event websocket
+                controller = self._unifi_controller(device)
+                if device.mac_address:
+                    status = unifi_events.device_state(controller, device.mac_address)
+                    if status is None:
                         status = await controller.get_device_status(device.mac_address)
-                        return translator.parse_device_status(str(status))
-                    else:
-                        devices = await controller.get_devices()
-                        if devices:
-                            return translator.parse_device_status(str(devices[0]))
-                        return {"status": "unknown"}
+                    return translator.parse_device_status(str(status))
+                else:
+                    devices = await controller.get_devices()
+                    if devices:
+                        return translator.parse_device_status(str(devices[0]))
+                    return {"status": "unknown"}
 
             else:
                 # Get status via SSH
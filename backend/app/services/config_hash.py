@@ -0,0 +1,27 @@
+"""
+Canonical configuration hashing
+Stable content hashes for unified configurations and their sections.
+"""
+import hashlib
+import json
+from typing import Any, Dict
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Serialize a value to canonical JSON.
+
+    Keys are sorted and whitespace removed, so equal configurations always
+    produce identical strings regardless of key order.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def content_hash(value: Any) -> str:
+    """SHA-256 hex digest of a value's canonical JSON"""
+    return hashlib.sha256(canonical_json(value).encode()).hexdigest()
+
+
+def section_hashes(config: Dict[str, Any]) -> Dict[str, str]:
+    """Content hash of each top-level section of a configuration"""
+    return {section: content_hash(value) for section, value in (config or {}).items()}
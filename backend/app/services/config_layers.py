@@ -0,0 +1,324 @@
+"""
+Layered Configuration Resolver
+Merges global, site and role configuration groups with device overlays.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .config_hash import content_hash
+from ..config import settings
+from ..models.config_group import ConfigGroup, ConfigScope
+from ..models.device import Device
+from ..vendors.diff import identity_key
+
+logger = logging.getLogger(__name__)
+
+# List items carrying this key set to true are removed from the merged list
+REMOVE_MARKER = "_remove"
+
+_SCOPE_ORDER = {ConfigScope.GLOBAL: 0, ConfigScope.SITE: 1, ConfigScope.ROLE: 2}
+
+
+def merge_configs(base: Any, overlay: Any) -> Any:
+    """
+    Deterministically merge an overlay configuration onto a base.
+
+    - Dictionaries merge key by key; an overlay value of None deletes the key
+    - Lists of dictionaries that share an identity key (id, name, ssid,
+      address) merge item by item: matching items are merged, new items are
+      appended, and items marked with "_remove": true are dropped
+    - Anything else is replaced by the overlay
+
+    Neither input is modified; unchanged base subtrees are shared with the
+    result.
+
+    Args:
+        base: Lower-precedence configuration
+        overlay: Higher-precedence configuration
+
+    Returns:
+        Merged configuration
+    """
+    if isinstance(base, dict) and isinstance(overlay, dict):
+        merged = dict(base)
+        for key, value in overlay.items():
+            if value is None:
+                merged.pop(key, None)
+            elif key in merged:
+                merged[key] = merge_configs(merged[key], value)
+            else:
+                merged[key] = _strip_markers(value)
+        return merged
+
+    if isinstance(base, list) and isinstance(overlay, list):
+        key = identity_key(base, overlay)
+        if key:
+            return _merge_keyed_list(base, overlay, key)
+
+    return _strip_markers(overlay)
+
+
+def config_delta(base: Any, target: Any) -> Any:
+    """
+    Compute the smallest overlay that merges onto a base to give a target.
+
+    The inverse of merge_configs: dictionary keys missing from the target
+    are deleted with None and keyed list items with the removal marker.
+    Keyed list items keep the base's order, so a reordering can't be
+    expressed.
+
+    Args:
+        base: Lower-precedence configuration
+        target: Configuration the merge should produce
+
+    Returns:
+        Overlay (an empty dictionary when the base already matches a
+        dictionary target)
+    """
+    if isinstance(base, dict) and isinstance(target, dict):
+        delta = {}
+        for key, value in target.items():
+            if key not in base:
+                delta[key] = value
+            elif content_hash(base[key]) != content_hash(value):
+                delta[key] = config_delta(base[key], value)
+        for key in base:
+            if key not in target:
+                delta[key] = None
+        return delta
+
+    if isinstance(base, list) and isinstance(target, list):
+        key = identity_key(base, target)
+        if key:
+            return _keyed_list_delta(base, target, key)
+
+    return target
+
+
+def _keyed_list_delta(base: List[Dict[str, Any]], target: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Overlay items turning one list of dictionaries into another"""
+    base_items = {content_hash(item[key]): item for item in base}
+    target_keys = set()
+    delta = []
+    for item in target:
+        item_key = content_hash(item[key])
+        target_keys.add(item_key)
+        previous = base_items.get(item_key)
+        if previous is None:
+            delta.append(item)
+        elif content_hash(previous) != content_hash(item):
+            delta.append({key: item[key], **config_delta(previous, item)})
+    for item_key, item in base_items.items():
+        if item_key not in target_keys:
+            delta.append({key: item[key], REMOVE_MARKER: True})
+    return delta
+
+
+def _merge_keyed_list(base: List[Dict[str, Any]], overlay: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Merge two lists of dictionaries matched by identity key"""
+    merged: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict(
+        (content_hash(item[key]), item) for item in base
+    )
+    for item in overlay:
+        item_key = content_hash(item[key])
+        if item.get(REMOVE_MARKER):
+            merged.pop(item_key, None)
+            continue
+        if item_key in merged:
+            merged[item_key] = merge_configs(merged[item_key], item)
+        else:
+            merged[item_key] = _strip_markers(item)
+    return list(merged.values())
+
+
+def _strip_markers(value: Any) -> Any:
+    """Drop removal markers (and the items they mark) that have nothing to remove"""
+    if isinstance(value, dict):
+        return {k: _strip_markers(v) for k, v in value.items() if k != REMOVE_MARKER}
+    if isinstance(value, list):
+        return [
+            _strip_markers(item)
+            for item in value
+            if not (isinstance(item, dict) and item.get(REMOVE_MARKER))
+        ]
+    return value
+
+
+class ConfigLayerResolver:
+    """
+    Computes and caches effective device configurations.
+
+    Group definitions are held in memory (there are few of them) and
+    reloaded only when a group changes. Merged group stacks are cached by
+    the (id, revision) of their groups, so all devices on the same site and
+    role share one merge. Each device's effective config is cached against
+    its group stack and a hash of its own overlay: editing a group only
+    invalidates the entries derived from it and never rewrites device rows.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize resolver.
+
+        Args:
+            max_entries: Maximum number of cached device configurations
+        """
+        self.max_entries = max_entries
+        self._groups: Optional[List[Tuple]] = None
+        self._stacks: Dict[Tuple, Dict[str, Any]] = {}
+        self._devices: "OrderedDict[int, Tuple[Tuple, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate_groups(self):
+        """Reload group definitions on next use (call after any group change)"""
+        with self._lock:
+            self._groups = None
+
+    def invalidate_device(self, device_id: int):
+        """Drop a device's cached effective configuration"""
+        with self._lock:
+            self._devices.pop(device_id, None)
+
+    def layers_for(self, db: Session, device: Device) -> List[Tuple]:
+        """
+        Get the groups that apply to a device, in merge order.
+
+        Returns:
+            List of (id, name, scope, revision, config) tuples
+        """
+        return self._layers(db, device.site, device.role)
+
+    def layers_key(self, db: Session, site: Optional[str], role: Optional[str]) -> str:
+        """
+        Hash of the (id, revision) of the groups applying to a site and role.
+
+        Changes whenever one of those groups is created, edited or deleted,
+        so a device's desired hash is current while the key it was computed
+        with still matches.
+        """
+        return content_hash([[layer[0], layer[3]] for layer in self._layers(db, site, role)])
+
+    def _layers(self, db: Session, site: Optional[str], role: Optional[str]) -> List[Tuple]:
+        groups = self._load_groups(db)
+        return [
+            group[:5] for group in groups
+            if group[2] == ConfigScope.GLOBAL
+            or (group[2] == ConfigScope.SITE and site and group[5] == site)
+            or (group[2] == ConfigScope.ROLE and role and group[5] == role)
+        ]
+
+    def effective_config(self, db: Session, device: Device) -> Dict[str, Any]:
+        """
+        Get a device's effective configuration.
+
+        The returned dictionary is shared with the cache and must be
+        treated as read-only.
+
+        Args:
+            db: Database session (used to load groups when needed)
+            device: Device to resolve
+
+        Returns:
+            Merged configuration dictionary
+        """
+        layers = self.layers_for(db, device)
+        stack_key = tuple((layer[0], layer[3]) for layer in layers)
+        overlay_hash = content_hash(device.desired_config)
+
+        with self._lock:
+            entry = self._devices.get(device.id)
+            if entry is not None and entry[0] == stack_key and entry[1] == overlay_hash:
+                self._devices.move_to_end(device.id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        config = merge_configs(self._stack(stack_key, layers), device.desired_config or {})
+
+        with self._lock:
+            self._devices[device.id] = (stack_key, overlay_hash, config)
+            self._devices.move_to_end(device.id)
+            while len(self._devices) > self.max_entries:
+                self._devices.popitem(last=False)
+
+        return config
+
+    def group_config(self, db: Session, device: Device) -> Dict[str, Any]:
+        """
+        Get the merged configuration of the groups applying to a device.
+
+        This is the device's effective configuration without its own
+        overlay. The returned dictionary is shared with the cache and must
+        be treated as read-only.
+        """
+        layers = self.layers_for(db, device)
+        return self._stack(tuple((layer[0], layer[3]) for layer in layers), layers)
+
+    def _stack(self, stack_key: Tuple, layers: List[Tuple]) -> Dict[str, Any]:
+        """Merge a group stack, or reuse the cached merge"""
+        with self._lock:
+            base = self._stacks.get(stack_key)
+        if base is None:
+            base = {}
+            for layer in layers:
+                base = merge_configs(base, layer[4] or {})
+            with self._lock:
+                self._stacks[stack_key] = base
+        return base
+
+    def _load_groups(self, db: Session) -> List[Tuple]:
+        """Load group definitions, sorted into merge order"""
+        with self._lock:
+            if self._groups is not None:
+                return self._groups
+
+        rows = db.query(
+            ConfigGroup.id,
+            ConfigGroup.name,
+            ConfigGroup.scope,
+            ConfigGroup.revision,
+            ConfigGroup.config,
+            ConfigGroup.match,
+            ConfigGroup.priority
+        ).all()
+
+        groups = sorted(
+            (tuple(row) for row in rows),
+            key=lambda g: (_SCOPE_ORDER[g[2]], g[6] or 0, g[1])
+        )
+        live = {(g[0], g[3]) for g in groups}
+
+        with self._lock:
+            self._groups = groups
+            # Drop merged stacks that reference an old group revision
+            self._stacks = {
+                key: value for key, value in self._stacks.items()
+                if all(member in live for member in key)
+            }
+
+        logger.info(f"Loaded {len(groups)} configuration groups")
+        return groups
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "groups": len(self._groups) if self._groups is not None else None,
+                "stacks": len(self._stacks),
+                "devices": len(self._devices),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global resolver instance
+config_layers = ConfigLayerResolver(max_entries=settings.config_layer_cache_size)
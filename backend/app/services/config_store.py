@@ -0,0 +1,215 @@
+"""
+Configuration Version Store
+Content-addressed, deduplicated and compressed history of device configurations.
+"""
+import json
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .config_hash import canonical_json, content_hash
+from ..models.config_version import ConfigBlob, ConfigVersion, ConfigVersionKind
+from ..vendors.diff import ConfigDiff, diff_configs
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigStore:
+    """
+    Stores configuration versions as manifests of section blobs.
+
+    Each top-level section is serialized to canonical JSON, hashed and
+    stored once, zlib-compressed. A version only records which blob each
+    section uses, so devices sharing a template (and versions that change
+    one section) share storage: it grows with unique content, not with the
+    number of pushes. Recording a config identical to the latest version
+    is a single indexed lookup and writes nothing.
+    """
+
+    # Compression level for new blobs (zlib, 1-9)
+    COMPRESSION_LEVEL = 6
+
+    def __init__(self, cache_size: int = 1024):
+        """
+        Initialize store.
+
+        Args:
+            cache_size: Number of decompressed section blobs kept in memory
+        """
+        self.cache_size = cache_size
+        # Blobs are immutable, so decoded sections can be cached by hash
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def latest(
+        self,
+        db: Session,
+        device_id: int,
+        kind: ConfigVersionKind
+    ) -> Optional[ConfigVersion]:
+        """Get a device's most recent version of a kind"""
+        return db.query(ConfigVersion).filter(
+            ConfigVersion.device_id == device_id,
+            ConfigVersion.kind == kind
+        ).order_by(ConfigVersion.version.desc()).first()
+
+    def record(
+        self,
+        db: Session,
+        device_id: int,
+        kind: ConfigVersionKind,
+        config: Optional[Dict[str, Any]],
+        source: Optional[str] = None
+    ) -> Tuple[Optional[ConfigVersion], bool]:
+        """
+        Record a configuration version unless it matches the latest one.
+
+        Adds rows to the session; the caller commits.
+
+        Args:
+            db: Database session
+            device_id: Device ID
+            kind: Kind of configuration
+            config: Configuration dictionary (None is not recorded)
+            source: What produced this configuration
+
+        Returns:
+            Tuple of (latest version, True if a new version was created)
+        """
+        if config is None:
+            return None, False
+
+        config_hash = content_hash(config)
+        latest = self.latest(db, device_id, kind)
+        if latest is not None and latest.config_hash == config_hash:
+            return latest, False
+
+        sections: Dict[str, str] = {}
+        payloads: Dict[str, bytes] = {}
+        total_size = 0
+        for name, value in config.items():
+            payload = canonical_json(value).encode()
+            blob_hash = content_hash(value)
+            sections[name] = blob_hash
+            payloads[blob_hash] = payload
+            total_size += len(payload)
+
+        existing = {
+            row[0] for row in db.query(ConfigBlob.hash).filter(ConfigBlob.hash.in_(list(payloads))).all()
+        }
+        for blob_hash, payload in payloads.items():
+            if blob_hash not in existing:
+                db.add(ConfigBlob(
+                    hash=blob_hash,
+                    data=zlib.compress(payload, self.COMPRESSION_LEVEL),
+                    size=len(payload)
+                ))
+
+        version = ConfigVersion(
+            device_id=device_id,
+            kind=kind,
+            version=(latest.version + 1) if latest else 1,
+            config_hash=config_hash,
+            sections=sections,
+            size=total_size,
+            source=source
+        )
+        db.add(version)
+        db.flush()
+
+        logger.info(
+            f"Recorded {kind.value} config v{version.version} for device {device_id} "
+            f"({len(payloads) - len(existing)} new of {len(payloads)} sections)"
+        )
+        return version, True
+
+    def history(
+        self,
+        db: Session,
+        device_id: int,
+        kind: Optional[ConfigVersionKind] = None,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[ConfigVersion]:
+        """List a device's versions, newest first (manifests only, no blob data)"""
+        query = db.query(ConfigVersion).filter(ConfigVersion.device_id == device_id)
+        if kind:
+            query = query.filter(ConfigVersion.kind == kind)
+        return query.order_by(ConfigVersion.created_at.desc(), ConfigVersion.id.desc()).offset(skip).limit(limit).all()
+
+    def load(self, db: Session, version: ConfigVersion) -> Dict[str, Any]:
+        """
+        Reassemble the configuration of a version.
+
+        Returns:
+            Configuration dictionary (shares cached section values; treat
+            as read-only)
+        """
+        sections = self._load_sections(db, set(version.sections.values()))
+        return {name: sections[blob_hash] for name, blob_hash in version.sections.items()}
+
+    def diff(self, db: Session, old: ConfigVersion, new: ConfigVersion) -> ConfigDiff:
+        """
+        Diff two versions.
+
+        Sections whose blob hashes match are skipped without loading them.
+        """
+        changed = {
+            name for name in set(old.sections) | set(new.sections)
+            if old.sections.get(name) != new.sections.get(name)
+        }
+        needed = {old.sections[n] for n in changed if n in old.sections}
+        needed |= {new.sections[n] for n in changed if n in new.sections}
+        values = self._load_sections(db, needed)
+
+        return diff_configs(
+            {n: values[old.sections[n]] for n in changed if n in old.sections},
+            {n: values[new.sections[n]] for n in changed if n in new.sections}
+        )
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        """Storage metrics: logical size of all versions vs. stored blob size"""
+        versions, logical = db.query(func.count(ConfigVersion.id), func.sum(ConfigVersion.size)).one()
+        blobs, raw, stored = db.query(
+            func.count(ConfigBlob.hash),
+            func.sum(ConfigBlob.size),
+            func.sum(func.length(ConfigBlob.data))
+        ).one()
+        return {
+            "versions": versions or 0,
+            "logical_bytes": logical or 0,
+            "blobs": blobs or 0,
+            "unique_bytes": raw or 0,
+            "stored_bytes": stored or 0,
+        }
+
+    def _load_sections(self, db: Session, hashes: set) -> Dict[str, Any]:
+        """Load and decompress section blobs, using the cache where possible"""
+        values: Dict[str, Any] = {}
+        with self._lock:
+            for blob_hash in hashes:
+                if blob_hash in self._cache:
+                    self._cache.move_to_end(blob_hash)
+                    values[blob_hash] = self._cache[blob_hash]
+
+        missing = [h for h in hashes if h not in values]
+        if missing:
+            rows = db.query(ConfigBlob.hash, ConfigBlob.data).filter(ConfigBlob.hash.in_(missing)).all()
+            with self._lock:
+                for blob_hash, data in rows:
+                    value = json.loads(zlib.decompress(data))
+                    values[blob_hash] = value
+                    self._cache[blob_hash] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return values
+
+
+# Global config store instance
+config_store = ConfigStore()
@@ -0,0 +1,147 @@
+"""
+Device Identity Cache
+Resolves device IDs, names and serial numbers to devices without querying the database.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.device import Device, DeviceVendor
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceIdentity:
+    """Core identity of a device"""
+
+    __slots__ = ("id", "name", "serial_number", "vendor")
+
+    def __init__(self, id: int, name: str, serial_number: Optional[str], vendor: DeviceVendor):
+        self.id = id
+        self.name = name
+        self.serial_number = serial_number
+        self.vendor = vendor
+
+
+class DeviceIdentityCache:
+    """
+    Bounded map of device ID, name and serial number to device identity.
+
+    Check-ins identify a device by any of the three; after the first
+    lookup they resolve from memory. Entries are evicted least recently
+    used beyond max_entries and must be invalidated (or refreshed) by
+    whatever creates, renames or deletes a device.
+    """
+
+    def __init__(self, max_entries: int = 50000):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached devices
+        """
+        self.max_entries = max_entries
+        self._devices: "OrderedDict[int, DeviceIdentity]" = OrderedDict()
+        self._by_name: Dict[str, int] = {}
+        self._by_serial: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(
+        self,
+        db: Session,
+        device_id: Optional[int] = None,
+        name: Optional[str] = None,
+        serial_number: Optional[str] = None
+    ) -> Optional[DeviceIdentity]:
+        """
+        Find a device by ID, else name, else serial number.
+
+        Args:
+            db: Database session (queried on cache misses)
+            device_id: Device ID
+            name: Device name
+            serial_number: Device serial number
+
+        Returns:
+            Device identity, or None if no device matches
+        """
+        if device_id:
+            column, value = Device.id, device_id
+        elif name:
+            column, value = Device.name, name
+        elif serial_number:
+            column, value = Device.serial_number, serial_number
+        else:
+            return None
+
+        with self._lock:
+            if column is Device.id:
+                cached_id = value
+            elif column is Device.name:
+                cached_id = self._by_name.get(value)
+            else:
+                cached_id = self._by_serial.get(value)
+            identity = self._devices.get(cached_id)
+            if identity is not None:
+                self._devices.move_to_end(cached_id)
+                self.hits += 1
+                return identity
+            self.misses += 1
+
+        row = db.query(Device.id, Device.name, Device.serial_number, Device.vendor).filter(column == value).first()
+        if row is None:
+            return None
+
+        identity = DeviceIdentity(*row)
+        self._store(identity)
+        return identity
+
+    def refresh(self, device: Device):
+        """Cache a device's current identity (after create or update)"""
+        self._store(DeviceIdentity(device.id, device.name, device.serial_number, device.vendor))
+
+    def invalidate(self, device_id: int):
+        """Drop a device (after delete or rename)"""
+        with self._lock:
+            self._drop(self._devices.pop(device_id, None))
+
+    def _store(self, identity: DeviceIdentity):
+        with self._lock:
+            self._drop(self._devices.pop(identity.id, None))
+            self._devices[identity.id] = identity
+            self._by_name[identity.name] = identity.id
+            if identity.serial_number:
+                self._by_serial[identity.serial_number] = identity.id
+            while len(self._devices) > self.max_entries:
+                self._drop(self._devices.popitem(last=False)[1])
+
+    def _drop(self, identity: Optional[DeviceIdentity]):
+        """Remove an identity's name and serial keys (caller holds the lock)"""
+        if identity is None:
+            return
+        if self._by_name.get(identity.name) == identity.id:
+            del self._by_name[identity.name]
+        if identity.serial_number and self._by_serial.get(identity.serial_number) == identity.id:
+            del self._by_serial[identity.serial_number]
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "devices": len(self._devices),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global cache instance
+device_identities = DeviceIdentityCache(max_entries=settings.device_identity_cache_size)
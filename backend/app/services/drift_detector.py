@@ -0,0 +1,366 @@
+"""
+Drift Detector Service
+Background worker that compares running device configuration with the desired configuration.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device, DeviceVendor
+from ..models.drift import DriftRecord, DriftStatus
+from ..vendors.base import VendorInterface
+from ..vendors.diff import identity_key
+from .config_executor import config_executor, ConfigExecutorError
+from .config_hash import canonical_json, content_hash, section_hashes
+from .config_layers import config_layers
+from .ssh_manager import SSHConnectionError
+from .unifi_controller import UniFiControllerError
+
+logger = logging.getLogger(__name__)
+
+
+def project_config(
+    running: Any,
+    desired: Any,
+    projected_lists: Tuple[str, ...] = (),
+    path: str = "",
+    ordered_lists: Tuple[str, ...] = ()
+) -> Any:
+    """
+    Reduce a running configuration to the settings the desired one manages.
+
+    Dictionaries keep only the keys present in the desired side. Items of
+    keyed lists are projected onto the matching desired item; running items
+    with no desired counterpart are kept, since they are drift too, except
+    in the vendor's projected lists (e.g. physical interfaces). Matched
+    items are put in the desired order and extra ones after them sorted by
+    key, so the order a device exports items in isn't drift, except in the
+    vendor's ordered lists (e.g. firewall rules), which keep running order.
+
+    Args:
+        running: Parsed running configuration (unified schema)
+        desired: Desired configuration
+        projected_lists: Dotted paths of lists where unmatched running items
+            are dropped
+        path: Dotted path of the values being compared (used in recursion)
+        ordered_lists: Dotted paths of lists whose item order matters
+
+    Returns:
+        Projected running configuration
+    """
+    if isinstance(running, dict) and isinstance(desired, dict):
+        return {
+            key: project_config(
+                running[key], value, projected_lists, f"{path}.{key}" if path else key, ordered_lists
+            )
+            for key, value in desired.items()
+            if key in running
+        }
+
+    if isinstance(running, list) and isinstance(desired, list):
+        key = identity_key(desired)
+        if key and all(isinstance(item, dict) for item in running):
+            position = {canonical_json(item[key]): index for index, item in enumerate(desired)}
+            drop_extra = path in projected_lists
+            projected = []  # (sort key, item), in running order
+            for item in running:
+                item_key = canonical_json(item.get(key))
+                index = position.get(item_key)
+                if index is not None:
+                    item = project_config(item, desired[index], projected_lists, path, ordered_lists)
+                    projected.append(((0, index, ""), item))
+                elif not drop_extra:
+                    projected.append(((1, 0, item_key), item))
+
+            if path not in ordered_lists:
+                projected.sort(key=lambda entry: entry[0])
+            return [item for _, item in projected]
+
+    return running
+
+
+def strip_keys(config: Any, keys: Set[str]) -> Any:
+    """Remove the given keys at any depth"""
+    if not keys:
+        return config
+    if isinstance(config, dict):
+        return {k: strip_keys(v, keys) for k, v in config.items() if k not in keys}
+    if isinstance(config, list):
+        return [strip_keys(item, keys) for item in config]
+    return config
+
+
+def comparable_desired(
+    translator: VendorInterface,
+    desired: Dict[str, Any],
+    current_config: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Prepare a desired configuration for comparison with a running one.
+
+    Identifiers are pinned the way the last push (or import) left them in
+    current_config; values the device never reports back are dropped.
+    """
+    reference = translator.normalize_config(current_config) if current_config else None
+    return strip_keys(translator.normalize_config(desired, reference=reference), translator.WRITE_ONLY_KEYS)
+
+
+def running_matches(translator: VendorInterface, running: Dict[str, Any], desired: Dict[str, Any]) -> bool:
+    """Whether a parsed running configuration carries every setting of a comparable desired one"""
+    projected = project_config(running, desired, translator.PROJECTED_LISTS, ordered_lists=translator.ORDERED_LISTS)
+    return content_hash(projected) == content_hash(desired)
+
+
+class DriftDetector:
+    """
+    Background drift detector.
+
+    Checks are spread evenly over the check period so the whole fleet is
+    covered once per period, with a bounded number of devices being
+    queried at a time. Devices checked longest ago go first.
+    """
+
+    def __init__(self, period: int = 3600, concurrency: int = 10, timeout: int = 120):
+        """
+        Initialize drift detector.
+
+        Args:
+            period: Seconds in which every device should be checked once
+            concurrency: Maximum number of devices queried at the same time
+            timeout: Seconds allowed for retrieving one running configuration
+        """
+        self.period = period
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self.last_cycle: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        """Start the drift detector"""
+        if self.running:
+            logger.warning("Drift detector already running")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("Drift detector started")
+
+    async def stop(self):
+        """Stop the drift detector"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("Drift detector stopped")
+
+    async def _run_loop(self):
+        """Main loop: one cycle per period"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            started = loop.time()
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                logger.error(f"Error in drift detection cycle: {str(e)}", exc_info=True)
+
+            # Wait out the rest of the period before starting over
+            await asyncio.sleep(max(self.period - (loop.time() - started), 1))
+
+    async def run_cycle(self) -> int:
+        """
+        Check every device once, spread over the check period.
+
+        Returns:
+            Number of devices checked
+        """
+        device_ids = self._devices_by_last_check()
+        if not device_ids:
+            return 0
+
+        started = datetime.utcnow()
+        spacing = self.period / len(device_ids)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        logger.info(f"Drift cycle: {len(device_ids)} devices, one every {spacing:.2f}s")
+
+        async def check(device_id: int):
+            try:
+                await self.check_device(device_id)
+            except Exception as e:
+                logger.error(f"Drift check failed for device {device_id}: {str(e)}", exc_info=True)
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for idx, device_id in enumerate(device_ids):
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(check(device_id)))
+            if idx < len(device_ids) - 1:
+                await asyncio.sleep(spacing)
+
+        await asyncio.gather(*tasks)
+
+        self.last_cycle = {
+            "started_at": started.isoformat(),
+            "completed_at": datetime.utcnow().isoformat(),
+            "devices": len(device_ids)
+        }
+        return len(device_ids)
+
+    def _devices_by_last_check(self) -> List[int]:
+        """Device IDs, never-checked first, then oldest check first"""
+        db = SessionLocal()
+        try:
+            rows = db.query(Device.id).outerjoin(
+                DriftRecord, DriftRecord.device_id == Device.id
+            ).order_by(
+                DriftRecord.checked_at.is_(None).desc(),
+                DriftRecord.checked_at,
+                Device.id
+            ).all()
+            return [row[0] for row in rows]
+        finally:
+            db.close()
+
+    async def check_device(self, device_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Compare one device's running configuration with its desired configuration.
+
+        If neither the raw running configuration nor the desired section
+        hashes changed since the last check, the previous result is kept
+        without parsing anything.
+
+        Args:
+            device_id: Device ID
+
+        Returns:
+            Drift record dictionary, or None if the device has no desired
+            configuration
+        """
+        db = SessionLocal()
+        try:
+            device = db.query(Device).filter(Device.id == device_id).first()
+            if not device:
+                return None
+
+            translator = config_executor.translators.get(device.vendor)
+            desired = config_layers.effective_config(db, device)
+            if not translator or not desired:
+                return None
+
+            desired = comparable_desired(translator, desired, device.current_config)
+            desired_sections = section_hashes(desired)
+            desired_hash = content_hash(desired_sections)
+            record = db.query(DriftRecord).filter(DriftRecord.device_id == device_id).first()
+
+            status = DriftStatus.ERROR
+            drifted: List[str] = []
+            running_sections = None
+            running_hash = None
+            error = None
+
+            if not config_executor.supports_running_config(device):
+                status = DriftStatus.UNSUPPORTED
+                error = f"Running configuration retrieval not supported for {device.vendor.value}"
+            else:
+                try:
+                    raw = await asyncio.wait_for(
+                        config_executor.get_running_config(device, timeout=self.timeout),
+                        timeout=self.timeout
+                    )
+                    running_hash = content_hash(translator.running_config_fingerprint(raw))
+
+                    if (
+                        record
+                        and record.status in (DriftStatus.IN_SYNC, DriftStatus.DRIFTED)
+                        and record.running_hash == running_hash
+                        and record.desired_hash == desired_hash
+                    ):
+                        # Neither side changed since the last check
+                        record.checked_at = datetime.utcnow()
+                        db.commit()
+                        return self._record_dict(record)
+
+                    # Parsing large configs is CPU-bound; keep it off the event loop
+                    loop = asyncio.get_running_loop()
+                    running = await loop.run_in_executor(
+                        None, self._parse_running_config, device.vendor, translator, raw, desired
+                    )
+                    running_sections = section_hashes(running)
+                    drifted = [
+                        section for section, value_hash in desired_sections.items()
+                        if running_sections.get(section) != value_hash
+                    ]
+                    status = DriftStatus.DRIFTED if drifted else DriftStatus.IN_SYNC
+
+                except asyncio.TimeoutError:
+                    error = f"Timed out retrieving running configuration after {self.timeout}s"
+                except (SSHConnectionError, UniFiControllerError, ConfigExecutorError, ValueError) as e:
+                    error = str(e)
+
+            now = datetime.utcnow()
+            if record is None:
+                record = DriftRecord(device_id=device_id, status=status, changed_at=now)
+                db.add(record)
+            elif record.status != status or record.drifted_sections != drifted:
+                record.changed_at = now
+
+            record.status = status
+            record.drifted_sections = drifted
+            record.section_hashes = running_sections
+            record.desired_hash = desired_hash
+            record.running_hash = running_hash
+            record.error_message = error
+            record.checked_at = now
+            db.commit()
+
+            if status == DriftStatus.DRIFTED:
+                logger.warning(f"Configuration drift on {device.name}: {', '.join(drifted)}")
+
+            return self._record_dict(record)
+
+        finally:
+            db.close()
+
+    def _parse_running_config(
+        self,
+        vendor: DeviceVendor,
+        translator: VendorInterface,
+        raw: Any,
+        desired: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Parse a running configuration and project it onto the desired one"""
+        running = config_executor.parse_running_config(vendor, raw)
+        return project_config(running, desired, translator.PROJECTED_LISTS, ordered_lists=translator.ORDERED_LISTS)
+
+    @staticmethod
+    def _record_dict(record: DriftRecord) -> Dict[str, Any]:
+        return {
+            "device_id": record.device_id,
+            "status": record.status,
+            "drifted_sections": record.drifted_sections or [],
+            "section_hashes": record.section_hashes,
+            "desired_hash": record.desired_hash,
+            "running_hash": record.running_hash,
+            "error_message": record.error_message,
+            "checked_at": record.checked_at,
+            "changed_at": record.changed_at,
+        }
+
+
+# Global drift detector instance
+drift_detector = DriftDetector(
+    period=settings.drift_check_period,
+    concurrency=settings.drift_concurrency,
+    timeout=settings.drift_timeout
+)
@@ -0,0 +1,236 @@
+"""
+VPN IP Allocator
+Hands out VPN addresses from bitmap-indexed pools backed by a reservation table.
+"""
+import ipaddress
+import logging
+import threading
+from typing import Optional, Dict, List, Any, Iterable, Union
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.device import Device
+from ..models.vpn_ip import VpnIpReservation
+
+logger = logging.getLogger(__name__)
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class AddressPool:
+    """
+    Used/free index of one network.
+
+    A bitmap marks used host offsets. Free addresses come from a stack of
+    released offsets, then from a cursor that only moves forward, so every
+    allocation is O(1) amortized whatever the pool size (a /16 bitmap is
+    8 KiB).
+    """
+
+    def __init__(self, network: Network, reserved: Iterable[str] = ()):
+        self.network = network
+        self.size = network.num_addresses
+        self._base = int(network.network_address)
+        self._used = bytearray((self.size + 7) // 8)
+        self._released: List[int] = []
+        self._cursor = 0
+        self.used = 0
+
+        # Network and broadcast addresses are never handed out
+        self.mark_used(0)
+        if network.version == 4 and network.prefixlen < 31:
+            self.mark_used(self.size - 1)
+        for address in reserved:
+            self.mark_used(self.offset(address))
+
+    def offset(self, address: str) -> int:
+        """Offset of an address in the pool"""
+        return int(ipaddress.ip_address(address)) - self._base
+
+    def address(self, offset: int) -> str:
+        """Address at an offset"""
+        return str(ipaddress.ip_address(self._base + offset))
+
+    def is_used(self, offset: int) -> bool:
+        return bool(self._used[offset >> 3] & (1 << (offset & 7)))
+
+    def mark_used(self, offset: int):
+        if 0 <= offset < self.size and not self.is_used(offset):
+            self._used[offset >> 3] |= 1 << (offset & 7)
+            self.used += 1
+
+    def mark_free(self, offset: int):
+        if 0 < offset < self.size and self.is_used(offset):
+            self._used[offset >> 3] &= ~(1 << (offset & 7))
+            self.used -= 1
+            self._released.append(offset)
+
+    def take(self) -> Optional[int]:
+        """Mark the next free offset used and return it (None if exhausted)"""
+        while self._released:
+            offset = self._released.pop()
+            if not self.is_used(offset):
+                self.mark_used(offset)
+                return offset
+
+        while self._cursor < self.size:
+            offset = self._cursor
+            self._cursor += 1
+            if not self.is_used(offset):
+                self.mark_used(offset)
+                return offset
+
+        return None
+
+
+class VpnIpAllocator:
+    """
+    Persistent VPN address allocator.
+
+    Each pool's index is built from the reservation table (seeded from
+    devices' wireguard_private_ip the first time a pool is used). An
+    allocation takes the next free address from the index and inserts its
+    reservation; if another worker reserved it first, the unique index
+    rejects the insert and the next free address is tried. Addresses
+    released through another worker aren't in this worker's index, so a
+    pool that looks exhausted is rebuilt from the table before giving up.
+
+    Allocation queries and commits synchronously; async callers run it in
+    an executor.
+    """
+
+    def __init__(self):
+        self._pools: Dict[str, AddressPool] = {}
+        self._lock = threading.Lock()
+
+    def allocate(
+        self,
+        db: Session,
+        network: Union[str, Network],
+        device_id: int,
+        reserved: Iterable[str] = ()
+    ) -> Optional[str]:
+        """
+        Reserve an address for a device (commits).
+
+        A device that already holds an address in the pool gets it back.
+
+        Args:
+            db: Database session
+            network: Pool network
+            device_id: Device the address is for
+            reserved: Addresses never handed out (e.g. the server's)
+
+        Returns:
+            Reserved address, or None if the pool is exhausted
+        """
+        network = ipaddress.ip_network(network)
+        pool_name = str(network)
+
+        with self._lock:
+            pool = self._load_pool(db, network, reserved)
+
+            existing = self._reservation(db, pool_name, device_id)
+            if existing:
+                return existing
+
+            rebuilt = False
+            while True:
+                offset = pool.take()
+                if offset is None and not rebuilt:
+                    del self._pools[pool_name]
+                    pool = self._load_pool(db, network, reserved)
+                    rebuilt = True
+                    continue
+                if offset is None:
+                    logger.warning(f"VPN address pool {pool_name} exhausted")
+                    return None
+
+                address = pool.address(offset)
+                db.add(VpnIpReservation(pool=pool_name, address=address, device_id=device_id))
+                try:
+                    db.commit()
+                    return address
+                except IntegrityError:
+                    # Reserved by another worker (the offset stays marked
+                    # used), or this device got an address concurrently
+                    db.rollback()
+                    existing = self._reservation(db, pool_name, device_id)
+                    if existing:
+                        return existing
+
+    def release(self, db: Session, device_id: int) -> int:
+        """
+        Release a device's addresses in all pools (the caller commits).
+
+        Returns:
+            Number of addresses released
+        """
+        with self._lock:
+            reservations = db.query(VpnIpReservation).filter(VpnIpReservation.device_id == device_id).all()
+            for reservation in reservations:
+                pool = self._pools.get(reservation.pool)
+                if pool is not None:
+                    pool.mark_free(pool.offset(reservation.address))
+                db.delete(reservation)
+            return len(reservations)
+
+    def _reservation(self, db: Session, pool_name: str, device_id: int) -> Optional[str]:
+        return db.query(VpnIpReservation.address).filter(
+            VpnIpReservation.pool == pool_name,
+            VpnIpReservation.device_id == device_id
+        ).scalar()
+
+    def _load_pool(self, db: Session, network: Network, reserved: Iterable[str]) -> AddressPool:
+        """Pool index, built from the reservation table on first use"""
+        pool_name = str(network)
+        pool = self._pools.get(pool_name)
+        if pool is None:
+            self._seed(db, network)
+            pool = AddressPool(network, reserved)
+            for (address,) in db.query(VpnIpReservation.address).filter(VpnIpReservation.pool == pool_name):
+                pool.mark_used(pool.offset(address))
+            self._pools[pool_name] = pool
+            logger.info(f"Loaded VPN address pool {pool_name}: {pool.used}/{pool.size} used")
+        return pool
+
+    def _seed(self, db: Session, network: Network):
+        """Reserve addresses devices were given before the table existed"""
+        pool_name = str(network)
+        if db.query(VpnIpReservation.id).filter(VpnIpReservation.pool == pool_name).first():
+            return
+
+        seen = set()
+        rows = []
+        for device_id, address in db.query(Device.id, Device.wireguard_private_ip).filter(
+            Device.wireguard_private_ip.isnot(None)
+        ):
+            try:
+                if ipaddress.ip_address(address) not in network or address in seen:
+                    continue
+            except ValueError:
+                continue
+            seen.add(address)
+            rows.append({"pool": pool_name, "address": address, "device_id": device_id})
+
+        if not rows:
+            return
+        try:
+            db.bulk_insert_mappings(VpnIpReservation, rows)
+            db.commit()
+            logger.info(f"Seeded {len(rows)} VPN address reservations for {pool_name}")
+        except IntegrityError:
+            # Another worker seeded it first
+            db.rollback()
+
+    def stats(self) -> Dict[str, Any]:
+        """Allocator metrics"""
+        return {
+            name: {"size": pool.size, "used": pool.used}
+            for name, pool in self._pools.items()
+        }
+
+
+# Global allocator instance
+vpn_ip_allocator = VpnIpAllocator()
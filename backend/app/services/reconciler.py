@@ -0,0 +1,330 @@
+"""
+Config Reconciler Service
+Enqueues configuration pushes for devices whose desired and applied configurations differ.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from sqlalchemy import DateTime, Integer, and_, exists, insert, literal, literal_column, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device
+from ..models.task import Task, TaskStatus, TaskType
+from .config_hash import content_hash
+from .config_layers import config_layers
+
+logger = logging.getLogger(__name__)
+
+# Desired hash of a device with nothing to push
+EMPTY_CONFIG_HASH = content_hash({})
+
+
+class ConfigReconciler:
+    """
+    Desired-state reconciler.
+
+    Every device stores the hash of its effective desired configuration and
+    of the configuration last applied to it. A device needs a push when the
+    two differ; all such devices are found, and given exactly one
+    CONFIG_UPDATE task each, by a single INSERT ... SELECT over the hash
+    index that skips devices with an update already pending or running (a
+    partial unique index on tasks enforces the same rule under races).
+
+    Desired hashes are set whenever a device's overlay changes, together
+    with the layers key (group ids and revisions) they were computed from.
+    Group edits write no device rows: a device whose site and role now
+    resolve to a different layers key is recomputed in the next batch, so
+    a group change costs one merge and one write per affected device.
+
+    A device whose reconciler push failed for good is not given another
+    until its desired hash changes, so a config the device rejects is
+    tried once per change rather than on every check-in or cycle.
+    """
+
+    def __init__(self, interval: int = 60, batch_size: int = 1000, max_retries: int = 3):
+        """
+        Initialize reconciler.
+
+        Args:
+            interval: Seconds between fleet-wide reconcile cycles
+            batch_size: Devices whose desired hash is recomputed per transaction
+            max_retries: Retries allowed for the CONFIG_UPDATE tasks it creates
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.last_cycle: Optional[Dict[str, Any]] = None
+
+    async def start(self):
+        """Start the periodic reconcile loop"""
+        if self.running:
+            logger.warning("Reconciler already running")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("Reconciler started")
+
+    async def stop(self):
+        """Stop the periodic reconcile loop"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("Reconciler stopped")
+
+    async def _run_loop(self):
+        """Main loop: one fleet-wide cycle per interval"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            try:
+                await loop.run_in_executor(None, self.run_cycle)
+            except Exception as e:
+                logger.error(f"Error in reconcile cycle: {str(e)}", exc_info=True)
+
+            await asyncio.sleep(self.interval)
+
+    def run_cycle(self) -> Dict[str, Any]:
+        """
+        Reconcile the whole fleet once.
+
+        Returns:
+            Cycle summary (hashes refreshed, tasks enqueued)
+        """
+        started = datetime.utcnow()
+        # Pick up group edits made by other workers
+        config_layers.invalidate_groups()
+        db = SessionLocal()
+        try:
+            refreshed = self.refresh_desired_hashes(db)
+            enqueued = self.reconcile(db)
+        finally:
+            db.close()
+
+        self.last_cycle = {
+            "started_at": started.isoformat(),
+            "completed_at": datetime.utcnow().isoformat(),
+            "refreshed": refreshed,
+            "enqueued": enqueued
+        }
+        if refreshed or enqueued:
+            logger.info(f"Reconcile cycle: {refreshed} desired hashes refreshed, {enqueued} updates enqueued")
+        return self.last_cycle
+
+    def update_desired_hash(self, db: Session, device: Device):
+        """
+        Recompute a device's desired hash from its effective configuration.
+
+        Call after changing the device's desired_config, site or role (the
+        device must have an ID). The caller commits.
+        """
+        device.desired_layers_key = config_layers.layers_key(db, device.site, device.role)
+        desired_hash = content_hash(config_layers.effective_config(db, device))
+        if desired_hash != device.desired_config_hash:
+            device.desired_config_hash = desired_hash
+            device.failed_config_hash = None
+
+    def is_stale(self, db: Session, device: Device) -> bool:
+        """Whether a device's desired hash predates its overlay or group stack"""
+        return (
+            device.desired_config_hash is None
+            or device.desired_layers_key != config_layers.layers_key(db, device.site, device.role)
+        )
+
+    def refresh_desired_hashes(self, db: Session, device_ids: Optional[List[int]] = None) -> int:
+        """
+        Recompute stale desired hashes, one batch per transaction.
+
+        The current layers key is computed once per (site, role); devices
+        stored with another key are found through the layers index.
+
+        Args:
+            db: Database session
+            device_ids: Limit to these devices (default: whole fleet)
+
+        Returns:
+            Number of devices refreshed
+        """
+        placements = db.query(Device.site, Device.role).distinct()
+        if device_ids is not None:
+            placements = placements.filter(Device.id.in_(device_ids))
+
+        refreshed = 0
+        for site, role in placements.all():
+            layers_key = config_layers.layers_key(db, site, role)
+            query = db.query(Device).filter(
+                Device.site.is_(None) if site is None else Device.site == site,
+                Device.role.is_(None) if role is None else Device.role == role,
+                or_(
+                    Device.desired_config_hash.is_(None),
+                    Device.desired_layers_key.is_(None),
+                    Device.desired_layers_key != layers_key
+                )
+            )
+            if device_ids is not None:
+                query = query.filter(Device.id.in_(device_ids))
+
+            # Paged by ID so a group edit mid-refresh can't loop a batch
+            last_id = 0
+            while True:
+                devices = query.filter(Device.id > last_id).order_by(Device.id).limit(self.batch_size).all()
+                if not devices:
+                    break
+
+                last_id = devices[-1].id
+                for device in devices:
+                    self.update_desired_hash(db, device)
+                db.commit()
+                refreshed += len(devices)
+
+        return refreshed
+
+    def reconcile(self, db: Session, device_ids: Optional[List[int]] = None) -> int:
+        """
+        Enqueue a CONFIG_UPDATE for every out-of-sync device without one in flight.
+
+        Runs as one INSERT ... SELECT and commits it.
+
+        Args:
+            db: Database session
+            device_ids: Limit to these devices (default: whole fleet)
+
+        Returns:
+            Number of tasks enqueued
+        """
+        # Same predicate as the partial index, inlined rather than bound so
+        # the planner can prove the index applies
+        in_flight = exists().where(
+            Task.device_id == Device.id,
+            Task.task_type == literal_column(f"'{TaskType.CONFIG_UPDATE.name}'"),
+            Task.status.in_([
+                literal_column(f"'{TaskStatus.PENDING.name}'"),
+                literal_column(f"'{TaskStatus.IN_PROGRESS.name}'")
+            ])
+        )
+        out_of_sync = and_(
+            Device.desired_config_hash.isnot(None),
+            Device.desired_config_hash != EMPTY_CONFIG_HASH,
+            or_(
+                Device.applied_config_hash.is_(None),
+                Device.applied_config_hash != Device.desired_config_hash
+            ),
+            or_(
+                Device.failed_config_hash.is_(None),
+                Device.failed_config_hash != Device.desired_config_hash
+            ),
+            ~in_flight
+        )
+
+        rows = select(
+            Device.id,
+            literal(TaskType.CONFIG_UPDATE, Task.task_type.type),
+            literal(TaskStatus.PENDING, Task.status.type),
+            literal({"source": "reconciler"}, Task.payload.type),
+            literal(datetime.utcnow(), DateTime()),
+            literal(0, Integer()),
+            literal(self.max_retries, Integer())
+        ).where(out_of_sync)
+        if device_ids is not None:
+            rows = rows.where(Device.id.in_(device_ids))
+
+        statement = insert(Task).from_select(
+            ["device_id", "task_type", "status", "payload", "created_at", "retry_count", "max_retries"],
+            rows
+        )
+
+        try:
+            enqueued = db.execute(statement).rowcount or 0
+            db.commit()
+        except IntegrityError:
+            # A concurrent reconcile or API call enqueued one first; the
+            # next cycle picks up whatever is still out of sync
+            db.rollback()
+            logger.info("Reconcile raced with another config update; skipped")
+            return 0
+
+        self.enqueued += enqueued
+        return enqueued
+
+    def reconcile_device(self, db: Session, device: Device) -> int:
+        """Reconcile a single device (e.g. on check-in)"""
+        if self.is_stale(db, device):
+            self.update_desired_hash(db, device)
+            db.commit()
+        if device.desired_config_hash in (
+            device.applied_config_hash, device.failed_config_hash, EMPTY_CONFIG_HASH
+        ):
+            return 0
+        return self.reconcile(db, [device.id])
+
+    def reconcile_device_id(self, db: Session, device_id: int) -> Optional[int]:
+        """
+        Reconcile a single device by ID, as check-in does.
+
+        Reads only the hash and placement columns; the full row (with its
+        JSON configs) is loaded only when the desired hash is stale.
+
+        Returns:
+            Number of tasks enqueued, or None if the device doesn't exist
+        """
+        state = db.query(
+            Device.site, Device.role, Device.desired_layers_key,
+            Device.desired_config_hash, Device.applied_config_hash, Device.failed_config_hash
+        ).filter(Device.id == device_id).first()
+        if state is None:
+            return None
+        if self.is_stale(db, state):
+            device = db.get(Device, device_id)
+            if device is None:
+                return None
+            return self.reconcile_device(db, device)
+        if state.desired_config_hash in (
+            state.applied_config_hash, state.failed_config_hash, EMPTY_CONFIG_HASH
+        ):
+            return 0
+        return self.reconcile(db, [device_id])
+
+    def push_failed(self, device: Device, task: Task):
+        """
+        Record that a reconciler push failed for good (retries exhausted).
+
+        Reconcile skips the device until its desired hash changes; a
+        manual retry or CONFIG_UPDATE still goes through. The caller
+        commits.
+        """
+        if task.task_type == TaskType.CONFIG_UPDATE and (task.payload or {}).get("source") == "reconciler":
+            device.failed_config_hash = device.desired_config_hash
+            logger.warning(
+                f"Reconciler push to device {device.id} failed; holding until its desired config changes"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Reconciler metrics"""
+        return {
+            "running": self.running,
+            "enqueued": self.enqueued,
+            "last_cycle": self.last_cycle,
+        }
+
+
+# Global reconciler instance
+config_reconciler = ConfigReconciler(
+    interval=settings.reconcile_interval,
+    batch_size=settings.reconcile_batch_size,
+    max_retries=settings.task_max_retries
+)
@@ -4,17 +4,29 @@ Handles SSH connections to network devices with connection pooling and security.
 """
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from contextlib import asynccontextmanager
 import asyncssh
 from asyncssh import SSHClientConnection, SSHClientConnectionOptions
 
+from ..vendors.classifier import OutputClassifier
+
 logger = logging.getLogger(__name__)
 
 
 class SSHConnectionError(Exception):
-    """SSH connection related errors"""
-    pass
+    """
+    SSH connection related errors.
+
+    Raised part-way through a push, it records how far the push got:
+    completed is the number of commands that finished, and started is
+    True once anything may have been applied on the device.
+    """
+
+    def __init__(self, message: str = "", completed: int = 0, started: bool = False):
+        super().__init__(message)
+        self.completed = completed
+        self.started = started or completed > 0
 
 
 class SSHManager:
@@ -80,6 +92,230 @@ class SSHManager:
             logger.error(f"Unexpected error for {host}: {str(e)}")
             raise SSHConnectionError(f"Unexpected error on {host}: {str(e)}")
 
+    async def execute_commands_checked(
+        self,
+        host: str,
+        username: str,
+        password: Optional[str] = None,
+        key_path: Optional[str] = None,
+        commands: List[str] = None,
+        port: int = 22,
+        timeout: int = 30,
+        classifier_factory: Optional[Callable[[], OutputClassifier]] = None,
+        stop_on_error: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute commands while classifying their output as it streams in.
+
+        Args:
+            host: Device IP or hostname
+            username: SSH username
+            password: SSH password (if not using key)
+            key_path: Path to SSH private key (if not using password)
+            commands: List of commands to execute
+            port: SSH port (default 22)
+            timeout: Command timeout in seconds
+            classifier_factory: Creates a fresh OutputClassifier per command
+            stop_on_error: Skip the remaining commands after the first
+                command whose output contains a vendor error
+
+        Returns:
+            Dict with "outputs" (one per executed command), "errors" and
+            "aborted" (True if commands were skipped)
+
+        Raises:
+            SSHConnectionError: If connection or execution fails
+        """
+        outputs: List[str] = []
+        errors: List[Dict[str, Any]] = []
+        if not commands:
+            return {"outputs": outputs, "errors": errors, "aborted": False}
+
+        try:
+            async with self._get_connection(host, username, password, key_path, port, timeout) as conn:
+                for idx, command in enumerate(commands):
+                    logger.info(f"Executing on {host}: {command}")
+                    classifier = classifier_factory() if classifier_factory else None
+
+                    output = await asyncio.wait_for(
+                        self._stream_command(conn, command, classifier),
+                        timeout=timeout
+                    )
+                    outputs.append(output)
+
+                    if classifier and classifier.finish():
+                        errors.append({
+                            "command_index": idx,
+                            "command": command,
+                            "output": output,
+                            "error": classifier.first_error
+                        })
+                        if stop_on_error:
+                            logger.warning(
+                                f"Stopping on {host} after command {idx}: {classifier.first_error}"
+                            )
+                            break
+
+                return {
+                    "outputs": outputs,
+                    "errors": errors,
+                    "aborted": len(outputs) < len(commands)
+                }
+
+        except asyncio.TimeoutError:
+            logger.error(f"Command timed out on {host}")
+            raise SSHConnectionError(f"Command timed out on {host} after {timeout}s", completed=len(outputs))
+        except asyncssh.Error as e:
+            logger.error(f"SSH error for {host}: {str(e)}")
+            raise SSHConnectionError(
+                f"Failed to execute commands on {host}: {str(e)}", completed=len(outputs)
+            )
+        except SSHConnectionError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error for {host}: {str(e)}")
+            raise SSHConnectionError(f"Unexpected error on {host}: {str(e)}", completed=len(outputs))
+
+    async def _stream_command(
+        self,
+        conn: SSHClientConnection,
+        command: str,
+        classifier: Optional[OutputClassifier]
+    ) -> str:
+        """Run one command, feeding its output to the classifier as it arrives"""
+        chunks = []
+        async with conn.create_process(command, stderr=asyncssh.STDOUT) as process:
+            while True:
+                chunk = await process.stdout.read(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if classifier:
+                    classifier.feed(chunk)
+        return "".join(chunks)
+
+    async def upload_and_execute(
+        self,
+        host: str,
+        username: str,
+        password: Optional[str] = None,
+        key_path: Optional[str] = None,
+        filename: str = None,
+        content: str = None,
+        commands: List[str] = None,
+        port: int = 22,
+        timeout: int = 30
+    ) -> List[str]:
+        """
+        Upload a file over SFTP and run commands on the same connection.
+
+        Used for bulk configuration pushes: the script is transferred once
+        and imported with a single command instead of one round trip per line.
+
+        Args:
+            host: Device IP or hostname
+            username: SSH username
+            password: SSH password (if not using key)
+            key_path: Path to SSH private key (if not using password)
+            filename: Remote file name to write
+            content: File contents
+            commands: Commands to execute after the upload
+            port: SSH port (default 22)
+            timeout: Command timeout in seconds
+
+        Returns:
+            List of command outputs
+
+        Raises:
+            SSHConnectionError: If connection, transfer or execution fails
+        """
+        results = []
+        started = False
+        try:
+            async with self._get_connection(host, username, password, key_path, port, timeout) as conn:
+                logger.info(f"Uploading {filename} ({len(content)} bytes) to {host}")
+                async with conn.start_sftp_client() as sftp:
+                    async with sftp.open(filename, "w") as remote_file:
+                        await remote_file.write(content)
+
+                for command in commands or []:
+                    logger.info(f"Executing on {host}: {command}")
+                    started = True
+                    result = await conn.run(command, check=False, timeout=timeout)
+
+                    output = result.stdout if result.stdout else ""
+                    if result.stderr:
+                        logger.warning(f"Command stderr on {host}: {result.stderr}")
+
+                    results.append(output)
+
+                return results
+
+        except asyncssh.Error as e:
+            logger.error(f"SSH error for {host}: {str(e)}")
+            raise SSHConnectionError(
+                f"Failed to upload {filename} to {host}: {str(e)}", completed=len(results), started=started
+            )
+        except SSHConnectionError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error for {host}: {str(e)}")
+            raise SSHConnectionError(
+                f"Unexpected error on {host}: {str(e)}", completed=len(results), started=started
+            )
+
+    async def execute_script(
+        self,
+        host: str,
+        username: str,
+        password: Optional[str] = None,
+        key_path: Optional[str] = None,
+        script: str = None,
+        port: int = 22,
+        timeout: int = 30
+    ) -> str:
+        """
+        Stream a script through a single interactive shell session.
+
+        For devices without a file import command, this still turns N
+        command round trips into one.
+
+        Args:
+            host: Device IP or hostname
+            username: SSH username
+            password: SSH password (if not using key)
+            key_path: Path to SSH private key (if not using password)
+            script: Script contents, one command per line
+            port: SSH port (default 22)
+            timeout: Session timeout in seconds
+
+        Returns:
+            Combined session output
+
+        Raises:
+            SSHConnectionError: If connection or execution fails
+        """
+        started = False
+        try:
+            async with self._get_connection(host, username, password, key_path, port, timeout) as conn:
+                logger.info(f"Executing script on {host} ({len(script.splitlines())} lines)")
+                started = True
+                result = await conn.run(input=script, check=False, timeout=timeout)
+
+                if result.stderr:
+                    logger.warning(f"Script stderr on {host}: {result.stderr}")
+
+                return result.stdout if result.stdout else ""
+
+        except asyncssh.Error as e:
+            logger.error(f"SSH error for {host}: {str(e)}")
+            raise SSHConnectionError(f"Failed to execute script on {host}: {str(e)}", started=started)
+        except SSHConnectionError:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error for {host}: {str(e)}")
+            raise SSHConnectionError(f"Unexpected error on {host}: {str(e)}", started=started)
+
     @asynccontextmanager
     async def _get_connection(
         self,
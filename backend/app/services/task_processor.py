@@ -11,7 +11,12 @@ from sqlalchemy.orm import Session
 from ..database import SessionLocal
 from ..models.task import Task, TaskStatus, TaskType
 from ..models.device import Device, DeviceStatus
+from ..models.config_version import ConfigVersionKind
 from .config_executor import config_executor, ConfigExecutorError
+from .config_hash import content_hash
+from .config_layers import config_layers
+from .config_store import config_store
+from .reconciler import config_reconciler
 
 logger = logging.getLogger(__name__)
 
@@ -121,7 +126,7 @@ class TaskProcessor:
         try:
             # Execute based on task type
             if task.task_type == TaskType.CONFIG_UPDATE:
-                result = await self._execute_config_update(device, task)
+                result = await self._execute_config_update(device, task, db)
 
             elif task.task_type == TaskType.STATUS_COLLECTION:
                 result = await self._execute_status_collection(device, task)
@@ -161,13 +166,20 @@ class TaskProcessor:
             else:
                 logger.error(f"Task {task.id} failed permanently after {task.retry_count} retries")
 
+        if task.status == TaskStatus.FAILED:
+            config_reconciler.push_failed(device, task)
+
     async def _execute_config_update(
         self,
         device: Device,
-        task: Task
+        task: Task,
+        db: Session
     ) -> dict:
         """Execute configuration update task"""
         config = task.payload.get("config")
+        if not config:
+            # No explicit config: push the device's layered desired config
+            config = config_layers.effective_config(db, device)
         if not config:
             return {
                 "success": False,
@@ -175,11 +187,35 @@ class TaskProcessor:
             }
 
         try:
-            result = await config_executor.execute_config(device, config)
+            # Push only the changes unless a full push is requested
+            previous_config = None
+            if not task.payload.get("full_push"):
+                previous_config = device.current_config
+
+            result = await config_executor.execute_config(
+                device,
+                config,
+                previous_config=previous_config,
+                upload=task.payload.get("upload"),
+                fail_fast=task.payload.get("fail_fast"),
+                transactional=task.payload.get("transactional"),
+                resume=task.payload.get("resume")
+            )
+
+            # Remember where a failed push stopped so a retry can pick up
+            # from there (reassigned so the JSON column is marked dirty)
+            payload = dict(task.payload)
+            if result.get("resume"):
+                payload["resume"] = result["resume"]
+            else:
+                payload.pop("resume", None)
+            task.payload = payload
 
             # Update device configuration if successful
             if result.get("success"):
-                device.current_config = config
+                device.current_config = config_executor.applied_config(device.vendor, config, previous_config)
+                device.applied_config_hash = content_hash(config)
+                config_store.record(db, device.id, ConfigVersionKind.APPLIED, config, source=f"task:{task.id}")
                 device.last_config_update = datetime.utcnow()
                 device.status = DeviceStatus.ONLINE
 
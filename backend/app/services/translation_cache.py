@@ -0,0 +1,131 @@
+"""
+Translation Cache
+Content-addressed LRU cache of translated configuration sections.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
+
+from .config_hash import content_hash
+from ..vendors.base import VendorInterface
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry and per-command bookkeeping overhead, in bytes
+_ENTRY_OVERHEAD = 200
+_COMMAND_OVERHEAD = 50
+
+
+class TranslationCache:
+    """
+    LRU cache mapping (vendor, translator version, section hash) to commands.
+
+    The same desired config template is usually translated for many devices,
+    and plan previews translate identical input repeatedly. Configurations
+    are split into the translator's independent sections so devices that
+    share most sections still share most cache entries.
+    Bounded by entry count and by approximate memory size.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize translation cache.
+
+        Args:
+            max_entries: Maximum number of cached sections
+            max_bytes: Approximate memory budget for cached commands
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Tuple[str, ...], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def translate(
+        self,
+        vendor: str,
+        translator: VendorInterface,
+        config: Dict[str, Any]
+    ) -> List[str]:
+        """
+        Translate a configuration, reusing cached sections.
+
+        Args:
+            vendor: Vendor identifier
+            translator: Translator for the vendor
+            config: Unified configuration dictionary
+
+        Returns:
+            List of vendor-specific commands
+        """
+        commands: List[str] = []
+        for unit in translator.translation_units(config):
+            commands.extend(self._translate_unit(str(vendor), translator, unit))
+        return commands
+
+    def _translate_unit(
+        self,
+        vendor: str,
+        translator: VendorInterface,
+        unit: Dict[str, Any]
+    ) -> Tuple[str, ...]:
+        key = (vendor, translator.TRANSLATOR_VERSION, content_hash(unit))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Translate outside the lock; a concurrent miss on the same key
+        # just stores the same result twice
+        commands = tuple(translator.yaml_to_commands(unit))
+        size = _ENTRY_OVERHEAD + sum(len(c) + _COMMAND_OVERHEAD for c in commands)
+
+        if size <= self.max_bytes:
+            with self._lock:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous[1]
+                self._entries[key] = (commands, size)
+                self._bytes += size
+                self._evict()
+
+        return commands
+
+    def _evict(self):
+        """Drop least recently used entries until within bounds"""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
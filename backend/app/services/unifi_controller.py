@@ -4,10 +4,14 @@ Communicates with UniFi Controller API for device management.
 """
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+import time
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple
 import aiohttp
 import json
 
+from ..config import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,13 +26,32 @@ class UniFiController:
     Handles authentication, device discovery, and configuration management.
     """
 
+    # Dependency level of REST collections: objects at level 0 are referred
+    # to by objects at level 1 (WLANs and rules use networks and groups).
+    # Unlisted collections are level 1.
+    APPLY_LEVELS = {
+        "setting": 0,
+        "networkconf": 0,
+        "firewallgroup": 0,
+        "usergroup": 0,
+        "wlangroup": 0,
+        "apgroup": 0,
+    }
+
+    # Collections whose objects must be written in input order (firewall
+    # rules are evaluated in creation order unless rule_index is set)
+    ORDERED_COLLECTIONS = {"firewallrule"}
+
     def __init__(
         self,
         controller_url: str,
         username: str,
         password: str,
         site: str = "default",
-        verify_ssl: bool = True
+        verify_ssl: bool = True,
+        connection_limit: int = 20,
+        stat_ttl: float = 15,
+        apply_concurrency: int = 8
     ):
         """
         Initialize UniFi Controller client.
@@ -39,14 +62,31 @@ class UniFiController:
             password: Controller admin password
             site: Site name (default: "default")
             verify_ssl: Whether to verify SSL certificates
+            connection_limit: Maximum pooled connections to the controller
+            stat_ttl: Seconds a stat/device snapshot is served from memory
+            apply_concurrency: Maximum operations in flight while applying
         """
         self.controller_url = controller_url.rstrip('/')
         self.username = username
         self.password = password
         self.site = site
         self.verify_ssl = verify_ssl
+        self.connection_limit = connection_limit
+        self.apply_concurrency = apply_concurrency
         self._session: Optional[aiohttp.ClientSession] = None
         self._authenticated = False
+        self._login_lock = asyncio.Lock()
+        # Incremented on every login, so concurrent requests that hit the
+        # same expired cookie trigger one re-login between them
+        self._login_generation = 0
+        self.logins = 0
+        self.requests = 0
+
+        self.stat_ttl = stat_ttl
+        # stat/device snapshot: (fetched_at, devices, devices by MAC, devices by type)
+        self._stat_snapshot: Optional[Tuple[float, List, Dict, Dict]] = None
+        self._stat_lock = asyncio.Lock()
+        self.stat_fetches = 0
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -60,8 +100,13 @@ class UniFiController:
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session"""
         if self._session is None or self._session.closed:
-            connector = aiohttp.TCPConnector(ssl=self.verify_ssl)
-            self._session = aiohttp.ClientSession(connector=connector)
+            connector = aiohttp.TCPConnector(ssl=self.verify_ssl, limit=self.connection_limit)
+            # unsafe=True keeps cookies from controllers addressed by IP
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                cookie_jar=aiohttp.CookieJar(unsafe=True)
+            )
+            self._authenticated = False
         return self._session
 
     async def login(self) -> bool:
@@ -89,6 +134,8 @@ class UniFiController:
             ) as response:
                 if response.status == 200:
                     self._authenticated = True
+                    self._login_generation += 1
+                    self.logins += 1
                     logger.info(f"Successfully authenticated to UniFi Controller at {self.controller_url}")
                     return True
                 else:
@@ -112,118 +159,314 @@ class UniFiController:
             finally:
                 await self._session.close()
 
-    async def get_devices(self, device_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def _ensure_login(self, generation: Optional[int] = None):
         """
-        Get all devices from controller.
+        Log in unless already authenticated.
 
         Args:
-            device_type: Filter by device type (uap, usw, ugw, etc.)
+            generation: Login generation a request was sent with; if given,
+                log in again unless someone else already has since then
+        """
+        async with self._login_lock:
+            if generation is None:
+                if self._authenticated:
+                    return
+            elif generation != self._login_generation:
+                return
+            await self.login()
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Any] = None
+    ) -> Tuple[int, Any]:
+        """
+        Send an authenticated request, logging in again once on HTTP 401.
+
+        Args:
+            method: HTTP method
+            endpoint: Path below the controller URL
+            data: JSON body
 
         Returns:
-            List of device dictionaries
+            Tuple of (HTTP status, parsed JSON on 200/201, else response text)
 
         Raises:
-            UniFiControllerError: If request fails
+            aiohttp.ClientError: If the request fails
+            UniFiControllerError: If logging in fails
         """
-        if not self._authenticated:
-            await self.login()
-
+        await self._ensure_login()
         session = await self._get_session()
 
-        try:
-            async with session.get(
-                f"{self.controller_url}/api/s/{self.site}/stat/device"
+        for attempt in range(2):
+            generation = self._login_generation
+            self.requests += 1
+            async with session.request(
+                method,
+                f"{self.controller_url}{endpoint}",
+                json=data
             ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    devices = data.get("data", [])
+                if response.status == 401 and attempt == 0:
+                    logger.info(f"UniFi session at {self.controller_url} expired, logging in again")
+                    self._authenticated = False
+                else:
+                    if response.status in [200, 201]:
+                        return response.status, await response.json()
+                    return response.status, await response.text()
 
-                    # Filter by device type if specified
-                    if device_type:
-                        devices = [d for d in devices if d.get("type") == device_type]
+            await self._ensure_login(generation)
 
-                    return devices
-                else:
-                    raise UniFiControllerError(f"Failed to get devices: HTTP {response.status}")
+    async def _device_snapshot(self, max_age: Optional[float] = None) -> Tuple[float, List, Dict, Dict]:
+        """
+        Get the stat/device snapshot, fetching it if older than max_age.
 
-        except aiohttp.ClientError as e:
-            raise UniFiControllerError(f"Failed to get devices: {str(e)}")
+        Concurrent callers share one fetch: whoever waits on a refresh
+        already in progress uses its result.
+
+        Args:
+            max_age: Maximum snapshot age in seconds (default: stat_ttl)
+
+        Returns:
+            Tuple of (fetched_at, devices, devices by MAC, devices by type)
+
+        Raises:
+            UniFiControllerError: If the request fails
+        """
+        max_age = self.stat_ttl if max_age is None else max_age
+        requested_at = time.monotonic()
+
+        snapshot = self._stat_snapshot
+        if snapshot is not None and requested_at - snapshot[0] < max_age:
+            return snapshot
+
+        async with self._stat_lock:
+            snapshot = self._stat_snapshot
+            if snapshot is not None and (
+                snapshot[0] >= requested_at or time.monotonic() - snapshot[0] < max_age
+            ):
+                return snapshot
+
+            try:
+                status, data = await self._request("GET", f"/api/s/{self.site}/stat/device")
+            except aiohttp.ClientError as e:
+                raise UniFiControllerError(f"Failed to get devices: {str(e)}")
+            if status != 200:
+                raise UniFiControllerError(f"Failed to get devices: HTTP {status}")
+
+            devices = data.get("data", [])
+            by_mac = {}
+            by_type = defaultdict(list)
+            for device in devices:
+                if device.get("mac"):
+                    by_mac[device["mac"].lower()] = device
+                by_type[device.get("type")].append(device)
+
+            self.stat_fetches += 1
+            self._stat_snapshot = (time.monotonic(), devices, by_mac, dict(by_type))
+            return self._stat_snapshot
+
+    async def connect_events(self, heartbeat: float = 30) -> aiohttp.ClientWebSocketResponse:
+        """
+        Open the site's event websocket.
+
+        Uses the session cookie, logging in again once if the handshake is
+        rejected with HTTP 401.
 
-    async def get_device_status(self, device_mac: str) -> Dict[str, Any]:
+        Args:
+            heartbeat: Seconds between websocket pings
+
+        Returns:
+            Connected websocket
+
+        Raises:
+            UniFiControllerError: If the connection fails
+        """
+        base = self.controller_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        url = f"{base}/wss/s/{self.site}/events"
+
+        for attempt in range(2):
+            await self._ensure_login()
+            session = await self._get_session()
+            try:
+                return await session.ws_connect(url, heartbeat=heartbeat)
+            except aiohttp.WSServerHandshakeError as e:
+                if e.status == 401 and attempt == 0:
+                    self._authenticated = False
+                    continue
+                raise UniFiControllerError(f"Event websocket rejected: HTTP {e.status}")
+            except aiohttp.ClientError as e:
+                raise UniFiControllerError(f"Failed to connect to event websocket: {str(e)}")
+
+    def invalidate_device_snapshot(self):
+        """Fetch stat/device again on next use"""
+        self._stat_snapshot = None
+
+    async def get_devices(
+        self,
+        device_type: Optional[str] = None,
+        max_age: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all devices from controller.
+
+        Served from the controller-wide stat/device snapshot.
+
+        Args:
+            device_type: Filter by device type (uap, usw, ugw, etc.)
+            max_age: Maximum snapshot age in seconds (default: stat_ttl;
+                0 always queries the controller)
+
+        Returns:
+            List of device dictionaries (shared with the snapshot; treat as
+            read-only)
+
+        Raises:
+            UniFiControllerError: If request fails
+        """
+        _, devices, _, by_type = await self._device_snapshot(max_age)
+
+        # Filter by device type if specified
+        if device_type:
+            return list(by_type.get(device_type, []))
+        return list(devices)
+
+    async def get_device_status(self, device_mac: str, max_age: Optional[float] = None) -> Dict[str, Any]:
         """
         Get status of a specific device.
 
+        Looked up by MAC in the controller-wide stat/device snapshot, so a
+        sweep over every device on a controller costs one request per TTL.
+
         Args:
             device_mac: Device MAC address
+            max_age: Maximum snapshot age in seconds (default: stat_ttl)
 
         Returns:
             Device status dictionary
         """
-        devices = await self.get_devices()
-        for device in devices:
-            if device.get("mac") == device_mac:
-                return device
+        _, _, by_mac, _ = await self._device_snapshot(max_age)
+        device = by_mac.get(device_mac.lower())
+        if device is not None:
+            return device
 
         raise UniFiControllerError(f"Device with MAC {device_mac} not found")
 
+    def plan_operations(self, operations: List[Dict[str, Any]]) -> List[List[List[int]]]:
+        """
+        Group operations into dependency stages of independent chains.
+
+        Stages run one after another: objects others refer to (networks,
+        groups, settings) are written first, then their dependents, then
+        deletions in reverse dependency order, then device commands. Within
+        a stage, operations on the same object (and on order-sensitive
+        collections such as firewall rules) form a chain that runs in input
+        order; different chains are independent.
+
+        Args:
+            operations: API operation dictionaries
+
+        Returns:
+            Stages, each a list of chains of operation indexes
+        """
+        stages: Dict[int, Dict[Any, List[int]]] = defaultdict(dict)
+
+        for idx, operation in enumerate(operations):
+            endpoint = operation.get("endpoint", "")
+            method = operation.get("method", "POST").upper()
+
+            # /api/s/{site}/<kind>/<collection>[/<id>]
+            parts = endpoint.strip("/").split("/")
+            kind = parts[3] if len(parts) > 3 else ""
+            collection = parts[4] if len(parts) > 4 else ""
+
+            if kind == "cmd":
+                stage = 4
+            else:
+                level = self.APPLY_LEVELS.get(collection, 1)
+                stage = 3 - level if method == "DELETE" else level
+
+            if collection in self.ORDERED_COLLECTIONS:
+                chain_key = collection
+            elif method == "POST":
+                chain_key = idx  # creates are independent of each other
+            else:
+                chain_key = endpoint
+
+            stages[stage].setdefault(chain_key, []).append(idx)
+
+        return [list(stages[stage].values()) for stage in sorted(stages)]
+
     async def apply_configuration(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Apply configuration operations to UniFi Controller.
 
+        Operations run stage by stage (see plan_operations), with up to
+        apply_concurrency requests in flight at a time.
+
         Args:
             operations: List of API operation dictionaries
                 Each dict should have: endpoint, method, data
 
         Returns:
-            List of operation results
+            List of operation results, in the order of operations
 
         Raises:
             UniFiControllerError: If operations fail
         """
-        if not self._authenticated:
-            await self.login()
+        if not operations:
+            return []
 
-        session = await self._get_session()
-        results = []
+        # Fail early (and once) if the controller rejects the login
+        await self._ensure_login()
 
-        for operation in operations:
-            endpoint = operation.get("endpoint", "").replace("{site}", self.site)
-            method = operation.get("method", "POST").upper()
-            data = operation.get("data", {})
+        results: List[Optional[Dict[str, Any]]] = [None] * len(operations)
+        semaphore = asyncio.Semaphore(self.apply_concurrency)
 
-            url = f"{self.controller_url}{endpoint}"
+        async def run_chain(chain: List[int]):
+            for idx in chain:
+                async with semaphore:
+                    results[idx] = await self._apply_operation(operations[idx])
 
-            try:
-                async with session.request(
-                    method,
-                    url,
-                    json=data
-                ) as response:
-                    result = {
-                        "endpoint": endpoint,
-                        "method": method,
-                        "status": response.status,
-                        "success": response.status in [200, 201]
-                    }
+        for stage in self.plan_operations(operations):
+            await asyncio.gather(*(run_chain(chain) for chain in stage))
 
-                    if response.status in [200, 201]:
-                        result["data"] = await response.json()
-                    else:
-                        result["error"] = await response.text()
+        # Adoption and provisioning change device state
+        self.invalidate_device_snapshot()
 
-                    results.append(result)
-                    logger.info(f"Applied operation {method} {endpoint}: HTTP {response.status}")
+        return results
 
-            except aiohttp.ClientError as e:
-                results.append({
-                    "endpoint": endpoint,
-                    "method": method,
-                    "success": False,
-                    "error": str(e)
-                })
-                logger.error(f"Failed to apply operation {method} {endpoint}: {str(e)}")
+    async def _apply_operation(self, operation: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one API operation and describe the outcome"""
+        endpoint = operation.get("endpoint", "").replace("{site}", self.site)
+        method = operation.get("method", "POST").upper()
+        data = operation.get("data", {})
 
-        return results
+        try:
+            status, body = await self._request(method, endpoint, data)
+            result = {
+                "endpoint": endpoint,
+                "method": method,
+                "status": status,
+                "success": status in [200, 201]
+            }
+
+            if status in [200, 201]:
+                result["data"] = body
+            else:
+                result["error"] = body
+
+            logger.info(f"Applied operation {method} {endpoint}: HTTP {status}")
+            return result
+
+        except aiohttp.ClientError as e:
+            logger.error(f"Failed to apply operation {method} {endpoint}: {str(e)}")
+            return {
+                "endpoint": endpoint,
+                "method": method,
+                "success": False,
+                "error": str(e)
+            }
 
     async def create_network(self, name: str, vlan_id: int, **kwargs) -> Dict[str, Any]:
         """
@@ -317,19 +560,60 @@ class UniFiController:
 
     async def get_site_settings(self) -> Dict[str, Any]:
         """Get site settings"""
-        if not self._authenticated:
-            await self.login()
+        status, data = await self._request("GET", f"/api/s/{self.site}/get/setting")
+        if status == 200:
+            return data.get("data", {})
+        else:
+            raise UniFiControllerError(f"Failed to get site settings: HTTP {status}")
 
-        session = await self._get_session()
+    async def get_running_config(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch the site's configuration objects.
 
-        async with session.get(
-            f"{self.controller_url}/api/s/{self.site}/get/setting"
-        ) as response:
-            if response.status == 200:
-                data = await response.json()
-                return data.get("data", {})
-            else:
-                raise UniFiControllerError(f"Failed to get site settings: HTTP {response.status}")
+        Returns:
+            Dictionary of REST collection name to its objects, plus the
+            site settings under "setting"
+
+        Raises:
+            UniFiControllerError: If a request fails
+        """
+        collections = {
+            "setting": f"/api/s/{self.site}/get/setting",
+            "networkconf": f"/api/s/{self.site}/rest/networkconf",
+            "wlanconf": f"/api/s/{self.site}/rest/wlanconf",
+            "firewallrule": f"/api/s/{self.site}/rest/firewallrule",
+            "portforward": f"/api/s/{self.site}/rest/portforward",
+            "routing": f"/api/s/{self.site}/rest/routing",
+        }
+        return await self._fetch_all(collections)
+
+    async def get_collections(self, names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch REST collections (e.g. networkconf, wlanconf), one request each.
+
+        Returns:
+            Dictionary of collection name to its objects
+
+        Raises:
+            UniFiControllerError: If a request fails
+        """
+        return await self._fetch_all({name: f"/api/s/{self.site}/rest/{name}" for name in names})
+
+    async def _fetch_all(self, endpoints: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+        """GET several endpoints concurrently, keyed like endpoints"""
+
+        async def fetch(name: str, endpoint: str):
+            status, data = await self._request("GET", endpoint)
+            if status != 200:
+                raise UniFiControllerError(f"Failed to get {name}: HTTP {status}")
+            return name, data.get("data", [])
+
+        try:
+            results = await asyncio.gather(*(fetch(n, e) for n, e in endpoints.items()))
+        except aiohttp.ClientError as e:
+            raise UniFiControllerError(f"Failed to get {', '.join(endpoints)}: {str(e)}")
+
+        return dict(results)
 
     async def adopt_device(self, device_mac: str) -> bool:
         """
@@ -354,8 +638,98 @@ class UniFiController:
         return results and results[0].get("success", False)
 
 
-# Global controller instance (to be initialized with config)
-_controller_instance: Optional[UniFiController] = None
+class UniFiSessionRegistry:
+    """
+    Shared, long-lived controller sessions.
+
+    One UniFiController (and so one aiohttp session with its cookie jar and
+    connection pool) is kept per (controller_url, username, site). Callers
+    get the shared client instead of creating their own, so a sweep over
+    hundreds of devices on one controller logs in once; an expired cookie
+    is renewed on the first HTTP 401.
+    """
+
+    def __init__(self, connection_limit: int = 20, stat_ttl: float = 15, apply_concurrency: int = 8):
+        """
+        Initialize registry.
+
+        Args:
+            connection_limit: Maximum pooled connections per controller session
+            stat_ttl: Seconds each controller serves stat/device from memory
+            apply_concurrency: Maximum operations in flight per apply
+        """
+        self.connection_limit = connection_limit
+        self.stat_ttl = stat_ttl
+        self.apply_concurrency = apply_concurrency
+        self._controllers: Dict[Tuple[str, str, str], UniFiController] = {}
+
+    def get(
+        self,
+        controller_url: str,
+        username: str,
+        password: str,
+        site: str = "default",
+        verify_ssl: bool = True
+    ) -> UniFiController:
+        """
+        Get the shared controller client for a login and site.
+
+        The client logs in on its first request, not here.
+        """
+        key = (controller_url.rstrip('/'), username, site)
+        controller = self._controllers.get(key)
+
+        if controller is None:
+            controller = UniFiController(
+                controller_url=controller_url,
+                username=username,
+                password=password,
+                site=site,
+                verify_ssl=verify_ssl,
+                connection_limit=self.connection_limit,
+                stat_ttl=self.stat_ttl,
+                apply_concurrency=self.apply_concurrency
+            )
+            self._controllers[key] = controller
+        elif controller.password != password:
+            # Credentials changed: log in with the new ones on next request
+            controller.password = password
+            controller._authenticated = False
+
+        return controller
+
+    def for_device(self, device) -> UniFiController:
+        """Get the shared controller client for a UniFi device's controller and site"""
+        return self.get(
+            controller_url=device.api_url,
+            username=device.ssh_username or "admin",
+            password=device.ssh_password or device.api_key,
+            site=device.device_data.get("unifi_site", "default") if device.device_data else "default"
+        )
+
+    async def close_all(self):
+        """Log out of and close every session"""
+        controllers = list(self._controllers.values())
+        self._controllers.clear()
+        await asyncio.gather(*(controller.logout() for controller in controllers))
+
+    def stats(self) -> Dict[str, Any]:
+        """Session metrics"""
+        controllers = list(self._controllers.values())
+        return {
+            "sessions": len(controllers),
+            "logins": sum(c.logins for c in controllers),
+            "requests": sum(c.requests for c in controllers),
+            "stat_fetches": sum(c.stat_fetches for c in controllers),
+        }
+
+
+# Global session registry
+unifi_sessions = UniFiSessionRegistry(
+    connection_limit=settings.unifi_connection_limit,
+    stat_ttl=settings.unifi_stat_ttl,
+    apply_concurrency=settings.unifi_apply_concurrency
+)
 
 
 def get_controller(
@@ -364,15 +738,5 @@ def get_controller(
     password: str,
     site: str = "default"
 ) -> UniFiController:
-    """Get or create UniFi Controller instance"""
-    global _controller_instance
-
-    if _controller_instance is None:
-        _controller_instance = UniFiController(
-            controller_url=controller_url,
-            username=username,
-            password=password,
-            site=site
-        )
-
-    return _controller_instance
+    """Get the shared UniFi Controller client for a login and site"""
+    return unifi_sessions.get(controller_url, username, password, site)
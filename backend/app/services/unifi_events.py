@@ -0,0 +1,336 @@
+"""
+UniFi Event Ingestion Service
+Keeps UniFi device state current from the controllers' event websockets instead of polling.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import aiohttp
+from sqlalchemy import update
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device, DeviceStatus, DeviceVendor
+from .unifi_controller import UniFiController, unifi_sessions
+
+logger = logging.getLogger(__name__)
+
+# Device status for UniFi "state" values; other states (adopting,
+# pending adoption, ...) leave the stored status unchanged
+UNIFI_STATE_STATUS = {
+    0: DeviceStatus.OFFLINE,  # Disconnected
+    1: DeviceStatus.ONLINE,  # Connected
+    4: DeviceStatus.ONLINE,  # Upgrading
+    5: DeviceStatus.ONLINE,  # Provisioning
+    6: DeviceStatus.OFFLINE,  # Heartbeat missed
+}
+
+
+class ControllerEventStream:
+    """
+    Event websocket of one controller site, and the device states it reported.
+
+    Device objects from device:sync / device:update messages are merged
+    into the state cache by MAC; lost-contact and connected events update
+    the device's state. Every change is passed to on_change.
+    """
+
+    def __init__(self, controller: UniFiController, on_change, reconnect_max: float = 60):
+        """
+        Initialize stream.
+
+        Args:
+            controller: Shared controller client
+            on_change: Called with (mac, state dict) for every device update
+            reconnect_max: Maximum seconds between reconnect attempts
+        """
+        self.controller = controller
+        self.on_change = on_change
+        self.reconnect_max = reconnect_max
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.connected = False
+        self.messages = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start consuming events in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop consuming events"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        """Connect, consume until the socket closes, reconnect with backoff"""
+        delay = 1.0
+        while True:
+            try:
+                ws = await self.controller.connect_events()
+                try:
+                    self.connected = True
+                    delay = 1.0
+                    logger.info(f"Consuming UniFi events from {self.controller.controller_url} ({self.controller.site})")
+
+                    # Events only report changes: seed the cache once per connection
+                    for device in await self.controller.get_devices(max_age=0):
+                        self._merge(device)
+
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            self.handle(json.loads(message.data))
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+                finally:
+                    self.connected = False
+                    await ws.close()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"UniFi event stream {self.controller.controller_url} failed: {str(e)}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max)
+
+    def handle(self, message: Dict[str, Any]):
+        """Apply one websocket message to the state cache"""
+        self.messages += 1
+        kind = (message.get("meta") or {}).get("message")
+        data = message.get("data") or []
+
+        if kind in ("device:sync", "device:update"):
+            for device in data:
+                self._merge(device)
+
+        elif kind == "events":
+            for event in data:
+                key = event.get("key", "")
+                mac = event.get("ap") or event.get("sw") or event.get("gw")
+                if not mac:
+                    continue  # Client (station) events
+                if key.endswith("_Lost_Contact"):
+                    self._merge({"mac": mac, "state": 0})
+                elif key.endswith("_Connected") or key.endswith("_Restarted"):
+                    self._merge({"mac": mac, "state": 1, "last_seen": event.get("time", 0) // 1000 or None})
+
+    def _merge(self, device: Dict[str, Any]):
+        """Merge a (partial) device object into the cache"""
+        mac = (device.get("mac") or "").lower()
+        if not mac:
+            return
+        state = self.states.setdefault(mac, {})
+        state.update({k: v for k, v in device.items() if v is not None})
+        self.on_change(mac, state)
+
+
+class UniFiEventIngestor:
+    """
+    Push-based UniFi device state.
+
+    Opens one event stream per controller site that has UniFi devices and
+    keeps their latest state in memory. Status and last_check_in changes
+    are collected and written in one bulk UPDATE per flush interval, so the
+    database sees a handful of statements however chatty the controllers
+    are, and the controllers see no polling beyond one stat/device fetch
+    per (re)connect.
+    """
+
+    def __init__(self, flush_interval: float = 2.0, discover_interval: float = 300, reconnect_max: float = 60):
+        """
+        Initialize ingestor.
+
+        Args:
+            flush_interval: Seconds between database flushes
+            discover_interval: Seconds between scans for UniFi controllers
+                and devices in the database
+            reconnect_max: Maximum seconds between websocket reconnects
+        """
+        self.flush_interval = flush_interval
+        self.discover_interval = discover_interval
+        self.reconnect_max = reconnect_max
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._streams: Dict[Tuple[str, str, str], ControllerEventStream] = {}
+        self._device_ids: Dict[str, int] = {}  # MAC -> device ID
+        self._pending: Dict[str, Tuple[Optional[DeviceStatus], Optional[datetime]]] = {}
+        self.flushed = 0
+
+    async def start(self):
+        """Start the ingestor"""
+        if self.running:
+            logger.warning("UniFi event ingestor already running")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("UniFi event ingestor started")
+
+    async def stop(self):
+        """Stop the ingestor, flushing pending updates"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        for stream in self._streams.values():
+            await stream.stop()
+        self._streams.clear()
+        self._flush(self._take())
+
+        logger.info("UniFi event ingestor stopped")
+
+    async def _run_loop(self):
+        """Discover controllers periodically and flush state changes"""
+        loop = asyncio.get_running_loop()
+        last_discovery = None
+        while self.running:
+            try:
+                if last_discovery is None or loop.time() - last_discovery >= self.discover_interval:
+                    last_discovery = loop.time()
+                    controllers = await loop.run_in_executor(None, self._discover)
+                    for controller in controllers:
+                        self.register(controller)
+            except Exception as e:
+                logger.error(f"Error in UniFi event ingestion: {str(e)}", exc_info=True)
+
+            # Taken on the event loop, where _on_change() runs
+            pending = self._take()
+            try:
+                await loop.run_in_executor(None, self._flush, pending)
+            except Exception as e:
+                logger.error(f"Error flushing UniFi device status: {str(e)}", exc_info=True)
+                self._restore(pending)
+
+            await asyncio.sleep(self.flush_interval)
+
+    def register(self, controller: UniFiController) -> ControllerEventStream:
+        """Start consuming a controller site's events (no-op if already consumed)"""
+        key = (controller.controller_url, controller.username, controller.site)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = ControllerEventStream(controller, self._on_change, self.reconnect_max)
+            self._streams[key] = stream
+        stream.start()
+        return stream
+
+    def _discover(self) -> List[UniFiController]:
+        """Map UniFi device MACs to IDs and return their controllers"""
+        db = SessionLocal()
+        try:
+            devices = db.query(Device).filter(
+                Device.vendor == DeviceVendor.UBIQUITI,
+                Device.api_url.isnot(None)
+            ).all()
+
+            self._device_ids = {
+                device.mac_address.lower(): device.id
+                for device in devices if device.mac_address
+            }
+            controllers = {}
+            for device in devices:
+                controller = unifi_sessions.for_device(device)
+                controllers[id(controller)] = controller
+            return list(controllers.values())
+        finally:
+            db.close()
+
+    def _on_change(self, mac: str, state: Dict[str, Any]):
+        """Queue a device's status for the next flush"""
+        if mac not in self._device_ids:
+            return
+
+        status = UNIFI_STATE_STATUS.get(state.get("state"))
+        seen = None
+        if status == DeviceStatus.ONLINE:
+            last_seen = state.get("last_seen")
+            seen = datetime.utcfromtimestamp(last_seen) if last_seen else datetime.utcnow()
+        self._pending[mac] = (status, seen)
+
+    def _take(self) -> Dict[str, Tuple[Optional[DeviceStatus], Optional[datetime]]]:
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending: Dict[str, Tuple[Optional[DeviceStatus], Optional[datetime]]]):
+        """Put back status changes that failed to flush (newer ones win)"""
+        for mac, change in pending.items():
+            self._pending.setdefault(mac, change)
+
+    def _flush(self, pending: Dict[str, Tuple[Optional[DeviceStatus], Optional[datetime]]]) -> int:
+        """Write queued status changes in one bulk UPDATE"""
+        if not pending:
+            return 0
+
+        rows = []
+        for mac, (status, seen) in pending.items():
+            device_id = self._device_ids.get(mac)
+            if device_id is None or (status is None and seen is None):
+                continue
+            row = {"id": device_id}
+            if status is not None:
+                row["status"] = status
+            if seen is not None:
+                row["last_check_in"] = seen
+            rows.append(row)
+
+        if not rows:
+            return 0
+
+        db = SessionLocal()
+        try:
+            db.execute(update(Device), rows)
+            db.commit()
+        finally:
+            db.close()
+
+        self.flushed += len(rows)
+        logger.debug(f"Flushed {len(rows)} UniFi device status updates")
+        return len(rows)
+
+    def device_state(self, controller: UniFiController, mac: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest event-fed state of a device.
+
+        Returns:
+            Device object as last reported, or None if the controller's
+            stream isn't connected or hasn't seen the device
+        """
+        stream = self._streams.get((controller.controller_url, controller.username, controller.site))
+        if stream is None or not stream.connected:
+            return None
+        return stream.states.get(mac.lower())
+
+    def stats(self) -> Dict[str, Any]:
+        """Ingestion metrics"""
+        return {
+            "running": self.running,
+            "streams": len(self._streams),
+            "connected": sum(1 for s in self._streams.values() if s.connected),
+            "devices": sum(len(s.states) for s in self._streams.values()),
+            "messages": sum(s.messages for s in self._streams.values()),
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+        }
+
+
+# Global ingestor instance
+unifi_events = UniFiEventIngestor(
+    flush_interval=settings.unifi_events_flush_interval,
+    discover_interval=settings.unifi_events_discover_interval
+)
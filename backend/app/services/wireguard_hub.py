@@ -0,0 +1,273 @@
+"""
+WireGuard Hub
+Spreads device peers over several WireGuard interfaces (shards) by consistent hashing.
+"""
+import asyncio
+import bisect
+import hashlib
+import ipaddress
+import logging
+import math
+from typing import Optional, Dict, List, Any, Iterator
+
+from ..config import settings
+from .wireguard_manager import WireGuardManager, generate_private_key, derive_public_key
+
+logger = logging.getLogger(__name__)
+
+# Points per shard on the hash ring; more points spread devices more evenly
+RING_POINTS = 128
+
+
+def _ring_hash(key: str) -> int:
+    """Stable 64-bit hash (Python's hash() differs between processes)"""
+    return int.from_bytes(hashlib.sha1(key.encode()).digest()[:8], "big")
+
+
+class WireGuardHub:
+    """
+    Set of WireGuard interfaces serving one device fleet.
+
+    Every shard is a WireGuardManager with its own interface (wg0, wg1,
+    ...), subnet and listen port, so peers, config files and tunnel crypto
+    are spread across interfaces (and the kernel's per-interface workers)
+    instead of all going through wg0. A device is placed on the shard
+    whose subnet holds its VPN address; new devices are placed by
+    consistent hashing of the device ID, so adding a shard only moves the
+    placement of about 1/N of future assignments, and a shard whose pool
+    is full hands over to the next one on the ring.
+    """
+
+    def __init__(self, shards: List[WireGuardManager]):
+        """
+        Initialize hub.
+
+        Args:
+            shards: One manager per interface
+        """
+        if not shards:
+            raise ValueError("WireGuard hub needs at least one shard")
+        self.shards = shards
+        self._by_interface = {shard.interface: shard for shard in shards}
+        self._server_public_key: Optional[str] = None
+        ring = sorted(
+            (_ring_hash(f"{shard.interface}#{point}"), index)
+            for index, shard in enumerate(shards)
+            for point in range(RING_POINTS)
+        )
+        self._ring_hashes = [h for h, _ in ring]
+        self._ring_shards = [index for _, index in ring]
+
+    @classmethod
+    def from_settings(
+        cls,
+        shard_count: int,
+        subnet: str,
+        server_ip: str,
+        listen_port: int = 51820,
+        config_path: str = "/etc/wireguard"
+    ) -> "WireGuardHub":
+        """
+        Build a hub splitting one subnet into equal shard subnets.
+
+        Shard i uses interface wg{i}, listen port listen_port + i and the
+        i-th slice of the subnet; its server address is the slice's first
+        host (server_ip for the slice that contains it).
+        """
+        network = ipaddress.ip_network(subnet)
+        bits = math.ceil(math.log2(shard_count)) if shard_count > 1 else 0
+        subnets = list(network.subnets(prefixlen_diff=bits))[:shard_count]
+
+        shards = []
+        for index, shard_subnet in enumerate(subnets):
+            if ipaddress.ip_address(server_ip) in shard_subnet:
+                shard_server_ip = server_ip
+            else:
+                shard_server_ip = str(next(shard_subnet.hosts()))
+            shards.append(WireGuardManager(
+                interface=f"wg{index}",
+                server_ip=shard_server_ip,
+                subnet=str(shard_subnet),
+                listen_port=listen_port + index,
+                config_path=config_path,
+            ))
+        return cls(shards)
+
+    # ===== Placement =====
+
+    def shard(self, interface: str) -> Optional[WireGuardManager]:
+        """Shard by interface name"""
+        return self._by_interface.get(interface)
+
+    def shard_for_ip(self, address: Optional[str]) -> Optional[WireGuardManager]:
+        """Shard whose subnet contains an address"""
+        if not address:
+            return None
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return None
+        for shard in self.shards:
+            if ip in shard.network:
+                return shard
+        return None
+
+    def candidates(self, device) -> Iterator[WireGuardManager]:
+        """
+        Shards to place a device on, in order of preference.
+
+        The shard holding the device's current VPN address comes first,
+        then every shard in ring order from the device ID's position.
+        """
+        seen = set()
+        current = self.shard_for_ip(device.wireguard_private_ip)
+        if current is not None:
+            seen.add(current.interface)
+            yield current
+
+        start = bisect.bisect(self._ring_hashes, _ring_hash(str(device.id)))
+        for step in range(len(self._ring_shards)):
+            shard = self.shards[self._ring_shards[(start + step) % len(self._ring_shards)]]
+            if shard.interface not in seen:
+                seen.add(shard.interface)
+                yield shard
+                if len(seen) == len(self.shards):
+                    return
+
+    def shard_for_device(self, device) -> WireGuardManager:
+        """Preferred shard of a device"""
+        return next(self.candidates(device))
+
+    # ===== Fleet-wide operations =====
+
+    async def setup_server(self, server_private_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write every shard's server configuration.
+
+        All shards share one server key pair, so devices trust a single
+        server public key whichever interface they use.
+        """
+        server_private_key = server_private_key or generate_private_key()
+        self._server_public_key = None
+        await asyncio.gather(*(shard.setup_server(server_private_key) for shard in self.shards))
+        self._server_public_key = derive_public_key(server_private_key)
+        return {
+            "server_private_key": server_private_key,
+            "server_public_key": self._server_public_key,
+            "shards": self.shard_info(),
+        }
+
+    async def server_public_key(self) -> Optional[str]:
+        """
+        Server public key, read from wg0's config the first time.
+
+        load_identity() at startup fills the cache before requests need it,
+        and setup_server() replaces it, so request paths don't read the
+        root-owned config file.
+
+        Returns:
+            Base64 public key, or None if the server isn't set up
+        """
+        if self._server_public_key is None:
+            self._server_public_key = await self.shards[0].server_public_key()
+        return self._server_public_key
+
+    async def load_identity(self):
+        """Cache the server public key (at startup)"""
+        try:
+            if await self.server_public_key():
+                logger.info(f"WireGuard server public key: {self._server_public_key}")
+            else:
+                logger.warning("WireGuard server not configured; run /api/wireguard/setup")
+        except Exception as e:
+            logger.warning(f"Failed to read WireGuard server identity: {e}")
+
+    async def remove_peer(self, peer_public_key: str) -> bool:
+        """Remove a peer from whichever shard has it"""
+        return await self.remove_peers([peer_public_key]) > 0
+
+    async def remove_peers(self, peer_public_keys: List[str]) -> int:
+        """
+        Remove peers from the shards that have them, one batch per shard.
+
+        Keys no shard has configured are removed from every running
+        interface, in case they were only added there.
+
+        Returns:
+            Number of peers that were configured
+        """
+        keys = set(peer_public_keys)
+        per_shard = [keys & await shard.peer_keys() for shard in self.shards]
+        unknown = keys.difference(*per_shard)
+        removals = [
+            shard.remove_peers(list(configured | unknown))
+            for shard, configured in zip(self.shards, per_shard)
+            if configured or unknown
+        ]
+        return sum(await asyncio.gather(*removals))
+
+    async def dump_peers(self) -> Optional[List[Dict]]:
+        """
+        Every shard's peer statistics, read concurrently.
+
+        Each peer dict carries its shard's "interface".
+
+        Returns:
+            Peer status dicts, or None if every interface is down
+
+        Raises:
+            WireGuardError: If reading any running interface fails
+        """
+        dumps = await asyncio.gather(*(shard.dump_peers() for shard in self.shards))
+        if all(dump is None for dump in dumps):
+            return None
+
+        peers = []
+        for shard, dump in zip(self.shards, dumps):
+            for peer in dump or []:
+                peer["interface"] = shard.interface
+                peers.append(peer)
+        return peers
+
+    async def get_all_peers(self) -> List[Dict]:
+        """Peer statistics of all shards (empty on errors)"""
+        peers = []
+        for shard, dump in zip(self.shards, await asyncio.gather(*(shard.get_all_peers() for shard in self.shards))):
+            for peer in dump:
+                peer["interface"] = shard.interface
+                peers.append(peer)
+        return peers
+
+    async def restart_interfaces(self) -> bool:
+        """Restart every shard's interface; True if all came back up"""
+        return all(await asyncio.gather(*(shard.restart_interface() for shard in self.shards)))
+
+    def shard_info(self) -> List[Dict[str, Any]]:
+        """Static description of every shard"""
+        return [
+            {
+                "interface": shard.interface,
+                "subnet": shard.subnet,
+                "server_ip": shard.server_ip,
+                "listen_port": shard.listen_port,
+            }
+            for shard in self.shards
+        ]
+
+    async def status(self) -> List[Dict[str, Any]]:
+        """Every shard's description plus whether it is up and its configured peer count"""
+        info = self.shard_info()
+        for entry, shard in zip(info, self.shards):
+            entry["up"] = await shard._is_interface_up()
+            entry["peers"] = len(await shard.peer_keys())
+        return info
+
+
+# Global hub instance
+wireguard_hub = WireGuardHub.from_settings(
+    shard_count=settings.wireguard_shards,
+    subnet=settings.wireguard_subnet,
+    server_ip=settings.wireguard_server_ip,
+    listen_port=settings.wireguard_listen_port,
+    config_path=settings.wireguard_config_path
+)
@@ -3,25 +3,140 @@ WireGuard VPN Manager
 Handles WireGuard server configuration and peer management
 """
 import asyncio
+import base64
+import binascii
+import functools
 import logging
-import subprocess
+import os
 import ipaddress
-from typing import Optional, Dict, List, Tuple
-from pathlib import Path
 import re
+import subprocess
+import tempfile
+from typing import Optional, Dict, List, Set, Tuple
+from pathlib import Path
+
+try:
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+except ImportError:
+    X25519PrivateKey = None
 
 logger = logging.getLogger(__name__)
 
+# Peers per `wg set` invocation, to stay well below the argument size limit
+WG_SET_BATCH = 500
+
 
 class WireGuardError(Exception):
     """WireGuard-related errors"""
     pass
 
 
+def generate_private_key() -> str:
+    """
+    Generate a WireGuard private key (base64, as `wg genkey` prints it).
+
+    Raises:
+        WireGuardError: If neither cryptography nor wg is available
+    """
+    if X25519PrivateKey is None:
+        return _wg("genkey")
+
+    key = bytearray(os.urandom(32))
+    # Clamp like wg genkey does
+    key[0] &= 248
+    key[31] = (key[31] & 127) | 64
+    return base64.b64encode(bytes(key)).decode()
+
+
+def _public_key(private_key: str) -> str:
+    if X25519PrivateKey is None:
+        return _wg("pubkey", input=private_key)
+
+    try:
+        raw = base64.b64decode(private_key.strip(), validate=True)
+    except binascii.Error:
+        raw = b""
+    if len(raw) != 32:
+        raise WireGuardError("Invalid WireGuard private key")
+
+    public = X25519PrivateKey.from_private_bytes(raw).public_key()
+    return base64.b64encode(public.public_bytes(Encoding.Raw, PublicFormat.Raw)).decode()
+
+
+@functools.lru_cache(maxsize=64)
+def derive_public_key(private_key: str) -> str:
+    """
+    Public key of a WireGuard private key (cached, for the server key).
+
+    Raises:
+        WireGuardError: If the key is invalid or no implementation is available
+    """
+    return _public_key(private_key)
+
+
+def generate_keypairs(count: int) -> List[Tuple[str, str]]:
+    """
+    Generate WireGuard key pairs in-process.
+
+    Args:
+        count: Number of key pairs
+
+    Returns:
+        List of (private_key, public_key)
+    """
+    pairs = []
+    for _ in range(count):
+        private_key = generate_private_key()
+        pairs.append((private_key, _public_key(private_key)))
+    return pairs
+
+
+def _wg(command: str, input: Optional[str] = None) -> str:
+    """Run a wg key command (fallback when cryptography is missing)"""
+    try:
+        result = subprocess.run(["wg", command], input=input, capture_output=True, text=True, check=True)
+    except FileNotFoundError:
+        raise WireGuardError("WireGuard tools not installed on server")
+    except subprocess.CalledProcessError as e:
+        raise WireGuardError(f"wg {command} failed: {e.stderr.strip()}")
+    return result.stdout.strip()
+
+
+class WireGuardPeer:
+    """A [Peer] section of the interface configuration"""
+
+    __slots__ = ("name", "public_key", "allowed_ips", "options")
+
+    def __init__(self, name: str, public_key: str, allowed_ips: str, options: Optional[List[Tuple[str, str]]] = None):
+        self.name = name
+        self.public_key = public_key
+        self.allowed_ips = allowed_ips
+        self.options = options or []  # Other "Key = Value" lines, kept as read
+
+
+class _PeerBatch:
+    """Peer changes waiting to be written and applied together"""
+
+    __slots__ = ("upserts", "removals", "error")
+
+    def __init__(self):
+        self.upserts: Dict[str, WireGuardPeer] = {}
+        self.removals: Set[str] = set()
+        self.error: Optional[Exception] = None
+
+
 class WireGuardManager:
     """
     Manages WireGuard VPN server and device peers.
     Handles peer configuration, IP allocation, and server management.
+
+    Peers are kept in an in-memory table loaded once from the interface's
+    config file. Changes are persisted by rewriting the file atomically
+    (temp file and rename) and applied to the running interface with one
+    `wg set` per batch. Changes made while a write is in progress are
+    group-committed by the next one, so concurrent add_peer calls cost a
+    handful of process spawns, not several each.
     """
 
     def __init__(
@@ -49,6 +164,11 @@ class WireGuardManager:
         self.config_path = Path(config_path)
         self.config_file = self.config_path / f"{interface}.conf"
         self.network = ipaddress.ip_network(subnet)
+        self._interface_config = ""  # Config file text before the first [Peer]
+        self._peers: Optional[Dict[str, WireGuardPeer]] = None
+        self._batch: Optional[_PeerBatch] = None
+        self._lock = asyncio.Lock()
+        self.commands = 0  # Processes spawned
 
     async def setup_server(self, server_private_key: Optional[str] = None) -> Dict[str, str]:
         """
@@ -63,18 +183,14 @@ class WireGuardManager:
         try:
             # Generate or use provided private key
             if not server_private_key:
-                server_private_key = await self._run_command("wg genkey")
+                server_private_key = generate_private_key()
 
             # Generate public key from private key
-            server_public_key = await self._run_command(
-                f"echo '{server_private_key}' | wg pubkey"
-            )
+            server_public_key = derive_public_key(server_private_key)
 
-            # Create configuration directory
-            self.config_path.mkdir(parents=True, exist_ok=True)
-
-            # Create server configuration
-            config_content = f"""[Interface]
+            # Create server configuration, keeping configured peers
+            await self._load_peers()
+            self._interface_config = f"""[Interface]
 PrivateKey = {server_private_key}
 Address = {self.server_ip}/{self.network.prefixlen}
 ListenPort = {self.listen_port}
@@ -83,12 +199,7 @@ PostDown = iptables -D FORWARD -i {self.interface} -j ACCEPT; iptables -t nat -D
 
 # Peers will be added below
 """
-
-            # Write configuration using sudo
-            await self._run_command(
-                f"echo '{config_content}' | sudo tee {self.config_file} > /dev/null"
-            )
-            await self._run_command(f"sudo chmod 600 {self.config_file}")
+            await self._commit(self._open_batch())
 
             logger.info(f"WireGuard server configuration created at {self.config_file}")
 
@@ -122,35 +233,49 @@ PostDown = iptables -D FORWARD -i {self.interface} -j ACCEPT; iptables -t nat -D
         Returns:
             True if successful
         """
-        try:
-            if not allowed_ips:
-                allowed_ips = f"{peer_ip}/32"
-
-            # Add peer configuration to config file
-            peer_config = f"""
-# {peer_name}
-[Peer]
-PublicKey = {peer_public_key}
-AllowedIPs = {allowed_ips}
-
-"""
+        await self.add_peers([{
+            "name": peer_name,
+            "public_key": peer_public_key,
+            "ip": peer_ip,
+            "allowed_ips": allowed_ips,
+        }])
+        logger.info(f"Added WireGuard peer: {peer_name} ({peer_ip})")
+        return True
+
+    async def add_peers(self, peers: List[Dict[str, Optional[str]]]) -> int:
+        """
+        Add or update many peers with one config write and one `wg set`.
 
-            # Append to config file using sudo tee (requires sudoers config)
-            await self._run_command(
-                f"echo '{peer_config}' | sudo tee -a {self.config_file} > /dev/null"
-            )
+        Args:
+            peers: Dicts with name, public_key, ip and optionally allowed_ips
+                (default: ip/32)
 
-            # Add peer to running interface if active
-            if await self._is_interface_up():
-                await self._run_command(
-                    f"sudo wg set {self.interface} peer {peer_public_key} allowed-ips {allowed_ips}"
+        Returns:
+            Number of peers added or updated
+        """
+        try:
+            await self._load_peers()
+            batch = self._open_batch()
+            for peer in peers:
+                allowed_ips = peer.get("allowed_ips") or f"{peer['ip']}/32"
+                existing = self._peers.get(peer["public_key"])
+                entry = WireGuardPeer(
+                    name=(peer.get("name") or "").replace("\n", " "),
+                    public_key=peer["public_key"],
+                    allowed_ips=allowed_ips.replace(" ", ""),
+                    options=existing.options if existing else None
                 )
+                self._peers[entry.public_key] = entry
+                batch.upserts[entry.public_key] = entry
+                batch.removals.discard(entry.public_key)
 
-            logger.info(f"Added WireGuard peer: {peer_name} ({peer_ip})")
-            return True
+            await self._commit(batch)
+            return len(peers)
 
+        except WireGuardError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to add peer {peer_name}: {e}")
+            logger.error(f"Failed to add peers: {e}")
             raise WireGuardError(f"Failed to add peer: {e}")
 
     async def remove_peer(self, peer_public_key: str) -> bool:
@@ -163,31 +288,203 @@ AllowedIPs = {allowed_ips}
         Returns:
             True if successful
         """
-        try:
-            # Remove from running interface
-            if await self._is_interface_up():
-                await self._run_command(f"sudo wg set {self.interface} peer {peer_public_key} remove")
+        await self.remove_peers([peer_public_key])
+        logger.info(f"Removed WireGuard peer: {peer_public_key}")
+        return True
 
-            # Remove from config file
-            # Read current config
-            config_content = await self._run_command(f"cat {self.config_file}")
-
-            # Find and remove peer section
-            pattern = rf"# .*\n\[Peer\]\nPublicKey = {re.escape(peer_public_key)}\n.*?\n\n"
-            config_content = re.sub(pattern, "", config_content, flags=re.MULTILINE)
+    async def remove_peers(self, peer_public_keys: List[str]) -> int:
+        """
+        Remove many peers with one config write and one `wg set`.
 
-            # Write updated config using sudo
-            await self._run_command(
-                f"echo '{config_content}' | sudo tee {self.config_file} > /dev/null"
-            )
+        Args:
+            peer_public_keys: Public keys of peers to remove
 
-            logger.info(f"Removed WireGuard peer: {peer_public_key}")
-            return True
+        Returns:
+            Number of peers that were configured
+        """
+        try:
+            await self._load_peers()
+            batch = self._open_batch()
+            removed = 0
+            for public_key in peer_public_keys:
+                if self._peers.pop(public_key, None) is not None:
+                    removed += 1
+                # Removed from the running interface even if not in the file
+                batch.upserts.pop(public_key, None)
+                batch.removals.add(public_key)
+
+            await self._commit(batch)
+            return removed
 
+        except WireGuardError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to remove peer: {e}")
+            logger.error(f"Failed to remove peers: {e}")
             raise WireGuardError(f"Failed to remove peer: {e}")
 
+    async def server_public_key(self) -> Optional[str]:
+        """
+        Public key of the interface's private key in the config file.
+
+        Returns:
+            Base64 public key, or None if the server isn't set up
+        """
+        await self._load_peers()
+        match = re.search(r"^\s*PrivateKey\s*=\s*(\S+)", self._interface_config, re.MULTILINE)
+        return derive_public_key(match.group(1)) if match else None
+
+    async def peer_keys(self) -> Set[str]:
+        """Public keys of the configured peers"""
+        await self._load_peers()
+        return set(self._peers or ())
+
+    def _open_batch(self) -> _PeerBatch:
+        """Batch collecting changes for the next write"""
+        if self._batch is None:
+            self._batch = _PeerBatch()
+        return self._batch
+
+    async def _commit(self, batch: _PeerBatch):
+        """
+        Write and apply a batch, unless a concurrent commit already did.
+
+        Raises:
+            WireGuardError: If writing the config or updating the interface failed
+        """
+        async with self._lock:
+            if batch is self._batch:
+                self._batch = None
+                try:
+                    if self._peers is None:
+                        # An earlier write failed: rebase this batch on the file
+                        await self._read_config()
+                        for public_key in batch.removals:
+                            self._peers.pop(public_key, None)
+                        self._peers.update(batch.upserts)
+                    await self._write_config()
+                    await self._apply_to_interface(batch)
+                except Exception as e:
+                    # The table may be ahead of the file now; start over from disk
+                    self._peers = None
+                    batch.error = e
+
+        if batch.error:
+            logger.error(f"Failed to update WireGuard peers: {batch.error}")
+            raise WireGuardError(f"Peer update failed: {batch.error}")
+
+    async def _load_peers(self):
+        """Load the peer table from the config file (once)"""
+        if self._peers is not None:
+            return
+
+        async with self._lock:
+            if self._peers is None:
+                await self._read_config()
+
+    async def _read_config(self):
+        """Read and parse the config file (caller holds the lock)"""
+        try:
+            content = self.config_file.read_text()
+        except FileNotFoundError:
+            content = ""
+        except PermissionError:
+            content = await self._exec("sudo", "cat", str(self.config_file))
+        self._interface_config, self._peers = self._parse_config(content)
+
+    @staticmethod
+    def _parse_config(content: str) -> Tuple[str, Dict[str, WireGuardPeer]]:
+        """
+        Split a config file into the interface part and its peers.
+
+        A comment line directly above a [Peer] section is the peer's name.
+        """
+        sections = re.split(r"^[ \t]*\[Peer\][ \t]*$", content, flags=re.MULTILINE)
+        peers: Dict[str, WireGuardPeer] = {}
+
+        def split_name(text: str) -> Tuple[str, str]:
+            lines = text.rstrip().split("\n")
+            if lines and lines[-1].startswith("#"):
+                return "\n".join(lines[:-1]), lines[-1].lstrip("#").strip()
+            return text, ""
+
+        interface_config, name = split_name(sections[0])
+        for section in sections[1:]:
+            body, next_name = split_name(section)
+            fields = {}
+            options = []
+            for line in body.split("\n"):
+                key, sep, value = line.partition("=")
+                if not sep or line.lstrip().startswith("#"):
+                    continue
+                key, value = key.strip(), value.strip()
+                if key in ("PublicKey", "AllowedIPs"):
+                    fields[key] = value
+                else:
+                    options.append((key, value))
+            if fields.get("PublicKey"):
+                peers[fields["PublicKey"]] = WireGuardPeer(
+                    name, fields["PublicKey"], fields.get("AllowedIPs", "").replace(" ", ""), options
+                )
+            name = next_name
+
+        return interface_config.rstrip() + "\n" if interface_config.strip() else "", peers
+
+    def _render_config(self) -> str:
+        """Config file text for the interface and the peer table"""
+        parts = [self._interface_config]
+        for peer in self._peers.values():
+            lines = [f"# {peer.name}", "[Peer]", f"PublicKey = {peer.public_key}", f"AllowedIPs = {peer.allowed_ips}"]
+            lines.extend(f"{key} = {value}" for key, value in peer.options)
+            parts.append("\n" + "\n".join(lines) + "\n")
+        return "".join(parts)
+
+    async def _write_config(self):
+        """Atomically replace the config file with the current table"""
+        content = self._render_config()
+
+        try:
+            self.config_path.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.config_path, prefix=f".{self.interface}.", suffix=".tmp")
+        except PermissionError:
+            fd, temp_path = None, None
+
+        if fd is not None:
+            # Temp file in the same directory, renamed over the config
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.config_file)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+            return
+
+        # Root-owned directory: stage privately, install next to the config
+        # with sudo, then rename it into place
+        fd, temp_path = tempfile.mkstemp(prefix=f"{self.interface}.", suffix=".conf")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            staged = f"{self.config_file}.tmp"
+            await self._exec("sudo", "install", "-m", "600", temp_path, staged)
+            await self._exec("sudo", "mv", "-f", staged, str(self.config_file))
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+    async def _apply_to_interface(self, batch: _PeerBatch):
+        """Apply a batch to the running interface with batched `wg set` calls"""
+        if not (batch.upserts or batch.removals) or not await self._is_interface_up():
+            return
+
+        clauses = [["peer", key, "remove"] for key in batch.removals]
+        clauses.extend(["peer", peer.public_key, "allowed-ips", peer.allowed_ips] for peer in batch.upserts.values())
+
+        for start in range(0, len(clauses), WG_SET_BATCH):
+            args = [arg for clause in clauses[start:start + WG_SET_BATCH] for arg in clause]
+            await self._exec("sudo", "wg", "set", self.interface, *args)
+
     async def get_peer_status(self, peer_public_key: str) -> Optional[Dict]:
         """
         Get status of a specific peer.
@@ -232,29 +529,40 @@ AllowedIPs = {allowed_ips}
             List of peer status dicts
         """
         try:
-            if not await self._is_interface_up():
-                return []
+            return await self.dump_peers() or []
+        except Exception as e:
+            logger.error(f"Failed to get all peers: {e}")
+            return []
 
-            output = await self._run_command(f"sudo wg show {self.interface} dump")
-            peers = []
+    async def dump_peers(self) -> Optional[List[Dict]]:
+        """
+        Read every peer's status with one `wg show dump`.
 
-            for line in output.strip().split("\n")[1:]:  # Skip header
-                parts = line.split("\t")
-                if len(parts) >= 5:
-                    peers.append({
-                        "public_key": parts[0],
-                        "endpoint": parts[2] if parts[2] != "(none)" else None,
-                        "allowed_ips": parts[3],
-                        "last_handshake": int(parts[4]) if parts[4] != "0" else None,
-                        "rx_bytes": int(parts[5]) if len(parts) > 5 else 0,
-                        "tx_bytes": int(parts[6]) if len(parts) > 6 else 0,
-                    })
+        Returns:
+            List of peer status dicts, or None if the interface is down
 
-            return peers
+        Raises:
+            WireGuardError: If wg fails
+        """
+        if not await self._is_interface_up():
+            return None
 
-        except Exception as e:
-            logger.error(f"Failed to get all peers: {e}")
-            return []
+        output = await self._exec("sudo", "wg", "show", self.interface, "dump")
+        peers = []
+
+        for line in output.strip().split("\n")[1:]:  # Skip interface line
+            parts = line.split("\t")
+            if len(parts) >= 5:
+                peers.append({
+                    "public_key": parts[0],
+                    "endpoint": parts[2] if parts[2] != "(none)" else None,
+                    "allowed_ips": parts[3],
+                    "last_handshake": int(parts[4]) if parts[4] != "0" else None,
+                    "rx_bytes": int(parts[5]) if len(parts) > 5 else 0,
+                    "tx_bytes": int(parts[6]) if len(parts) > 6 else 0,
+                })
+
+        return peers
 
     async def start_interface(self) -> bool:
         """
@@ -324,12 +632,25 @@ AllowedIPs = {allowed_ips}
         Returns:
             Tuple of (private_key, public_key)
         """
+        return (await self.generate_keypairs(1))[0]
+
+    async def generate_keypairs(self, count: int) -> List[Tuple[str, str]]:
+        """
+        Generate WireGuard key pairs for mass provisioning.
+
+        Keys are generated in-process with cryptography (falling back to
+        `wg genkey` / `wg pubkey` per key when it isn't installed).
+
+        Args:
+            count: Number of key pairs
+
+        Returns:
+            List of (private_key, public_key)
+        """
         try:
-            private_key = await self._run_command("wg genkey")
-            public_key = await self._run_command(f"echo '{private_key}' | wg pubkey")
-            return private_key.strip(), public_key.strip()
+            return generate_keypairs(count)
         except Exception as e:
-            logger.error(f"Failed to generate keypair: {e}")
+            logger.error(f"Failed to generate keypairs: {e}")
             raise WireGuardError(f"Keypair generation failed: {e}")
 
     async def generate_peer_config(
@@ -373,10 +694,13 @@ PersistentKeepalive = 25
 
     async def _is_interface_up(self) -> bool:
         """Check if WireGuard interface is up."""
+        sysfs = Path("/sys/class/net")
+        if sysfs.is_dir():
+            return (sysfs / self.interface).exists()
         try:
-            await self._run_command(f"ip link show {self.interface}")
+            await self._exec("ip", "link", "show", self.interface)
             return True
-        except:
+        except WireGuardError:
             return False
 
     async def _run_command(self, command: str) -> str:
@@ -392,6 +716,7 @@ PersistentKeepalive = 25
         Raises:
             WireGuardError: If command fails
         """
+        self.commands += 1
         try:
             process = await asyncio.create_subprocess_shell(
                 command,
@@ -412,6 +737,32 @@ PersistentKeepalive = 25
         except Exception as e:
             raise WireGuardError(f"Command execution error: {e}")
 
+    async def _exec(self, *args: str) -> str:
+        """
+        Run a program without a shell.
+
+        Args:
+            args: Program and arguments
+
+        Returns:
+            Command output (stdout)
+
+        Raises:
+            WireGuardError: If the program fails
+        """
+        self.commands += 1
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await process.communicate()
+        except Exception as e:
+            raise WireGuardError(f"Command execution error: {e}")
+
+        if process.returncode != 0:
+            raise WireGuardError(f"Command failed: {stderr.decode().strip()}")
+
+        return stdout.decode().strip()
 
-# Global WireGuard manager instance
-wireguard_manager = WireGuardManager()
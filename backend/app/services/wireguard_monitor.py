@@ -0,0 +1,191 @@
+"""
+WireGuard Peer Stats Collector
+Caches `wg show dump` peer statistics of all WireGuard shards and writes handshake changes back in batches.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
+
+from sqlalchemy import update
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.device import Device, DeviceStatus
+from .wireguard_hub import WireGuardHub, wireguard_hub
+
+logger = logging.getLogger(__name__)
+
+
+class WireGuardStatsCollector:
+    """
+    Peer statistics served from one periodic `wg show dump` per interface.
+
+    Each collection parses the dump into a map keyed by public key, which
+    the peer endpoints read instead of running wg per request (lookups
+    made when the map is older than the interval collect again, sharing
+    one dump between concurrent callers). After each collection, changed
+    wireguard_last_handshake values and the ONLINE/OFFLINE status they
+    imply are written in one bulk UPDATE.
+    """
+
+    def __init__(self, hub: WireGuardHub, interval: int = 30, online_threshold: int = 180):
+        """
+        Initialize collector.
+
+        Args:
+            hub: WireGuard hub whose interfaces are read
+            interval: Seconds between collections
+            online_threshold: A device whose last handshake is younger than
+                this many seconds is ONLINE
+        """
+        self.hub = hub
+        self.interval = interval
+        self.online_threshold = online_threshold
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[Tuple[float, Dict[str, Dict[str, Any]]]] = None
+        self._lock = asyncio.Lock()
+        self.collections = 0
+        self.updated = 0
+
+    async def start(self):
+        """Start collecting periodically"""
+        if self.running:
+            logger.warning("WireGuard stats collector already running")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run_loop())
+        logger.info("WireGuard stats collector started")
+
+    async def stop(self):
+        """Stop collecting"""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("WireGuard stats collector stopped")
+
+    async def _run_loop(self):
+        """Main loop: one collection per interval"""
+        while self.running:
+            try:
+                await self.collect()
+            except Exception as e:
+                logger.error(f"Error collecting WireGuard stats: {str(e)}", exc_info=True)
+
+            await asyncio.sleep(self.interval)
+
+    async def peers(self, max_age: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Peer statistics keyed by public key.
+
+        Args:
+            max_age: Oldest acceptable snapshot in seconds (default: interval)
+
+        Returns:
+            Peer status dicts (empty if the interfaces are down or unreadable)
+        """
+        max_age = self.interval if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot and time.monotonic() - snapshot[0] <= max_age:
+            return snapshot[1]
+        return await self.collect(requested_at=time.monotonic())
+
+    async def collect(self, requested_at: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Dump peer statistics and persist handshake changes.
+
+        Args:
+            requested_at: Skip the dump if a collection finished after this
+                time (callers that waited for a concurrent one)
+        """
+        async with self._lock:
+            snapshot = self._snapshot
+            if requested_at is not None and snapshot and snapshot[0] >= requested_at:
+                return snapshot[1]
+
+            try:
+                dump = await self.hub.dump_peers()
+            except Exception as e:
+                # Keep serving the last snapshot; don't infer anything from a failed read
+                logger.error(f"Failed to read WireGuard peers: {e}")
+                return snapshot[1] if snapshot else {}
+
+            peers = {peer["public_key"]: peer for peer in dump or []}
+            self._snapshot = (time.monotonic(), peers)
+            self.collections += 1
+
+        loop = asyncio.get_running_loop()
+        self.updated += await loop.run_in_executor(None, self._persist, peers)
+        return peers
+
+    def _persist(self, peers: Dict[str, Dict[str, Any]]) -> int:
+        """Write changed handshakes and statuses in one bulk UPDATE"""
+        now = datetime.utcnow()
+        fresh_after = now - timedelta(seconds=self.online_threshold)
+
+        db = SessionLocal()
+        try:
+            rows = []
+            for device_id, public_key, last_handshake, status, last_check_in in db.query(
+                Device.id,
+                Device.wireguard_public_key,
+                Device.wireguard_last_handshake,
+                Device.status,
+                Device.last_check_in
+            ).filter(Device.wireguard_enabled == 1):
+                row = {}
+                timestamp = (peers.get(public_key) or {}).get("last_handshake")
+                handshake = datetime.utcfromtimestamp(timestamp) if timestamp else None
+                if handshake and handshake != last_handshake:
+                    row["wireguard_last_handshake"] = handshake
+                else:
+                    handshake = last_handshake
+
+                # Check-ins over another path also keep a device online
+                if handshake and handshake > fresh_after:
+                    if status != DeviceStatus.ONLINE:
+                        row["status"] = DeviceStatus.ONLINE
+                elif status == DeviceStatus.ONLINE and not (last_check_in and last_check_in > fresh_after):
+                    row["status"] = DeviceStatus.OFFLINE
+
+                if row:
+                    row["id"] = device_id
+                    rows.append(row)
+
+            if rows:
+                db.execute(update(Device), rows)
+                db.commit()
+                logger.debug(f"Updated WireGuard state of {len(rows)} devices")
+            return len(rows)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Collector metrics"""
+        snapshot = self._snapshot
+        return {
+            "running": self.running,
+            "collections": self.collections,
+            "peers": len(snapshot[1]) if snapshot else 0,
+            "snapshot_age": round(time.monotonic() - snapshot[0], 1) if snapshot else None,
+            "updated": self.updated,
+        }
+
+
+# Global collector instance
+wireguard_stats = WireGuardStatsCollector(
+    wireguard_hub,
+    interval=settings.wireguard_stats_interval,
+    online_threshold=settings.wireguard_online_threshold
+)
@@ -3,12 +3,54 @@ Base vendor interface for device abstraction
 All vendor implementations must inherit from this base class.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+import re
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable, Pattern
+
+from .classifier import OutputClassifier, compile_error_patterns
 
 
 class VendorInterface(ABC):
     """Abstract base class for vendor implementations"""
 
+    # How a rendered script is delivered in upload mode:
+    #   "import" - transfer the script over SFTP, then run get_import_commands()
+    #   "batch"  - stream the script through a single shell session
+    # None means the vendor only supports command-by-command execution.
+    UPLOAD_METHOD: Optional[str] = None
+    UPLOAD_FILENAME: str = "orchenet-push.txt"
+
+    # Line-start regexes for error messages in CLI output. Each is matched
+    # from the beginning of a line, so it should allow leading whitespace.
+    ERROR_PATTERNS: List[str] = [r"\s*(?:error|failure|failed)\b"]
+    ERROR_PATTERN_FLAGS: int = re.IGNORECASE
+
+    # Bump whenever translation output changes so cached results are dropped
+    TRANSLATOR_VERSION: str = "1"
+
+    # Groups of top-level sections that translate independently of each
+    # other, in the order yaml_to_commands emits them. None means the
+    # config can only be translated as a whole.
+    TRANSLATION_SECTIONS: Optional[List[Tuple[str, ...]]] = None
+
+    # CLI commands that print the device's running configuration, parsed by
+    # config_to_yaml. None means it can't be retrieved over SSH.
+    RUNNING_CONFIG_COMMANDS: Optional[List[str]] = None
+
+    # Keys whose values can't be read back from the device (secrets the
+    # device never shows, menus missing from its config dump). They are
+    # ignored when running and desired configs are compared.
+    WRITE_ONLY_KEYS: Set[str] = set()
+
+    # Dotted paths of lists that only ever mention some of the device's
+    # items (e.g. physical interfaces). Running items missing from the
+    # desired list there are not drift.
+    PROJECTED_LISTS: Tuple[str, ...] = ()
+
+    # Dotted paths of keyed lists whose item order is significant (e.g.
+    # firewall rules). Elsewhere, items exported in a different order than
+    # the desired config lists them are not drift.
+    ORDERED_LISTS: Tuple[str, ...] = ()
+
     @abstractmethod
     def yaml_to_commands(self, config: Dict[str, Any]) -> List[str]:
         """
@@ -70,3 +112,236 @@ class VendorInterface(ABC):
             True if feature is supported
         """
         pass
+
+    def render_script(self, commands: List[str]) -> str:
+        """
+        Render translated commands into a single script for upload mode
+
+        Args:
+            commands: Commands returned by yaml_to_commands
+
+        Returns:
+            Script contents
+        """
+        return "\n".join(commands) + "\n"
+
+    def get_import_commands(self, filename: str) -> List[str]:
+        """
+        Get commands that run an uploaded script on the device
+
+        Args:
+            filename: Name of the uploaded script file
+
+        Returns:
+            List of commands to execute after the upload
+        """
+        return []
+
+    def normalize_config(
+        self,
+        config: Dict[str, Any],
+        reference: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fill in implicit values before configs are diffed
+
+        Translators that address items by device-assigned identifiers
+        override this so that items keep a stable identity across diffs.
+
+        Args:
+            config: Parsed YAML configuration dictionary
+            reference: Normalized configuration the device has now; items
+                matching one of its items reuse that item's identifier
+
+        Returns:
+            Normalized configuration (may be the same object)
+        """
+        return config
+
+    def diff_to_commands(
+        self,
+        diff,
+        translate: Optional[Callable[[Dict[str, Any]], List[str]]] = None
+    ) -> List[str]:
+        """
+        Convert a ConfigDiff into the commands needed to apply only the changes
+
+        Removals run first, then changed items are updated (see
+        modify_commands), then new items are added.
+
+        Args:
+            diff: ConfigDiff from vendors.diff.diff_configs
+            translate: Function used to translate the added configuration
+                (defaults to yaml_to_commands)
+
+        Returns:
+            List of vendor-specific commands to execute
+        """
+        translate = translate or self.yaml_to_commands
+        commands = []
+        if diff.removed:
+            commands.extend(self.removal_commands(diff.removed))
+        if diff.modified:
+            commands.extend(self.modify_commands(diff, translate))
+        if diff.added:
+            commands.extend(translate(diff.added))
+        return commands
+
+    def modify_commands(
+        self,
+        diff,
+        translate: Callable[[Dict[str, Any]], List[str]]
+    ) -> List[str]:
+        """
+        Convert changed list items into commands that update them
+
+        The default removes the old version and adds the new one, for
+        vendors whose translation only ever creates items. Vendors that can
+        edit an item in place override this, since replacing an item also
+        drops whatever the device hangs off it (ports on a bridge, the
+        session of a user).
+
+        Args:
+            diff: ConfigDiff whose modified and replaced items to convert
+            translate: Function translating a partial configuration
+
+        Returns:
+            List of vendor-specific commands to execute
+        """
+        return self.removal_commands(diff.replaced) + translate(diff.modified)
+
+    def removal_commands(self, removed: Dict[str, Any]) -> List[str]:
+        """
+        Convert removed configuration items into delete commands
+
+        Args:
+            removed: Partial configuration containing the items to remove
+
+        Returns:
+            List of vendor-specific commands to execute
+        """
+        return []
+
+    def translation_units(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Split a configuration into independently translatable parts
+
+        Translating each unit and concatenating the results gives the same
+        commands as translating the whole config, which lets identical
+        sections be translated once and shared between devices.
+
+        Args:
+            config: Parsed YAML configuration dictionary
+
+        Returns:
+            List of partial configurations in translation order
+        """
+        if self.TRANSLATION_SECTIONS is None:
+            return [config]
+
+        units = []
+        for group in self.TRANSLATION_SECTIONS:
+            unit = {section: config[section] for section in group if section in config}
+            if unit:
+                units.append(unit)
+        return units
+
+    def error_classifier(self) -> OutputClassifier:
+        """
+        Create a classifier for this vendor's command output
+
+        The combined error pattern is compiled once per translator class.
+
+        Returns:
+            New OutputClassifier instance
+        """
+        cls = type(self)
+        pattern: Optional[Pattern] = cls.__dict__.get("_compiled_error_pattern")
+        if pattern is None:
+            pattern = compile_error_patterns(self.ERROR_PATTERNS, self.ERROR_PATTERN_FLAGS)
+            cls._compiled_error_pattern = pattern
+        return OutputClassifier(pattern)
+
+    def checkpoint_commands(self, name: str) -> List[str]:
+        """
+        Get commands that save a device-side checkpoint before a change
+
+        Args:
+            name: Checkpoint name
+
+        Returns:
+            List of commands; empty if the vendor has no checkpoint mechanism
+        """
+        return []
+
+    def parse_checkpoint(self, name: str, outputs: List[str]) -> Dict[str, Any]:
+        """
+        Extract checkpoint details from the checkpoint command output
+
+        Args:
+            name: Checkpoint name
+            outputs: Outputs of checkpoint_commands
+
+        Returns:
+            Checkpoint dictionary passed to rollback_commands
+        """
+        return {"name": name}
+
+    def rollback_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """
+        Get commands that restore a checkpoint after a failed change
+
+        Args:
+            checkpoint: Checkpoint dictionary from parse_checkpoint
+
+        Returns:
+            List of commands to execute
+        """
+        return []
+
+    def release_checkpoint_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """
+        Get commands that discard a checkpoint after a successful change
+
+        Args:
+            checkpoint: Checkpoint dictionary from parse_checkpoint
+
+        Returns:
+            List of commands to execute
+        """
+        return []
+
+    def running_config_fingerprint(self, running_config: Any) -> Any:
+        """
+        Reduce raw running configuration output to what identifies it
+
+        Drift checks hash this to skip parsing an unchanged config, so
+        translators whose output carries volatile text (timestamps in an
+        export header) strip it here.
+
+        Args:
+            running_config: Output of RUNNING_CONFIG_COMMANDS (or API data)
+
+        Returns:
+            Value to hash
+        """
+        return running_config
+
+    def config_to_yaml(self, running_config: Any) -> Dict[str, Any]:
+        """
+        Convert the device's running configuration into the unified schema
+
+        The reverse of yaml_to_commands, used for drift detection. Only the
+        settings the translator knows how to generate are extracted.
+
+        Args:
+            running_config: Output of RUNNING_CONFIG_COMMANDS (or API data
+                for controller-managed vendors)
+
+        Returns:
+            Unified configuration dictionary
+
+        Raises:
+            NotImplementedError: If the vendor has no reverse translation
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot parse running configuration")
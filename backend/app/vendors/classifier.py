@@ -0,0 +1,90 @@
+"""
+Device output error classification
+Incremental, line-oriented matching of vendor error messages in CLI output.
+"""
+import re
+from typing import List, Optional, Pattern
+
+
+class OutputClassifier:
+    """
+    Classifies streamed command output as success or vendor error.
+
+    Output is fed in arbitrary chunks; complete lines are matched against a
+    single precompiled pattern as soon as they arrive, so each byte is
+    scanned once and an error can be acted on before the command finishes.
+    Patterns are anchored to the start of a line, so names and comments that
+    merely contain "error" are not reported.
+    """
+
+    # Maximum number of error lines kept per command
+    MAX_ERRORS = 10
+
+    def __init__(self, pattern: Pattern):
+        """
+        Initialize classifier.
+
+        Args:
+            pattern: Compiled vendor error pattern, matched per line
+        """
+        self.pattern = pattern
+        self.errors: List[str] = []
+        self._buffer = ""
+
+    @property
+    def has_error(self) -> bool:
+        """True once any error line has been seen"""
+        return bool(self.errors)
+
+    @property
+    def first_error(self) -> Optional[str]:
+        """First error line seen, if any"""
+        return self.errors[0] if self.errors else None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Feed a chunk of output.
+
+        Args:
+            chunk: Next piece of command output
+
+        Returns:
+            True if an error has been seen so far
+        """
+        if not chunk:
+            return self.has_error
+
+        data = self._buffer + chunk
+        lines = data.split("\n")
+        self._buffer = lines.pop()
+
+        for line in lines:
+            self._check_line(line)
+
+        return self.has_error
+
+    def finish(self) -> bool:
+        """
+        Flush any trailing partial line at end of output.
+
+        Returns:
+            True if an error was seen
+        """
+        if self._buffer:
+            self._check_line(self._buffer)
+            self._buffer = ""
+        return self.has_error
+
+    def classify(self, output: str) -> bool:
+        """Classify a complete output in one call"""
+        self.feed(output)
+        return self.finish()
+
+    def _check_line(self, line: str):
+        if len(self.errors) < self.MAX_ERRORS and self.pattern.match(line.rstrip("\r")):
+            self.errors.append(line.strip())
+
+
+def compile_error_patterns(patterns: List[str], flags: int = 0) -> Pattern:
+    """Combine line-start error patterns into one compiled regex"""
+    return re.compile("|".join(f"(?:{p})" for p in patterns), flags)
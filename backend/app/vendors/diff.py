@@ -0,0 +1,218 @@
+"""
+Structural diff between unified configurations
+Used to push only what changed instead of re-sending the whole config.
+"""
+from typing import Dict, List, Any, Optional
+
+from ..services.config_hash import canonical_json
+
+
+# Keys that identify an item inside a list of dictionaries, in order of
+# preference. A key is only used when every item on both sides has it and
+# its values are unique; otherwise the list is diffed as a single value.
+IDENTITY_KEYS = ("id", "name", "ssid", "address")
+
+# Marker for "nothing to emit" while walking the tree
+_MISSING = object()
+
+
+def identity_key(*item_lists: List[Any]) -> Optional[str]:
+    """
+    Find the key that identifies items in one or more lists of dictionaries.
+
+    Args:
+        item_lists: Lists whose items should be matched against each other
+
+    Returns:
+        Identity key name, or None if the lists can't be matched item by item
+    """
+    items = [item for item_list in item_lists for item in item_list]
+    if not items or not all(isinstance(item, dict) for item in items):
+        return None
+
+    for key in IDENTITY_KEYS:
+        if not all(key in item for item in items):
+            continue
+        if all(
+            len({canonical_json(item[key]) for item in item_list}) == len(item_list)
+            for item_list in item_lists
+        ):
+            return key
+
+    return None
+
+
+class ConfigDiff:
+    """
+    Result of diffing a current configuration against a desired one.
+
+    Attributes:
+        changes: Flat list of change records with path, action
+            ("add", "remove" or "modify"), old and new values
+        added: Partial config with everything that must be applied, apart
+            from changed list items
+        removed: Partial config with everything that must be removed,
+            apart from changed list items
+        modified: Partial config with the new version of every keyed list
+            item that exists on both sides but changed, included whole so
+            translators can update it in place
+        replaced: The old versions of the items in modified
+        desired: The full desired configuration, for translators that need
+            context such as the position of a new item
+    """
+
+    def __init__(
+        self,
+        changes: List[Dict[str, Any]],
+        added: Dict[str, Any],
+        removed: Dict[str, Any],
+        modified: Optional[Dict[str, Any]] = None,
+        replaced: Optional[Dict[str, Any]] = None,
+        desired: Optional[Dict[str, Any]] = None
+    ):
+        self.changes = changes
+        self.added = added
+        self.removed = removed
+        self.modified = modified or {}
+        self.replaced = replaced or {}
+        self.desired = desired or {}
+
+    @property
+    def is_empty(self) -> bool:
+        """True if the configurations are identical"""
+        return not self.changes
+
+    @property
+    def sections(self) -> List[str]:
+        """Top-level sections touched by the diff"""
+        seen = []
+        for change in self.changes:
+            section = change["path"].split(".", 1)[0].split("[", 1)[0]
+            if section not in seen:
+                seen.append(section)
+        return seen
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable summary"""
+        return {
+            "sections": self.sections,
+            "change_count": len(self.changes),
+            "changes": self.changes,
+        }
+
+
+def diff_configs(
+    current: Optional[Dict[str, Any]],
+    desired: Dict[str, Any]
+) -> ConfigDiff:
+    """
+    Compute section- and item-level changes between two configurations.
+
+    Args:
+        current: Configuration currently applied to the device (None if unknown)
+        desired: Configuration that should be applied
+
+    Returns:
+        ConfigDiff describing the changes
+    """
+    changes: List[Dict[str, Any]] = []
+    parts = _diff_value(current or {}, desired or {}, "", changes)
+    added, removed, modified, replaced = (part if part is not _MISSING else {} for part in parts)
+
+    return ConfigDiff(
+        changes=changes,
+        added=added,
+        removed=removed,
+        modified=modified,
+        replaced=replaced,
+        desired=desired or {},
+    )
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _diff_value(old: Any, new: Any, path: str, changes: List[Dict[str, Any]]):
+    """Diff two values, returning (added, removed, modified, replaced) partial values"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        return _diff_dict(old, new, path, changes)
+
+    if isinstance(old, list) and isinstance(new, list):
+        key = identity_key(old, new)
+        if key:
+            return _diff_keyed_list(old, new, key, path, changes)
+
+    if canonical_json(old) == canonical_json(new):
+        return _MISSING, _MISSING, _MISSING, _MISSING
+
+    changes.append({"path": path, "action": "modify", "old": old, "new": new})
+
+    # Scalars are overwritten in place; lists and dicts are replaced whole
+    if isinstance(old, (list, dict)):
+        return new, old, _MISSING, _MISSING
+    return new, _MISSING, _MISSING, _MISSING
+
+
+def _diff_dict(old: Dict[str, Any], new: Dict[str, Any], path: str, changes: List[Dict[str, Any]]):
+    # added, removed, modified, replaced
+    parts: tuple = ({}, {}, {}, {})
+
+    for key, new_value in new.items():
+        child_path = _join(path, key)
+        if key not in old:
+            changes.append({"path": child_path, "action": "add", "old": None, "new": new_value})
+            parts[0][key] = new_value
+            continue
+
+        for part, child in zip(parts, _diff_value(old[key], new_value, child_path, changes)):
+            if child is not _MISSING:
+                part[key] = child
+
+    for key, old_value in old.items():
+        if key not in new:
+            changes.append({"path": _join(path, key), "action": "remove", "old": old_value, "new": None})
+            parts[1][key] = old_value
+
+    return tuple(part or _MISSING for part in parts)
+
+
+def _diff_keyed_list(
+    old: List[Dict[str, Any]],
+    new: List[Dict[str, Any]],
+    key: str,
+    path: str,
+    changes: List[Dict[str, Any]]
+):
+    old_by_key = {canonical_json(item[key]): item for item in old}
+    new_keys = set()
+    added: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    modified: List[Dict[str, Any]] = []
+    replaced: List[Dict[str, Any]] = []
+
+    for item in new:
+        item_key = canonical_json(item[key])
+        new_keys.add(item_key)
+        item_path = f"{path}[{key}={item[key]}]"
+
+        previous = old_by_key.get(item_key)
+        if previous is None:
+            changes.append({"path": item_path, "action": "add", "old": None, "new": item})
+            added.append(item)
+        elif canonical_json(previous) != canonical_json(item):
+            changes.append({"path": item_path, "action": "modify", "old": previous, "new": item})
+            modified.append(item)
+            replaced.append(previous)
+
+    for item_key, item in old_by_key.items():
+        if item_key not in new_keys:
+            changes.append({
+                "path": f"{path}[{key}={item[key]}]",
+                "action": "remove",
+                "old": item,
+                "new": None
+            })
+            removed.append(item)
+
+    return tuple(part or _MISSING for part in (added, removed, modified, replaced))
@@ -0,0 +1,134 @@
+"""
+FortiOS configuration parser
+Streaming, line-oriented parser for config/edit/set/next/end output.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+_TOKEN_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+_QUOTE_RE = re.compile(r'(?<!\\)"')
+_ESCAPE_RE = re.compile(r'\\(.)')
+
+SettingValue = Union[str, List[str]]
+
+
+class FortiNode:
+    """
+    One "config" block or "edit" entry.
+
+    Attributes:
+        settings: "set" values; one token as a string, several as a list
+        entries: "edit" entries by key, in order
+        blocks: Nested "config" blocks by name
+    """
+
+    __slots__ = ("settings", "entries", "blocks")
+
+    def __init__(self):
+        self.settings: Dict[str, SettingValue] = {}
+        self.entries: Dict[str, "FortiNode"] = {}
+        self.blocks: Dict[str, "FortiNode"] = {}
+
+    def get(self, key: str, default: Optional[SettingValue] = None) -> Optional[SettingValue]:
+        """Get a setting value"""
+        return self.settings.get(key, default)
+
+    def get_list(self, key: str) -> List[str]:
+        """Get a setting value as a list of tokens"""
+        value = self.settings.get(key)
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+
+def _tokens(line: str) -> List[str]:
+    """Split a line into words, unquoting quoted values"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(line):
+        quoted = match.group(1)
+        if quoted is None:
+            tokens.append(match.group(2))
+        else:
+            tokens.append(_ESCAPE_RE.sub(r"\1", quoted) if "\\" in quoted else quoted)
+    return tokens
+
+
+def parse_config(lines: Iterable[str], blocks: Optional[Set[str]] = None) -> FortiNode:
+    """
+    Parse FortiOS configuration output into a tree, one line at a time.
+
+    Runs in a single pass with a stack of open blocks. Quoted values that
+    span lines (certificates, scripts) are joined before tokenizing.
+
+    Args:
+        lines: Output of "show" / "show full-configuration" (any iterable)
+        blocks: Only keep these top-level blocks, e.g. {"system global",
+            "firewall policy"}; everything else is skipped without building
+            nodes, which keeps memory low on full-configuration dumps
+
+    Returns:
+        Root node whose blocks are the top-level "config" sections
+    """
+    root = FortiNode()
+    stack: List[FortiNode] = [root]
+    skip_depth = 0
+    pending = ""
+
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if pending:
+            line = pending + "\n" + line
+            pending = ""
+        if len(_QUOTE_RE.findall(line)) % 2:
+            # Unterminated quote: value continues on the next line
+            pending = line
+            continue
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        keyword, _, rest = stripped.partition(" ")
+
+        if skip_depth:
+            if keyword in ("config", "edit"):
+                skip_depth += 1
+            elif keyword in ("end", "next"):
+                skip_depth -= 1
+            continue
+
+        if keyword == "config":
+            name = " ".join(_tokens(rest))
+            if len(stack) == 1 and blocks is not None and name not in blocks:
+                skip_depth = 1
+                continue
+            parent = stack[-1]
+            node = parent.blocks.get(name)
+            if node is None:
+                node = parent.blocks[name] = FortiNode()
+            stack.append(node)
+
+        elif keyword == "edit":
+            key = " ".join(_tokens(rest))
+            parent = stack[-1]
+            node = parent.entries.get(key)
+            if node is None:
+                node = parent.entries[key] = FortiNode()
+            stack.append(node)
+
+        elif keyword in ("next", "end"):
+            if len(stack) > 1:
+                stack.pop()
+
+        elif keyword == "set":
+            tokens = _tokens(rest)
+            if tokens:
+                values = tokens[1:]
+                stack[-1].settings[tokens[0]] = values[0] if len(values) == 1 else values
+
+        elif keyword == "unset":
+            tokens = _tokens(rest)
+            if tokens:
+                stack[-1].settings.pop(tokens[0], None)
+
+    return root
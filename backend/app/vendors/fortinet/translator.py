@@ -2,9 +2,12 @@
 Fortinet FortiOS Configuration Translator
 Translates unified YAML configuration to FortiOS CLI commands.
 """
-from typing import Dict, Any, List
+import io
+import ipaddress
+from typing import Dict, Any, List, Optional, Callable
 import yaml
 from ..base import VendorInterface
+from .parser import FortiNode, parse_config
 
 
 class FortinetTranslator(VendorInterface):
@@ -13,6 +16,55 @@ class FortinetTranslator(VendorInterface):
     Translates unified configuration to FortiOS CLI commands.
     """
 
+    # FortiOS CLI error messages
+    ERROR_PATTERNS = [
+        r"\s*Command fail\. Return code",
+        r"\s*command parse error",
+        r"\s*Unknown action \d+",
+        r"\s*entry not found in datasource",
+        r"\s*value parse error",
+        r"\s*node_check_object fail",
+        r"\s*Attribute '[^']*' MUST be set",
+        r"\s*Permission denied",
+    ]
+    ERROR_PATTERN_FLAGS = 0
+
+    TRANSLATION_SECTIONS = [
+        ("system",),
+        ("interfaces",),
+        ("vlans",),
+        ("zones",),
+        ("firewall",),
+        ("nat",),
+        ("vpn",),
+        ("routing",),
+    ]
+
+    # FortiOS has no script import, so upload mode streams the whole
+    # script through one CLI session wrapped in batch mode
+    UPLOAD_METHOD = "batch"
+
+    # Only the blocks config_to_yaml reads, each dumped with defaults
+    CONFIG_BLOCKS = [
+        "system global",
+        "system interface",
+        "system zone",
+        "firewall policy",
+        "vpn ipsec phase1-interface",
+        "vpn ipsec phase2-interface",
+        "router static",
+    ]
+    RUNNING_CONFIG_COMMANDS = [f"show full-configuration {block}" for block in CONFIG_BLOCKS]
+
+    # Pre-shared keys are only ever shown encrypted
+    WRITE_ONLY_KEYS = {"preshared_key"}
+
+    # "system interface" lists every physical and virtual interface
+    PROJECTED_LISTS = ("interfaces",)
+
+    # Policies are matched top to bottom
+    ORDERED_LISTS = ("firewall.policies",)
+
     def yaml_to_commands(self, config: Dict[str, Any]) -> List[str]:
         """
         Convert unified YAML configuration to FortiOS CLI commands.
@@ -202,10 +254,14 @@ class FortinetTranslator(VendorInterface):
             # NAT
             if policy.get("nat"):
                 commands.append(f"        set nat enable")
+            elif "nat" in policy:
+                commands.append(f"        set nat disable")
 
             # Logging
             if policy.get("log"):
                 commands.append(f"        set logtraffic all")
+            elif "log" in policy:
+                commands.append(f"        set logtraffic disable")
 
             commands.append("    next")
 
@@ -264,7 +320,7 @@ class FortinetTranslator(VendorInterface):
         if "static" in routing:
             for idx, route in enumerate(routing["static"]):
                 commands.append("config router static")
-                commands.append(f"    edit {idx + 1}")
+                commands.append(f"    edit {route.get('id', idx + 1)}")
                 commands.append(f"        set dst {route.get('destination', '0.0.0.0/0')}")
                 commands.append(f"        set gateway {route.get('gateway')}")
 
@@ -279,17 +335,325 @@ class FortinetTranslator(VendorInterface):
 
         return commands
 
+    def config_to_yaml(self, running_config: str) -> Dict[str, Any]:
+        """
+        Convert FortiOS configuration output into the unified schema.
+
+        Args:
+            running_config: Output of RUNNING_CONFIG_COMMANDS, or a full
+                "show full-configuration" dump
+
+        Returns:
+            Unified configuration dictionary
+        """
+        root = parse_config(io.StringIO(running_config), set(self.CONFIG_BLOCKS))
+        config: Dict[str, Any] = {}
+
+        system_global = root.blocks.get("system global")
+        if system_global:
+            system: Dict[str, Any] = {}
+            if system_global.get("hostname"):
+                system["hostname"] = system_global.get("hostname")
+            timezone = system_global.get("timezone")
+            if timezone:
+                names = {tz_id: name for name, tz_id in self.TIMEZONE_IDS.items()}
+                system["timezone"] = names.get(timezone, timezone)
+            dns_servers = [
+                system_global.get(key) for key in ("dns-server-1", "dns-server-2")
+                if system_global.get(key) and system_global.get(key) != "0.0.0.0"
+            ]
+            if dns_servers:
+                system["dns"] = {"servers": dns_servers}
+            if system_global.get("ntp-server-1"):
+                system["ntp"] = {"servers": [system_global.get("ntp-server-1")]}
+            if system:
+                config["system"] = system
+
+        interfaces = self._read_interfaces(root.blocks.get("system interface"))
+        if interfaces:
+            config["interfaces"] = interfaces
+
+        zone_block = root.blocks.get("system zone")
+        if zone_block and zone_block.entries:
+            config["zones"] = [
+                {"name": name, "interfaces": zone.get_list("interface")}
+                for name, zone in zone_block.entries.items()
+            ]
+
+        policies = self._read_policies(root.blocks.get("firewall policy"))
+        if policies:
+            config["firewall"] = {"policies": policies}
+
+        tunnels = self._read_tunnels(
+            root.blocks.get("vpn ipsec phase1-interface"),
+            root.blocks.get("vpn ipsec phase2-interface")
+        )
+        if tunnels:
+            config["vpn"] = {"ipsec": tunnels}
+
+        static_block = root.blocks.get("router static")
+        if static_block and static_block.entries:
+            routes = []
+            for route_id, entry in static_block.entries.items():
+                route = {
+                    "id": _number(route_id),
+                    "destination": _prefix(entry.get_list("dst")) or "0.0.0.0/0",
+                    "gateway": entry.get("gateway")
+                }
+                if entry.get("device"):
+                    route["interface"] = entry.get("device")
+                if entry.get("distance"):
+                    route["distance"] = _number(entry.get("distance"))
+                routes.append(route)
+            config["routing"] = {"static": routes}
+
+        return config
+
+    def _read_interfaces(self, block: FortiNode) -> List[Dict[str, Any]]:
+        """Map "system interface" entries to unified interfaces"""
+        interfaces = []
+        if not block:
+            return interfaces
+
+        for name, entry in block.entries.items():
+            iface: Dict[str, Any] = {"name": name}
+            if entry.get("description"):
+                iface["description"] = entry.get("description")
+            if entry.get("status"):
+                iface["enabled"] = entry.get("status") == "up"
+
+            mode = entry.get("mode")
+            ip = entry.get_list("ip")
+            if mode == "dhcp":
+                iface["addressing"] = {"mode": "dhcp"}
+            elif len(ip) == 2 and ip[0] != "0.0.0.0":
+                iface["addressing"] = {
+                    "mode": "static",
+                    "ipv4": {"address": ip[0], "netmask": ip[1]}
+                }
+
+            if entry.get("vlanid") and entry.get("interface"):
+                iface["vlan_id"] = _number(entry.get("vlanid"))
+                iface["parent"] = entry.get("interface")
+            interfaces.append(iface)
+
+        return interfaces
+
+    def _read_policies(self, block: FortiNode) -> List[Dict[str, Any]]:
+        """Map "firewall policy" entries to unified policies"""
+        policies = []
+        if not block:
+            return policies
+
+        for policy_id, entry in block.entries.items():
+            policy: Dict[str, Any] = {"id": _number(policy_id)}
+            if entry.get("name"):
+                policy["name"] = entry.get("name")
+            if entry.get("srcintf"):
+                policy["source_zone"] = entry.get_list("srcintf")
+            if entry.get("dstintf"):
+                policy["destination_zone"] = entry.get_list("dstintf")
+            policy["source_address"] = entry.get_list("srcaddr") or ["all"]
+            policy["destination_address"] = entry.get_list("dstaddr") or ["all"]
+            policy["service"] = entry.get_list("service") or ["ALL"]
+            policy["action"] = entry.get("action", "deny")
+            policy["nat"] = entry.get("nat") == "enable"
+            policy["log"] = entry.get("logtraffic") == "all"
+            policies.append(policy)
+
+        return policies
+
+    def _read_tunnels(self, phase1: FortiNode, phase2: FortiNode) -> List[Dict[str, Any]]:
+        """Join IPsec phase 1 and phase 2 entries into unified tunnels"""
+        tunnels = []
+        if not phase1:
+            return tunnels
+
+        selectors: Dict[str, FortiNode] = {}
+        for entry in (phase2.entries.values() if phase2 else []):
+            name = entry.get("phase1name")
+            if name and name not in selectors:
+                selectors[name] = entry
+
+        for name, entry in phase1.entries.items():
+            tunnel: Dict[str, Any] = {
+                "name": name,
+                "interface": entry.get("interface"),
+                "remote_gateway": entry.get("remote-gw")
+            }
+            selector = selectors.get(name)
+            if selector:
+                if selector.get("src-subnet"):
+                    tunnel["local_subnet"] = _prefix(selector.get_list("src-subnet"))
+                if selector.get("dst-subnet"):
+                    tunnel["remote_subnet"] = _prefix(selector.get_list("dst-subnet"))
+            tunnels.append(tunnel)
+
+        return tunnels
+
+    def normalize_config(
+        self,
+        config: Dict[str, Any],
+        reference: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Pin implicit policy and static route IDs.
+
+        FortiOS edits policies and routes by ID. An explicit "id" is kept;
+        otherwise a policy takes the ID of the reference policy with the
+        same name (a route: same destination and gateway), and anything
+        new takes the next free ID. Without a reference (a full push) IDs
+        default to the list position, as yaml_to_commands numbers them.
+        Inserting a policy therefore adds one entry instead of renumbering
+        every policy after it.
+        """
+        policies = config.get("firewall", {}).get("policies")
+        static = config.get("routing", {}).get("static")
+        if not policies and not static:
+            return config
+
+        reference = reference or {}
+        config = dict(config)
+        if policies:
+            config["firewall"] = dict(config["firewall"])
+            config["firewall"]["policies"] = _pin_ids(
+                policies,
+                reference.get("firewall", {}).get("policies") if reference else None,
+                lambda policy: policy.get("name")
+            )
+        if static:
+            config["routing"] = dict(config["routing"])
+            config["routing"]["static"] = _pin_ids(
+                static,
+                reference.get("routing", {}).get("static") if reference else None,
+                lambda route: (route.get("destination", "0.0.0.0/0"), route.get("gateway"))
+            )
+        return config
+
+    def modify_commands(self, diff, translate) -> List[str]:
+        """
+        Edit changed policies and routes in place.
+
+        "edit <id>" updates an existing entry, so the changed items are
+        simply translated again. Flags a policy no longer sets are turned
+        off explicitly, since an edit leaves unmentioned settings alone.
+        """
+        modified = diff.modified
+        policies = modified.get("firewall", {}).get("policies")
+        if policies:
+            modified = {
+                **modified,
+                "firewall": {
+                    **modified["firewall"],
+                    "policies": [{"nat": False, "log": False, **policy} for policy in policies]
+                }
+            }
+        return translate(modified)
+
+    def diff_to_commands(self, diff, translate=None) -> List[str]:
+        """
+        Convert a ConfigDiff into FortiOS commands.
+
+        New policies are appended by FortiOS, so each one is moved before
+        the policy that follows it in the desired list.
+        """
+        commands = super().diff_to_commands(diff, translate)
+
+        added = diff.added.get("firewall", {}).get("policies") or []
+        desired = diff.desired.get("firewall", {}).get("policies") or []
+        order = [policy.get("id") for policy in desired]
+        moves = []
+        for policy in added:
+            position = order.index(policy.get("id")) if policy.get("id") in order else -1
+            if 0 <= position < len(order) - 1:
+                moves.append(f"    move {policy['id']} before {order[position + 1]}")
+        if moves:
+            commands.extend(["config firewall policy", *moves, "end"])
+        return commands
+
+    def removal_commands(self, removed: Dict[str, Any]) -> List[str]:
+        """Convert removed items into FortiOS delete commands"""
+        commands = []
+
+        policies = removed.get("firewall", {}).get("policies", [])
+        if policies:
+            commands.append("config firewall policy")
+            for idx, policy in enumerate(policies, start=1):
+                commands.append(f"    delete {policy.get('id', idx)}")
+            commands.append("end")
+
+        static = removed.get("routing", {}).get("static", [])
+        if static:
+            commands.append("config router static")
+            for idx, route in enumerate(static, start=1):
+                commands.append(f"    delete {route.get('id', idx)}")
+            commands.append("end")
+
+        for zone in removed.get("zones", []):
+            if zone.get("name"):
+                commands.append("config system zone")
+                commands.append(f"    delete {zone['name']}")
+                commands.append("end")
+
+        for tunnel in removed.get("vpn", {}).get("ipsec", []):
+            name = tunnel.get("name")
+            if not name:
+                continue
+            # Phase 2 references phase 1, so it has to go first
+            commands.append("config vpn ipsec phase2-interface")
+            commands.append(f"    delete {name}-p2")
+            commands.append("end")
+            commands.append("config vpn ipsec phase1-interface")
+            commands.append(f"    delete {name}")
+            commands.append("end")
+
+        return commands
+
+    # Device-side checkpoints
+    #
+    # Restoring a revision asks y/n and reboots the unit, which an exec
+    # channel can neither answer nor verify, so a failed change is not
+    # rolled back automatically: the revision is kept for restoring by hand.
+
+    def checkpoint_commands(self, name: str) -> List[str]:
+        """Save a config revision and list revisions to learn its ID"""
+        return [
+            f"execute backup config flash {name}",
+            "execute revision list config",
+        ]
+
+    def parse_checkpoint(self, name: str, outputs: List[str]) -> Dict[str, Any]:
+        """Find the revision ID whose comment is the checkpoint name"""
+        revision_id = None
+        for line in "\n".join(outputs).splitlines():
+            parts = line.split()
+            if parts and parts[0].isdigit() and name in line:
+                revision_id = int(parts[0])
+
+        return {"name": name, "revision_id": revision_id}
+
+    def rollback_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """No unattended restore on FortiOS (see above)"""
+        return []
+
+    def release_checkpoint_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """Delete the pre-change config revision"""
+        if checkpoint.get("revision_id") is None:
+            return []
+        return [f"execute revision delete config {checkpoint['revision_id']}"]
+
+    # Simplified mapping of generic timezones to FortiOS IDs - expand as needed
+    TIMEZONE_IDS = {
+        "UTC": "00",
+        "America/New_York": "81",
+        "America/Chicago": "82",
+        "America/Los_Angeles": "84",
+        "Europe/London": "26",
+    }
+
     def _map_timezone(self, tz: str) -> str:
         """Map generic timezone to FortiOS timezone ID"""
-        # Simplified mapping - expand as needed
-        tz_map = {
-            "UTC": "00",
-            "America/New_York": "81",
-            "America/Chicago": "82",
-            "America/Los_Angeles": "84",
-            "Europe/London": "26",
-        }
-        return tz_map.get(tz, "00")
+        return self.TIMEZONE_IDS.get(tz, "00")
 
     def validate_config(self, config: Dict[str, Any]) -> tuple[bool, str]:
         """
@@ -310,6 +674,13 @@ class FortinetTranslator(VendorInterface):
 
         return True, ""
 
+    def render_script(self, commands: List[str]) -> str:
+        """Render commands as a FortiOS batch script"""
+        lines = ["execute batch start"]
+        lines.extend(commands)
+        lines.append("execute batch end")
+        return "\n".join(lines) + "\n"
+
     def parse_device_status(self, status_output: str) -> Dict[str, Any]:
         """Parse device status from CLI output"""
         # Parse FortiOS status output
@@ -334,3 +705,44 @@ class FortinetTranslator(VendorInterface):
             "qos", "ips", "antivirus", "webfilter", "sdwan"
         }
         return feature.lower() in supported
+
+
+def _number(value: Any) -> Any:
+    """FortiOS prints IDs and counters as text; the unified schema uses numbers"""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def _prefix(tokens: List[str]) -> str:
+    """Convert FortiOS "address netmask" pairs to CIDR notation"""
+    if len(tokens) == 2:
+        try:
+            return str(ipaddress.ip_network(f"{tokens[0]}/{tokens[1]}", strict=False))
+        except ValueError:
+            pass
+    return " ".join(tokens)
+
+
+def _pin_ids(
+    items: List[Dict[str, Any]],
+    reference: Optional[List[Dict[str, Any]]],
+    identity: Callable[[Dict[str, Any]], Any]
+) -> List[Dict[str, Any]]:
+    """Give every item an explicit "id" (see FortinetTranslator.normalize_config)"""
+    if reference is None:
+        return [{"id": idx, **item} for idx, item in enumerate(items, start=1)]
+
+    known = {identity(item): item["id"] for item in reference if "id" in item and identity(item) is not None}
+    used = {item["id"] for item in reference if "id" in item} | {item["id"] for item in items if "id" in item}
+    next_id = max(used, default=0) + 1
+
+    pinned = []
+    for item in items:
+        if "id" not in item:
+            item_id = known.get(identity(item))
+            if item_id is None or item_id in {p["id"] for p in pinned}:
+                item_id, next_id = next_id, next_id + 1
+            item = {"id": item_id, **item}
+        pinned.append(item)
+    return pinned
@@ -0,0 +1,119 @@
+"""
+RouterOS export parser
+Streaming, line-oriented parser for /export output.
+"""
+import re
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+# One token: a [ find ... ] selector, a key=value pair (value optionally
+# quoted), a quoted string or a bare word
+_TOKEN_RE = re.compile(
+    r'\[[^\]]*\]'
+    r'|[^\s=\["]+=(?:"(?:[^"\\]|\\.)*"|[^\s"]*)'
+    r'|"(?:[^"\\]|\\.)*"'
+    r'|\S+'
+)
+_ESCAPE_RE = re.compile(r'\\([0-9A-Fa-f]{2}|.)')
+
+# Menu commands that carry configuration in an export
+VERBS = {"add", "set", "remove", "enable", "disable"}
+
+# (menu path, verb, selector, arguments)
+ExportCommand = Tuple[str, str, Dict[str, str], Dict[str, str]]
+
+
+def unquote(value: str) -> str:
+    """Strip quotes and resolve RouterOS escape sequences"""
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+    if "\\" not in value:
+        return value
+    return _ESCAPE_RE.sub(
+        lambda m: chr(int(m.group(1), 16)) if len(m.group(1)) == 2 else m.group(1),
+        value
+    )
+
+
+def _logical_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Join backslash-continued lines and drop comments and blanks"""
+    pending = ""
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if pending:
+            line = pending + line.lstrip()
+            pending = ""
+        if line.endswith("\\"):
+            pending = line[:-1]
+            continue
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            yield stripped
+    if pending.strip():
+        yield pending.strip()
+
+
+def _parse_selector(token: str) -> Dict[str, str]:
+    """Parse a "[ find key=value ... ]" item selector"""
+    selector = {}
+    for part in _TOKEN_RE.findall(token[1:-1]):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            selector[key] = unquote(value)
+    return selector
+
+
+def iter_export(lines: Iterable[str], paths: Optional[Set[str]] = None) -> Iterator[ExportCommand]:
+    """
+    Parse RouterOS export output into commands, one line at a time.
+
+    Handles both the default layout (a menu path line followed by commands)
+    and "terse" exports where every command carries its full path. Memory
+    use is bounded by the longest logical line, so multi-megabyte exports
+    can be streamed straight from the device output.
+
+    Args:
+        lines: Export output lines (any iterable, e.g. a file or StringIO)
+        paths: Only yield commands under these menu paths (all if None);
+            other lines are skipped without tokenizing their arguments
+
+    Yields:
+        (menu path, verb, selector, arguments) tuples. The selector holds
+        the "[ find ... ]" criteria or {"name": ...} for a positional item
+        name; arguments map attribute names to unquoted values.
+    """
+    path = ""
+    for line in _logical_lines(lines):
+        rest = line
+        if line.startswith("/"):
+            # Path words run up to the first verb or argument
+            words = []
+            tokens = line.split(None)
+            idx = 0
+            while idx < len(tokens) and tokens[idx] not in VERBS and "=" not in tokens[idx] and not tokens[idx].startswith("["):
+                words.append(tokens[idx])
+                idx += 1
+            path = " ".join(words)
+            if idx == len(tokens):
+                continue
+            rest = line.split(None, idx)[idx]
+
+        if paths is not None and path not in paths:
+            continue
+
+        tokens = _TOKEN_RE.findall(rest)
+        if not tokens or tokens[0] not in VERBS:
+            continue
+
+        verb = tokens[0]
+        selector: Dict[str, str] = {}
+        args: Dict[str, str] = {}
+        for token in tokens[1:]:
+            if token.startswith("["):
+                selector.update(_parse_selector(token))
+            elif "=" in token and not token.startswith('"'):
+                key, value = token.split("=", 1)
+                args[key] = unquote(value)
+            else:
+                selector.setdefault("name", unquote(token))
+
+        yield path, verb, selector, args
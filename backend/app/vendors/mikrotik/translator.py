@@ -1,8 +1,11 @@
 """
 MikroTik RouterOS YAML to command translator
 """
+import io
+import re
 from typing import Dict, List, Any
 from ..base import VendorInterface
+from .parser import iter_export
 
 
 class MikroTikTranslator(VendorInterface):
@@ -26,6 +29,82 @@ class MikroTikTranslator(VendorInterface):
         "system",
     }
 
+    # RouterOS CLI error messages
+    ERROR_PATTERNS = [
+        r"\s*failure:",
+        r"\s*bad command name",
+        r"\s*syntax error",
+        r"\s*expected end of command",
+        r"\s*expected command name",
+        r"\s*invalid value",
+        r"\s*input does not match any value",
+        r"\s*no such item",
+        r"\s*ambiguous value",
+        r"\s*missing value\(s\) of argument",
+        r"\s*value of \S+ (?:out of range|must)",
+        r"\s*not enough permissions",
+        r"\s*Script Error:",
+    ]
+    ERROR_PATTERN_FLAGS = 0
+
+    # Top-level configuration sections handled by yaml_to_commands
+    CONFIG_SECTIONS = {
+        "system",
+        "interfaces",
+        "ip",
+        "bridge",
+        "wireless",
+        "users",
+    }
+
+    TRANSLATION_SECTIONS = [
+        ("system",),
+        ("interfaces",),
+        ("ip",),
+        ("bridge",),
+        ("wireless",),
+        ("users",),
+    ]
+
+    # RouterOS can /import an uploaded .rsc script in one step
+    UPLOAD_METHOD = "import"
+    UPLOAD_FILENAME = "orchenet-push.rsc"
+
+    # Terse exports put the full menu path on every line
+    RUNNING_CONFIG_COMMANDS = ["/export terse"]
+
+    # Passwords are never exported, and neither is the /user menu
+    WRITE_ONLY_KEYS = {"password", "users"}
+
+    # Physical interfaces exist whether or not the config mentions them
+    PROJECTED_LISTS = ("interfaces", "wireless.interfaces")
+
+    # Firewall rules are evaluated top to bottom
+    ORDERED_LISTS = ("ip.firewall.filter", "ip.firewall.nat")
+
+    # Export menus read back by config_to_yaml
+    EXPORT_PATHS = {
+        "/system identity",
+        "/system ntp client",
+        "/system ntp client servers",
+        "/system clock",
+        "/interface",
+        "/interface ethernet",
+        "/ip address",
+        "/ip route",
+        "/ip dns",
+        "/ip dhcp-server",
+        "/ip firewall filter",
+        "/ip firewall nat",
+        "/interface bridge",
+        "/interface bridge port",
+        "/interface wireless",
+        "/interface wireless security-profiles",
+    }
+
+    # Attributes read back as numbers
+    NUMERIC_ATTRIBUTES = {"mtu", "distance", "pvid", "frequency", "dst-port", "to-ports"}
+
     def yaml_to_commands(self, config: Dict[str, Any]) -> List[str]:
         """Convert YAML config to RouterOS commands"""
         commands = []
@@ -57,7 +136,7 @@ class MikroTikTranslator(VendorInterface):
 
         # Check for unknown sections
         for section in config.keys():
-            if section not in self.SUPPORTED_FEATURES:
+            if section not in self.CONFIG_SECTIONS:
                 errors.append(f"Unknown configuration section: {section}")
 
         return (len(errors) == 0, errors)
@@ -81,6 +160,157 @@ class MikroTikTranslator(VendorInterface):
         """Check if feature is supported"""
         return feature in self.SUPPORTED_FEATURES
 
+    def render_script(self, commands: List[str]) -> str:
+        """Render commands as a RouterOS .rsc script"""
+        return "# OrcheNet configuration push\n" + "\n".join(commands) + "\n"
+
+    def get_import_commands(self, filename: str) -> List[str]:
+        """Import the uploaded script, then remove it from the device"""
+        return [
+            f"/import file-name={filename}",
+            f"/file remove {filename}",
+        ]
+
+    def running_config_fingerprint(self, running_config: str) -> str:
+        """Drop export comments ("# <date> by RouterOS ...", software id)"""
+        return "\n".join(
+            line for line in running_config.splitlines() if not line.lstrip().startswith("#")
+        )
+
+    def config_to_yaml(self, running_config: str) -> Dict[str, Any]:
+        """
+        Convert RouterOS export output into the unified schema.
+
+        Args:
+            running_config: Output of "/export" or "/export terse"
+
+        Returns:
+            Unified configuration dictionary
+        """
+        config: Dict[str, Any] = {}
+        interfaces: Dict[str, Dict[str, Any]] = {}
+        wireless_interfaces: Dict[str, Dict[str, Any]] = {}
+
+        for path, verb, selector, args in iter_export(io.StringIO(running_config), self.EXPORT_PATHS):
+            if verb not in ("add", "set"):
+                continue
+            args = {key: self._read_value(key, value) for key, value in args.items()}
+
+            if path == "/system identity" and "name" in args:
+                config.setdefault("system", {})["identity"] = args["name"]
+
+            elif path == "/system ntp client":
+                ntp = config.setdefault("system", {}).setdefault("ntp", {})
+                if "enabled" in args:
+                    ntp["enabled"] = args["enabled"] == "yes"
+                if args.get("servers"):
+                    ntp["servers"] = args["servers"].split(",")
+
+            elif path == "/system ntp client servers" and "address" in args:
+                ntp = config.setdefault("system", {}).setdefault("ntp", {})
+                ntp.setdefault("servers", []).append(args["address"])
+
+            elif path == "/system clock" and "time-zone-name" in args:
+                config.setdefault("system", {}).setdefault("clock", {})["timezone"] = args["time-zone-name"]
+
+            elif path in ("/interface", "/interface ethernet") and verb == "set":
+                name = args.get("name") or selector.get("name") or selector.get("default-name")
+                if name:
+                    iface = interfaces.setdefault(name, {"name": name})
+                    if "disabled" in args:
+                        iface["enabled"] = args["disabled"] != "yes"
+                    if "comment" in args:
+                        iface["comment"] = args["comment"]
+                    if "mtu" in args:
+                        iface["mtu"] = args["mtu"]
+
+            elif path == "/ip address" and verb == "add":
+                addr = {"interface": args.get("interface"), "address": args.get("address")}
+                if "comment" in args:
+                    addr["comment"] = args["comment"]
+                config.setdefault("ip", {}).setdefault("addresses", []).append(addr)
+
+            elif path == "/ip route" and verb == "add" and "gateway" in args:
+                route = {"dst_address": args.get("dst-address", "0.0.0.0/0"), "gateway": args["gateway"]}
+                if "distance" in args:
+                    route["distance"] = args["distance"]
+                if "comment" in args:
+                    route["comment"] = args["comment"]
+                config.setdefault("ip", {}).setdefault("routes", []).append(route)
+
+            elif path == "/ip dns":
+                dns = config.setdefault("ip", {}).setdefault("dns", {})
+                if args.get("servers"):
+                    dns["servers"] = args["servers"].split(",")
+                if "allow-remote-requests" in args:
+                    dns["allow_remote_requests"] = args["allow-remote-requests"] == "yes"
+
+            elif path == "/ip dhcp-server" and verb == "add":
+                dhcp = {
+                    "name": args.get("name"),
+                    "interface": args.get("interface"),
+                    "address_pool": args.get("address-pool")
+                }
+                if "lease-time" in args:
+                    dhcp["lease_time"] = args["lease-time"]
+                config.setdefault("ip", {}).setdefault("dhcp_server", []).append(dhcp)
+
+            elif path == "/ip firewall filter" and verb == "add":
+                rule = self._read_rule(args, self.FIREWALL_FILTER_FIELDS)
+                config.setdefault("ip", {}).setdefault("firewall", {}).setdefault("filter", []).append(rule)
+
+            elif path == "/ip firewall nat" and verb == "add":
+                rule = self._read_rule(args, self.FIREWALL_NAT_FIELDS)
+                config.setdefault("ip", {}).setdefault("firewall", {}).setdefault("nat", []).append(rule)
+
+            elif path == "/interface bridge" and verb == "add" and "name" in args:
+                br = {"name": args["name"]}
+                if "comment" in args:
+                    br["comment"] = args["comment"]
+                config.setdefault("bridge", {}).setdefault("bridges", []).append(br)
+
+            elif path == "/interface bridge port" and verb == "add":
+                port = {"bridge": args.get("bridge"), "interface": args.get("interface")}
+                if "pvid" in args:
+                    port["pvid"] = args["pvid"]
+                config.setdefault("bridge", {}).setdefault("ports", []).append(port)
+
+            elif path == "/interface wireless security-profiles" and "name" in args:
+                profile = {"name": args["name"]}
+                if "mode" in args:
+                    profile["mode"] = args["mode"]
+                if args.get("authentication-types"):
+                    profile["authentication_types"] = args["authentication-types"].split(",")
+                if "wpa2-pre-shared-key" in args:
+                    profile["wpa2_pre_shared_key"] = args["wpa2-pre-shared-key"]
+                config.setdefault("wireless", {}).setdefault("security_profiles", []).append(profile)
+
+            elif path == "/interface wireless" and verb == "set":
+                name = args.get("name") or selector.get("name") or selector.get("default-name")
+                if name:
+                    iface = wireless_interfaces.setdefault(name, {"name": name})
+                    for attr, key in (("ssid", "ssid"), ("mode", "mode"),
+                                      ("security-profile", "security_profile"), ("frequency", "frequency")):
+                        if attr in args:
+                            iface[key] = args[attr]
+
+        if interfaces:
+            config["interfaces"] = list(interfaces.values())
+        if wireless_interfaces:
+            config.setdefault("wireless", {})["interfaces"] = list(wireless_interfaces.values())
+
+        return config
+
+    def _read_value(self, attr: str, value: str) -> Any:
+        """Convert numeric attributes back to numbers"""
+        if attr in self.NUMERIC_ATTRIBUTES and value.isdigit():
+            return int(value)
+        return value
+
+    def _read_rule(self, args: Dict[str, Any], fields: List[tuple]) -> Dict[str, Any]:
+        """Map firewall rule attributes back to unified keys"""
+        return {key: args[attr] for key, attr in fields if attr in args}
+
     # Helper methods for translating specific sections
 
     def _translate_system(self, system: Dict[str, Any]) -> List[str]:
@@ -187,6 +417,30 @@ class MikroTikTranslator(VendorInterface):
 
         return commands
 
+    # Unified rule keys and their RouterOS attribute names, in command order
+    FIREWALL_FILTER_FIELDS = [
+        ("chain", "chain"),
+        ("action", "action"),
+        ("protocol", "protocol"),
+        ("src_address", "src-address"),
+        ("dst_address", "dst-address"),
+        ("dst_port", "dst-port"),
+        ("in_interface", "in-interface"),
+        ("out_interface", "out-interface"),
+        ("comment", "comment"),
+    ]
+
+    FIREWALL_NAT_FIELDS = [
+        ("chain", "chain"),
+        ("action", "action"),
+        ("to_addresses", "to-addresses"),
+        ("to_ports", "to-ports"),
+        ("protocol", "protocol"),
+        ("dst_port", "dst-port"),
+        ("out_interface", "out-interface"),
+        ("comment", "comment"),
+    ]
+
     def _translate_firewall(self, firewall: Dict[str, Any]) -> List[str]:
         """Translate firewall configuration"""
         commands = []
@@ -194,53 +448,28 @@ class MikroTikTranslator(VendorInterface):
         if "filter" in firewall:
             for rule in firewall["filter"]:
                 cmd_parts = ["/ip firewall filter add"]
-
-                if "chain" in rule:
-                    cmd_parts.append(f"chain={rule['chain']}")
-                if "action" in rule:
-                    cmd_parts.append(f"action={rule['action']}")
-                if "protocol" in rule:
-                    cmd_parts.append(f"protocol={rule['protocol']}")
-                if "src_address" in rule:
-                    cmd_parts.append(f"src-address={rule['src_address']}")
-                if "dst_address" in rule:
-                    cmd_parts.append(f"dst-address={rule['dst_address']}")
-                if "dst_port" in rule:
-                    cmd_parts.append(f"dst-port={rule['dst_port']}")
-                if "in_interface" in rule:
-                    cmd_parts.append(f"in-interface={rule['in_interface']}")
-                if "out_interface" in rule:
-                    cmd_parts.append(f"out-interface={rule['out_interface']}")
-                if "comment" in rule:
-                    cmd_parts.append(f"comment=\"{rule['comment']}\"")
-
+                cmd_parts.extend(self._rule_args(rule, self.FIREWALL_FILTER_FIELDS))
                 commands.append(" ".join(cmd_parts))
 
         if "nat" in firewall:
             for rule in firewall["nat"]:
                 cmd_parts = ["/ip firewall nat add"]
-
-                if "chain" in rule:
-                    cmd_parts.append(f"chain={rule['chain']}")
-                if "action" in rule:
-                    cmd_parts.append(f"action={rule['action']}")
-                if "to_addresses" in rule:
-                    cmd_parts.append(f"to-addresses={rule['to_addresses']}")
-                if "to_ports" in rule:
-                    cmd_parts.append(f"to-ports={rule['to_ports']}")
-                if "protocol" in rule:
-                    cmd_parts.append(f"protocol={rule['protocol']}")
-                if "dst_port" in rule:
-                    cmd_parts.append(f"dst-port={rule['dst_port']}")
-                if "out_interface" in rule:
-                    cmd_parts.append(f"out-interface={rule['out_interface']}")
-                if "comment" in rule:
-                    cmd_parts.append(f"comment=\"{rule['comment']}\"")
-
+                cmd_parts.extend(self._rule_args(rule, self.FIREWALL_NAT_FIELDS))
                 commands.append(" ".join(cmd_parts))
 
         return commands
 
+    def _rule_args(self, rule: Dict[str, Any], fields: List[tuple]) -> List[str]:
+        """Build attribute=value arguments for a firewall rule"""
+        args = []
+        for key, attr in fields:
+            if key in rule:
+                if key == "comment":
+                    args.append(f"{attr}=\"{rule[key]}\"")
+                else:
+                    args.append(f"{attr}={rule[key]}")
+        return args
+
     def _translate_bridge(self, bridge: Dict[str, Any]) -> List[str]:
         """Translate bridge configuration"""
         commands = []
@@ -314,3 +543,120 @@ class MikroTikTranslator(VendorInterface):
                 commands.append(cmd)
 
         return commands
+
+    # Device-side checkpoints
+    #
+    # Safe mode needs an interactive terminal (Ctrl+X) and can't be driven
+    # over exec channels, so checkpoints are binary backups instead. Loading
+    # a backup asks for confirmation and reboots the router, which an exec
+    # channel can't answer or survive, so a failed change is not rolled back
+    # automatically: the backup is kept for restoring by hand.
+
+    def checkpoint_commands(self, name: str) -> List[str]:
+        """Save a binary backup before the change"""
+        return [f"/system backup save name={name} dont-encrypt=yes"]
+
+    def rollback_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """No unattended restore on RouterOS (see above)"""
+        return []
+
+    def release_checkpoint_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """Delete the pre-change backup"""
+        return [f"/file remove {checkpoint['name']}.backup"]
+
+    # In-place updates of changed items
+
+    # Menus whose items are created with "add", and the attribute a changed
+    # item is found by (the diff's identity key for that list)
+    SET_IN_PLACE = {
+        "/ip address": "address",
+        "/ip dhcp-server": "name",
+        "/interface bridge": "name",
+        "/interface wireless security-profiles": "name",
+        "/user": "name",
+    }
+
+    def modify_commands(self, diff, translate) -> List[str]:
+        """
+        Convert changed items into RouterOS set commands.
+
+        The item's "add" command becomes "set [find <identity>]" with the
+        same arguments, so the item keeps its RouterOS ID and everything
+        that refers to it (bridge ports, logged-in users) stays in place.
+        Commands that already "set" are kept as they are.
+        """
+        commands = []
+        for command in translate(diff.modified):
+            for menu, attr in self.SET_IN_PLACE.items():
+                prefix = f"{menu} add "
+                if command.startswith(prefix):
+                    args = command[len(prefix):]
+                    match = re.search(rf"(?:^| ){attr}=(\S+)", args)
+                    if match:
+                        command = f"{menu} set [find {attr}={match.group(1)}] {args}"
+                    break
+            commands.append(command)
+        return commands
+
+    # Removal of configuration items
+
+    def removal_commands(self, removed: Dict[str, Any]) -> List[str]:
+        """
+        Convert removed items into RouterOS remove commands.
+
+        Items are located with [find ...] on the attributes they were added
+        with. Interfaces and wireless interfaces are physical and are only
+        ever "set", so they have nothing to remove.
+        """
+        commands = []
+
+        system = removed.get("system", {})
+        if isinstance(system.get("ntp"), dict):
+            for server in system["ntp"].get("servers", []):
+                commands.append(f"/system ntp client servers remove [find address={server}]")
+
+        ip_config = removed.get("ip", {})
+
+        for addr in ip_config.get("addresses", []):
+            if addr.get("interface") and addr.get("address"):
+                commands.append(
+                    f"/ip address remove [find address={addr['address']} interface={addr['interface']}]"
+                )
+
+        for route in ip_config.get("routes", []):
+            if route.get("gateway"):
+                dst = route.get("dst_address", "0.0.0.0/0")
+                commands.append(f"/ip route remove [find dst-address={dst} gateway={route['gateway']}]")
+
+        for dhcp in ip_config.get("dhcp_server", []):
+            if dhcp.get("name"):
+                commands.append(f"/ip dhcp-server remove [find name={dhcp['name']}]")
+
+        firewall = ip_config.get("firewall", {})
+        for rule in firewall.get("filter", []):
+            args = " ".join(self._rule_args(rule, self.FIREWALL_FILTER_FIELDS))
+            commands.append(f"/ip firewall filter remove [find {args}]")
+        for rule in firewall.get("nat", []):
+            args = " ".join(self._rule_args(rule, self.FIREWALL_NAT_FIELDS))
+            commands.append(f"/ip firewall nat remove [find {args}]")
+
+        bridge = removed.get("bridge", {})
+        for port in bridge.get("ports", []):
+            if port.get("bridge") and port.get("interface"):
+                commands.append(
+                    f"/interface bridge port remove [find bridge={port['bridge']} interface={port['interface']}]"
+                )
+        for br in bridge.get("bridges", []):
+            if br.get("name"):
+                commands.append(f"/interface bridge remove [find name={br['name']}]")
+
+        wireless = removed.get("wireless", {})
+        for profile in wireless.get("security_profiles", []):
+            if profile.get("name"):
+                commands.append(f"/interface wireless security-profiles remove [find name={profile['name']}]")
+
+        for user in removed.get("users", []):
+            if user.get("name"):
+                commands.append(f"/user remove [find name={user['name']}]")
+
+        return commands
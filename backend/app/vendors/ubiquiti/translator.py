@@ -2,7 +2,7 @@
 Ubiquiti UniFi Configuration Translator
 Translates unified YAML configuration to UniFi Controller API calls.
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import yaml
 from ..base import VendorInterface
 
@@ -16,6 +16,27 @@ class UniFiTranslator(VendorInterface):
     Therefore, yaml_to_commands returns API operation dictionaries.
     """
 
+    # Interfaces and VLANs are merged into networks, so they translate together
+    TRANSLATION_SECTIONS = [
+        ("system",),
+        ("interfaces", "vlans"),
+        ("firewall",),
+        ("nat",),
+        ("vpn",),
+        ("wireless",),
+        ("routing",),
+    ]
+
+    # Service names recognised when mapping firewall ports back
+    SERVICE_PORTS = {"80": "http", "443": "https", "22": "ssh"}
+
+    # Collections whose objects are matched by name against the controller
+    # before a push, so existing objects are updated instead of duplicated
+    UPSERT_COLLECTIONS = ("networkconf", "wlanconf", "firewallrule")
+
+    # Firewall rules are matched top to bottom
+    ORDERED_LISTS = ("firewall.policies",)
+
     def yaml_to_commands(self, config: Dict[str, Any]) -> List[str]:
         """
         Convert unified YAML configuration to UniFi API operations.
@@ -334,6 +355,141 @@ class UniFiTranslator(VendorInterface):
 
         return operations
 
+    def modify_commands(self, diff, translate) -> List[str]:
+        """Changed objects are re-sent; plan_upserts turns them into updates"""
+        return translate(diff.modified)
+
+    def removal_commands(self, removed: Dict[str, Any]) -> List[str]:
+        """
+        Convert removed networks, WLANs and firewall rules into deletions.
+
+        Objects are named rather than addressed by _id; plan_upserts looks
+        the name up on the controller, and names it doesn't have are
+        skipped.
+        """
+        import json
+        operations = []
+
+        networks = [
+            vlan.get("name", f"VLAN{vlan['id']}")
+            for vlan in removed.get("vlans", []) if vlan.get("id")
+        ]
+        networks += [
+            iface.get("name", f"VLAN{iface['vlan_id']}")
+            for iface in removed.get("interfaces", []) if "vlan_id" in iface
+        ]
+        for name in networks:
+            operations.append(_deletion("networkconf", name))
+
+        for ssid in removed.get("wireless", {}).get("ssids", []):
+            operations.append(_deletion("wlanconf", ssid.get("ssid", "WiFi")))
+
+        for policy in removed.get("firewall", {}).get("policies", []):
+            operations.append(_deletion("firewallrule", policy.get("name", "Firewall Rule")))
+
+        return [json.dumps(op) for op in operations]
+
+    def diff_to_commands(self, diff, translate=None) -> List[str]:
+        """
+        Convert a ConfigDiff into UniFi API operations.
+
+        A list replaced whole shows up as removed and added; objects it
+        keeps by name are updated by plan_upserts, so they aren't deleted.
+        """
+        import json
+        commands = super().diff_to_commands(diff, translate)
+        operations = [json.loads(command) for command in commands]
+        written = {
+            (_collection(op.get("endpoint", "")), (op.get("data") or {}).get("name"))
+            for op in operations if op.get("method") == "POST"
+        }
+        return [
+            command for command, op in zip(commands, operations)
+            if not (
+                op.get("method") == "DELETE"
+                and (_collection(op.get("endpoint", "")), (op.get("data") or {}).get("name")) in written
+            )
+        ]
+
+    def upsert_collections(self, operations: List[Dict[str, Any]]) -> List[str]:
+        """Upsert collections that operations create or delete objects in"""
+        collections = {
+            _collection(op.get("endpoint", "")) for op in operations if op.get("method") in ("POST", "DELETE")
+        }
+        return [name for name in self.UPSERT_COLLECTIONS if name in collections]
+
+    def plan_upserts(
+        self,
+        operations: List[Dict[str, Any]],
+        current: Dict[str, List[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Turn creates of objects that already exist into updates or no-ops.
+
+        Each POST to an upsert collection is matched by name against the
+        controller's objects: missing objects are still created, objects
+        that differ are updated with a PUT to their _id, and objects that
+        already match are skipped. Fields the translator leaves empty (""
+        or None) are neither compared nor sent in updates, so they don't
+        clear values set on the controller. A DELETE by name (from
+        removal_commands) is sent to the object's _id, or skipped if the
+        controller has no such object.
+
+        Args:
+            operations: Operations from yaml_to_commands (parsed)
+            current: Controller objects by collection, from
+                UniFiController.get_collections
+
+        Returns:
+            Tuple of (operations to send, number of operations skipped)
+        """
+        existing_by_name = {
+            collection: {obj.get("name"): obj for obj in reversed(objects or []) if obj.get("name")}
+            for collection, objects in current.items()
+        }
+
+        planned = []
+        skipped = 0
+        for operation in operations:
+            collection = _collection(operation.get("endpoint", ""))
+            data = operation.get("data") or {}
+
+            if operation.get("method") == "DELETE" and collection in existing_by_name:
+                existing = existing_by_name[collection].get(data.get("name"))
+                if existing is None:
+                    skipped += 1
+                else:
+                    planned.append({
+                        "endpoint": f"{operation['endpoint']}/{existing['_id']}",
+                        "method": "DELETE",
+                        "data": {}
+                    })
+                continue
+
+            existing = None
+            if operation.get("method") == "POST" and collection in existing_by_name:
+                existing = existing_by_name[collection].get(data.get("name"))
+
+            if existing is None:
+                planned.append(operation)
+                continue
+
+            changes = {
+                key: value for key, value in data.items()
+                if value not in ("", None) and not _same_value(existing.get(key), value)
+            }
+            if not changes:
+                skipped += 1
+                continue
+
+            planned.append({
+                "endpoint": f"{operation['endpoint']}/{existing['_id']}",
+                "method": "PUT",
+                "data": {"name": data["name"], **changes}
+            })
+
+        return planned, skipped
+
     def validate_config(self, config: Dict[str, Any]) -> tuple[bool, str]:
         """
         Validate configuration before translation.
@@ -352,6 +508,120 @@ class UniFiTranslator(VendorInterface):
 
         return True, ""
 
+    def config_to_yaml(self, running_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert controller objects back into the unified schema.
+
+        Args:
+            running_config: Controller data from UniFiController.get_running_config,
+                keyed by REST collection (networkconf, wlanconf, ...)
+
+        Returns:
+            Unified configuration dictionary
+        """
+        config: Dict[str, Any] = {}
+
+        for setting in running_config.get("setting", []):
+            if setting.get("key") == "mgmt":
+                system = {}
+                if "name" in setting:
+                    system["hostname"] = setting["name"]
+                if "timezone" in setting:
+                    system["timezone"] = setting["timezone"]
+                if system:
+                    config["system"] = system
+
+        vlans = []
+        interfaces = []
+        for network in running_config.get("networkconf", []):
+            vlan_id = network.get("vlan_id", network.get("vlan"))
+            if not vlan_id:
+                continue
+            vlans.append({
+                "id": vlan_id,
+                "name": network.get("name", f"VLAN{vlan_id}"),
+                "enabled": network.get("enabled", True)
+            })
+            if network.get("ip_subnet"):
+                interfaces.append({
+                    "name": network.get("name", f"VLAN{vlan_id}"),
+                    "vlan_id": vlan_id,
+                    "addressing": {
+                        "mode": "static",
+                        "ipv4": {
+                            "address": network["ip_subnet"],
+                            "dhcp_start": network.get("dhcpd_start", ""),
+                            "dhcp_end": network.get("dhcpd_stop", "")
+                        }
+                    }
+                })
+        if vlans:
+            config["vlans"] = vlans
+        if interfaces:
+            config["interfaces"] = interfaces
+
+        policies = []
+        for rule in running_config.get("firewallrule", []):
+            policy = {
+                "name": rule.get("name", "Firewall Rule"),
+                "enabled": rule.get("enabled", True),
+                "action": "accept" if rule.get("action") == "accept" else "drop",
+                "log": rule.get("logging", False)
+            }
+            if rule.get("src_address"):
+                policy["source_address"] = rule["src_address"]
+            if rule.get("dst_address"):
+                policy["destination_address"] = rule["dst_address"]
+            service = self.SERVICE_PORTS.get(str(rule.get("dst_port", "")))
+            if service:
+                policy["service"] = service
+            policies.append(policy)
+        if policies:
+            config["firewall"] = {"policies": policies}
+
+        forwards = []
+        for rule in running_config.get("portforward", []):
+            forwards.append({
+                "name": rule.get("name", "Port Forward"),
+                "enabled": rule.get("enabled", True),
+                "external_port": _port(rule.get("dst_port")),
+                "internal_address": rule.get("fwd", ""),
+                "internal_port": _port(rule.get("fwd_port")),
+                "protocol": rule.get("proto", "tcp_udp"),
+                "log": rule.get("log", False)
+            })
+        if forwards:
+            config["nat"] = {"port_forwarding": forwards}
+
+        ssids = []
+        for wlan in running_config.get("wlanconf", []):
+            ssid = {
+                "ssid": wlan.get("name", ""),
+                "enabled": wlan.get("enabled", True),
+                "encryption": wlan.get("security", "wpapsk"),
+                "psk": wlan.get("x_passphrase", ""),
+                "hidden": wlan.get("hide_ssid", False),
+                "guest_network": wlan.get("is_guest", False)
+            }
+            if wlan.get("vlan_enabled") and "vlan" in wlan:
+                ssid["vlan_id"] = wlan["vlan"]
+            ssids.append(ssid)
+        if ssids:
+            config["wireless"] = {"ssids": ssids}
+
+        routes = []
+        for route in running_config.get("routing", []):
+            routes.append({
+                "destination": route.get("static-route_network", "0.0.0.0/0"),
+                "gateway": route.get("static-route_nexthop", ""),
+                "distance": route.get("static-route_distance", 1),
+                "enabled": route.get("enabled", True)
+            })
+        if routes:
+            config["routing"] = {"static": routes}
+
+        return config
+
     def parse_device_status(self, status_output: str) -> Dict[str, Any]:
         """Parse device status from API response"""
         # For UniFi, status comes from Controller API, not CLI
@@ -376,3 +646,35 @@ class UniFiTranslator(VendorInterface):
             "wireless", "qos", "dpi", "threat_management", "guest_portal"
         }
         return feature.lower() in supported
+
+
+def _collection(endpoint: str) -> str:
+    """REST collection of an endpoint, e.g. /api/s/{site}/rest/networkconf -> networkconf"""
+    parts = endpoint.strip("/").split("/")
+    return parts[4] if len(parts) > 4 and parts[3] == "rest" else ""
+
+
+def _same_value(current: Any, desired: Any) -> bool:
+    """Compare a controller value with a desired one, ignoring int/str differences"""
+    if current == desired:
+        return True
+    if isinstance(current, (int, float, str)) and isinstance(desired, (int, float, str)) \
+            and not isinstance(current, bool) and not isinstance(desired, bool):
+        return str(current) == str(desired)
+    return False
+
+
+def _port(value: Any) -> Any:
+    """Controller ports are strings; the unified schema uses numbers"""
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+def _deletion(collection: str, name: str) -> Dict[str, Any]:
+    """Deletion of a named object, resolved to its _id by plan_upserts"""
+    return {
+        "endpoint": f"/api/s/{{site}}/rest/{collection}",
+        "method": "DELETE",
+        "data": {"name": name}
+    }
@@ -16,6 +16,23 @@ class WatchGuardTranslator(VendorInterface):
     but also supports CLI for certain operations.
     """
 
+    # Fireware CLI error messages
+    ERROR_PATTERNS = [
+        r"\s*%\s*(?:Error|Invalid|Unknown|Incomplete|Ambiguous)",
+        r"\s*(?:Error|ERROR):",
+    ]
+    ERROR_PATTERN_FLAGS = 0
+
+    TRANSLATION_SECTIONS = [
+        ("system",),
+        ("interfaces",),
+        ("vlans",),
+        ("firewall",),
+        ("nat",),
+        ("vpn",),
+        ("routing",),
+    ]
+
     def yaml_to_commands(self, config: Dict[str, Any]) -> List[str]:
         """
         Convert unified YAML configuration to WatchGuard CLI commands.
@@ -271,6 +288,51 @@ class WatchGuardTranslator(VendorInterface):
 
         return commands
 
+    def removal_commands(self, removed: Dict[str, Any]) -> List[str]:
+        """Convert removed items into WatchGuard delete commands"""
+        commands = []
+
+        for idx, policy in enumerate(removed.get("firewall", {}).get("policies", [])):
+            policy_name = policy.get("name", f"Policy-{idx + 1}")
+            commands.append(f"delete policy \"{policy_name}\"")
+
+        for vlan in removed.get("vlans", []):
+            if vlan.get("id"):
+                commands.append(f"delete vlan {vlan['id']}")
+
+        nat = removed.get("nat", {})
+        for rule in nat.get("source_nat", []):
+            commands.append(f"delete nat-rule source \"{rule.get('name', 'SNAT')}\"")
+        for rule in nat.get("port_forwarding", []):
+            commands.append(f"delete nat-rule destination \"{rule.get('name', 'Port Forward')}\"")
+
+        for tunnel in removed.get("vpn", {}).get("ipsec", []):
+            commands.append(f"delete vpn ipsec \"{tunnel.get('name', 'VPN')}\"")
+
+        for route in removed.get("routing", {}).get("static", []):
+            dest = route.get("destination", "0.0.0.0/0")
+            commands.append(f"delete route {dest} gateway {route.get('gateway')}")
+
+        return commands
+
+    # Device-side checkpoints
+    #
+    # Importing a configuration asks for confirmation and reboots the
+    # Firebox, so a failed change is not rolled back automatically: the
+    # export is kept for restoring by hand.
+
+    def checkpoint_commands(self, name: str) -> List[str]:
+        """Export the current configuration as a checkpoint"""
+        return [f"export config to flash:/{name}.xml"]
+
+    def rollback_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """No unattended restore on Fireware (see above)"""
+        return []
+
+    def release_checkpoint_commands(self, checkpoint: Dict[str, Any]) -> List[str]:
+        """Delete the exported checkpoint"""
+        return [f"delete flash:/{checkpoint['name']}.xml"]
+
     def _map_interface_name(self, name: str) -> str:
         """Map generic interface name to WatchGuard format"""
         # Simple mapping - expand as needed
@@ -0,0 +1,122 @@
+"""
+Benchmark: database writes of the device check-in endpoint
+
+Creates --devices devices in a temporary SQLite database and has every
+device check in --rounds times (with a status report, identified by
+--identify-by), calling the check-in handler directly, first with heartbeats written per check-in
+(buffer not running), then through the write-behind buffer. Statements
+(an executemany counts once) and commits are counted on the engine; no
+tasks are pending, so each check-in's task claim is an UPDATE that
+matches nothing.
+
+Usage (from backend/):
+    python -m benchmarks.bench_checkin --devices 1000 --rounds 3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+os.environ["RECONCILE_ON_CHECKIN"] = "False"
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.device import Device, DeviceVendor  # noqa: E402
+from app.routers.checkin import device_checkin  # noqa: E402
+from app.schemas.device import DeviceCheckIn  # noqa: E402
+from app.services.checkin_buffer import checkin_buffer  # noqa: E402
+
+counts = Counter()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    counts[statement.split(None, 1)[0].upper()] += 1
+
+
+@event.listens_for(engine, "commit")
+def count_commit(conn):
+    counts["COMMIT"] += 1
+
+
+def create_devices(count: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(Device, [
+            {"name": f"device-{i}", "serial_number": f"SN{i:08d}", "vendor": DeviceVendor.MIKROTIK}
+            for i in range(count)
+        ])
+        db.commit()
+        return [
+            {"device_id": device_id, "device_name": name, "serial_number": serial_number}
+            for device_id, name, serial_number in db.query(Device.id, Device.name, Device.serial_number)
+        ]
+    finally:
+        db.close()
+
+
+async def check_in(devices, identify_by: str, rounds: int):
+    for round_ in range(rounds):
+        for device in devices:
+            db = SessionLocal()
+            try:
+                await device_checkin(
+                    DeviceCheckIn(
+                        **{identify_by: device[identify_by]},
+                        firmware_version="7.14",
+                        status_data={"round": round_}
+                    ),
+                    None,
+                    db
+                )
+            finally:
+                db.close()
+            await asyncio.sleep(0)  # Let the buffer flush
+
+
+async def run(devices: int, identify_by: str, rounds: int, flush_interval: float) -> None:
+    fleet = create_devices(devices)
+
+    for label, buffered in (("per-checkin", False), ("buffered", True)):
+        if buffered:
+            checkin_buffer.flush_interval = flush_interval
+            await checkin_buffer.start()
+        counts.clear()
+
+        start = time.perf_counter()
+        await check_in(fleet, identify_by, rounds)
+        await checkin_buffer.stop()
+        elapsed = time.perf_counter() - start
+
+        checkins = devices * rounds
+        print(
+            f"{label:>12}: {elapsed:8.3f}s  checkins={checkins}  "
+            f"selects={counts['SELECT']}  updates={counts['UPDATE']}  commits={counts['COMMIT']}  "
+            f"checkins/s={checkins / elapsed:,.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=1000, help="Devices checking in")
+    parser.add_argument("--rounds", type=int, default=3, help="Check-ins per device")
+    parser.add_argument(
+        "--identify-by", choices=["device_id", "device_name", "serial_number"], default="device_id",
+        help="Check-in field identifying the device"
+    )
+    parser.add_argument("--flush-interval", type=float, default=0.5, help="Buffer flush interval in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.devices, args.identify_by, args.rounds, args.flush_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark: line-by-line vs uploaded-script configuration pushes
+
+Starts a local asyncssh server that emulates a RouterOS device (exec
+commands plus an SFTP subsystem that understands /import), then pushes the
+same firewall configuration through ConfigExecutor both ways.
+
+Each exec request is delayed by --latency seconds to emulate the WAN round
+trip to a real device.
+
+Usage (from backend/):
+    python -m benchmarks.bench_config_upload --rules 300 --latency 0.02
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import asyncssh
+
+from app.models.device import Device, DeviceVendor
+from app.services.config_executor import ConfigExecutor
+
+
+class BenchServer(asyncssh.SSHServer):
+    """Accepts any password"""
+
+    def begin_auth(self, username: str) -> bool:
+        return True
+
+    def password_auth_supported(self) -> bool:
+        return True
+
+    def validate_password(self, username: str, password: str) -> bool:
+        return True
+
+
+def make_process_handler(root: Path, latency: float, stats: dict):
+    """Build an exec handler that emulates RouterOS /import"""
+
+    async def handle(process: asyncssh.SSHServerProcess):
+        stats["exec_requests"] += 1
+        await asyncio.sleep(latency)
+
+        command = process.command or ""
+        if command.startswith("/import file-name="):
+            script = root / command.split("=", 1)[1].strip()
+            lines = [
+                line for line in script.read_text().splitlines()
+                if line and not line.startswith("#")
+            ]
+            stats["imported_lines"] += len(lines)
+            process.stdout.write("Script file loaded and executed successfully\n")
+        elif command.startswith("/file remove "):
+            (root / command.split(" ", 2)[2].strip()).unlink(missing_ok=True)
+        else:
+            stats["direct_lines"] += 1
+
+        process.exit(0)
+
+    return handle
+
+
+def build_config(rules: int) -> dict:
+    """Firewall-heavy configuration producing roughly `rules` commands"""
+    return {
+        "ip": {
+            "firewall": {
+                "filter": [
+                    {
+                        "chain": "forward",
+                        "action": "accept",
+                        "protocol": "tcp",
+                        "dst_port": str(1000 + i),
+                        "comment": f"bench rule {i}",
+                    }
+                    for i in range(rules)
+                ]
+            }
+        }
+    }
+
+
+async def run(rules: int, latency: float) -> None:
+    stats = {"exec_requests": 0, "imported_lines": 0, "direct_lines": 0}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        server = await asyncssh.create_server(
+            BenchServer,
+            "127.0.0.1",
+            0,
+            server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+            process_factory=make_process_handler(root, latency, stats),
+            sftp_factory=lambda chan: asyncssh.SFTPServer(chan, chroot=str(root).encode()),
+        )
+        port = server.sockets[0].getsockname()[1]
+
+        device = Device(
+            name="bench-mikrotik",
+            vendor=DeviceVendor.MIKROTIK,
+            ip_address="127.0.0.1",
+            ssh_username="admin",
+            ssh_password="admin",
+            ssh_port=port,
+            wireguard_enabled=0,
+        )
+        executor = ConfigExecutor()
+        config = build_config(rules)
+
+        try:
+            for label, upload in (("line-by-line", False), ("upload", True)):
+                for key in stats:
+                    stats[key] = 0
+
+                start = time.perf_counter()
+                result = await executor.execute_config(device, config, upload=upload)
+                elapsed = time.perf_counter() - start
+
+                print(
+                    f"{label:>13}: {elapsed:8.3f}s  "
+                    f"success={result['success']}  "
+                    f"commands={result['command_count']}  "
+                    f"ssh_execs={stats['exec_requests']}  "
+                    f"lines_applied={stats['direct_lines'] + stats['imported_lines']}"
+                )
+        finally:
+            server.close()
+            await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, default=300, help="Number of firewall rules to push")
+    parser.add_argument("--latency", type=float, default=0.02, help="Emulated per-request latency (seconds)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.rules, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark: device rows written and tasks enqueued by the config reconciler
+
+Creates --devices devices spread over --sites sites in a temporary SQLite
+database, with one global group and one group per site, then runs:
+
+- initial: a reconcile cycle computing every desired hash and enqueueing
+  a push per device
+- failed: every push fails for good (as reported by an agent with its
+  retries exhausted), followed by --cycles cycles and a check-in per device
+- group-edit: the global group is edited through the API handler
+- after-edit: one cycle, which recomputes the hashes and enqueues again
+
+Device rows written (an executemany counts each row) and tasks enqueued
+are printed per phase; "failed" should enqueue nothing and "group-edit"
+should write no device rows.
+
+Usage (from backend/):
+    python -m benchmarks.bench_reconciler --devices 5000 --sites 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/bench.db"
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.config_group import ConfigGroup, ConfigScope  # noqa: E402
+from app.models.device import Device, DeviceVendor  # noqa: E402
+from app.models.task import Task, TaskStatus  # noqa: E402
+from app.routers.config_groups import update_config_group  # noqa: E402
+from app.schemas.config_group import ConfigGroupUpdate  # noqa: E402
+from app.services.reconciler import config_reconciler  # noqa: E402
+
+counts = Counter()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    if statement.startswith("UPDATE devices"):
+        counts["device_rows"] += len(parameters) if executemany else 1
+
+
+def create_fleet(devices: int, sites: int) -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        global_group = ConfigGroup(
+            name="baseline", scope=ConfigScope.GLOBAL, config={"system": {"ntp": ["pool.ntp.org"]}}
+        )
+        db.add(global_group)
+        db.add_all(
+            ConfigGroup(
+                name=f"site-{s}", scope=ConfigScope.SITE, match=f"site-{s}",
+                config={"system": {"timezone": f"Zone/{s}"}}
+            )
+            for s in range(sites)
+        )
+        db.bulk_insert_mappings(Device, [
+            {
+                "name": f"device-{i}",
+                "vendor": DeviceVendor.MIKROTIK,
+                "site": f"site-{i % sites}",
+                "desired_config": {"system": {"hostname": f"device-{i}"}},
+            }
+            for i in range(devices)
+        ])
+        db.commit()
+        return global_group.id
+    finally:
+        db.close()
+
+
+def fail_pushes():
+    """Fail every pending push for good, as the check-in result endpoint does"""
+    db = SessionLocal()
+    try:
+        for task in db.query(Task).filter(Task.status == TaskStatus.PENDING):
+            task.status = TaskStatus.FAILED
+            config_reconciler.push_failed(db.get(Device, task.device_id), task)
+        db.commit()
+    finally:
+        db.close()
+
+
+def check_in_all():
+    """Reconcile every device as its check-in would; returns tasks enqueued"""
+    db = SessionLocal()
+    try:
+        device_ids = [device_id for device_id, in db.query(Device.id)]
+        return sum(config_reconciler.reconcile_device_id(db, device_id) for device_id in device_ids)
+    finally:
+        db.close()
+
+
+async def edit_group(group_id: int):
+    db = SessionLocal()
+    try:
+        await update_config_group(
+            group_id, ConfigGroupUpdate(config={"system": {"ntp": ["time.example.net"]}}), db
+        )
+    finally:
+        db.close()
+
+
+def report(label: str, elapsed: float, refreshed: int, enqueued: int):
+    print(
+        f"{label:>10}: {elapsed:8.3f}s  device_rows={counts['device_rows']}  "
+        f"refreshed={refreshed}  enqueued={enqueued}"
+    )
+
+
+def run(devices: int, sites: int, cycles: int):
+    group_id = create_fleet(devices, sites)
+
+    counts.clear()
+    start = time.perf_counter()
+    cycle = config_reconciler.run_cycle()
+    report("initial", time.perf_counter() - start, cycle["refreshed"], cycle["enqueued"])
+
+    fail_pushes()
+    counts.clear()
+    start = time.perf_counter()
+    refreshed = enqueued = 0
+    for _ in range(cycles):
+        cycle = config_reconciler.run_cycle()
+        refreshed += cycle["refreshed"]
+        enqueued += cycle["enqueued"]
+    enqueued += check_in_all()
+    report("failed", time.perf_counter() - start, refreshed, enqueued)
+
+    counts.clear()
+    start = time.perf_counter()
+    asyncio.run(edit_group(group_id))
+    report("group-edit", time.perf_counter() - start, 0, 0)
+
+    counts.clear()
+    start = time.perf_counter()
+    cycle = config_reconciler.run_cycle()
+    report("after-edit", time.perf_counter() - start, cycle["refreshed"], cycle["enqueued"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=5000, help="Devices in the fleet")
+    parser.add_argument("--sites", type=int, default=50, help="Sites (one config group each)")
+    parser.add_argument("--cycles", type=int, default=5, help="Reconcile cycles after the pushes fail")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    run(args.devices, args.sites, args.cycles)
+
+
+if __name__ == "__main__":
+    main()
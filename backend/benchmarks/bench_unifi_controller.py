@@ -0,0 +1,153 @@
+"""
+Benchmark: UniFi status sweeps and bulk configuration applies
+
+Runs ConfigExecutor against the local UniFi controller simulator
+(benchmarks.unifi_simulator) and reports, per scenario, wall time,
+throughput, failures, HTTP requests, logins and REST writes:
+
+    sweep          status of every device in a --devices fleet
+    apply          first push of a --networks/--wlans/--rules config to
+                   --sites gateways, one controller site each
+    reapply        the same push again (upserts: reads only)
+    apply-changed  the push with one WLAN passphrase changed per site
+
+--latency/--jitter delay every request; --error-rate makes that fraction
+of requests fail with HTTP 500, to see how failures surface.
+
+Usage (from backend/):
+    python -m benchmarks.bench_unifi_controller --devices 10000 --sites 50 --latency 0.005
+"""
+import argparse
+import asyncio
+import copy
+import logging
+import time
+
+from app.models.device import Device, DeviceVendor
+from app.services.config_executor import ConfigExecutor
+from app.services.unifi_controller import unifi_sessions
+
+from .unifi_simulator import UniFiSimulator
+
+
+def make_config(networks: int, wlans: int, rules: int) -> dict:
+    """Unified configuration with the given number of UniFi objects"""
+    return {
+        "vlans": [{"id": 100 + i, "name": f"vlan-{100 + i}"} for i in range(networks)],
+        "wireless": {
+            "ssids": [
+                {"ssid": f"wifi-{i}", "psk": f"passphrase-{i}", "vlan_id": 100 + i % max(networks, 1)}
+                for i in range(wlans)
+            ]
+        },
+        "firewall": {
+            "policies": [
+                {"name": f"rule-{i}", "action": "accept" if i % 2 else "drop", "service": "https",
+                 "source_address": f"10.{i // 256}.{i % 256}.0/24"}
+                for i in range(rules)
+            ]
+        },
+    }
+
+
+async def gather_limited(coros, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(one(coro) for coro in coros))
+
+
+async def sweep(executor: ConfigExecutor, devices, concurrency: int) -> int:
+    """Collect the status of every device; returns the number of failures"""
+    results = await gather_limited((executor.get_device_status(d) for d in devices), concurrency)
+    return sum(1 for r in results if isinstance(r, dict) and r.get("status") == "error")
+
+
+async def apply(executor: ConfigExecutor, gateways, config: dict, concurrency: int) -> int:
+    """Push config to every gateway; returns the number of failed pushes"""
+    results = await gather_limited((executor.execute_config(g, config) for g in gateways), concurrency)
+    return sum(1 for r in results if not r.get("success"))
+
+
+async def run(args) -> None:
+    unifi_sessions.stat_ttl = args.stat_ttl
+    simulator = UniFiSimulator(
+        devices=args.devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=0
+    )
+    url = await simulator.start()
+
+    def device(i: int, site: str = "default") -> Device:
+        return Device(
+            id=i,
+            name=f"unifi-{i}",
+            vendor=DeviceVendor.UBIQUITI,
+            mac_address=UniFiSimulator.mac(i),
+            api_url=url,
+            ssh_username="admin",
+            ssh_password="admin",
+            device_data={"unifi_site": site},
+        )
+
+    fleet = [device(i) for i in range(args.devices)]
+    gateways = [device(i, f"site{i}") for i in range(args.sites)]
+    config = make_config(args.networks, args.wlans, args.rules)
+    changed = copy.deepcopy(config)
+    if changed["wireless"]["ssids"]:
+        changed["wireless"]["ssids"][0]["psk"] = "rotated-passphrase"
+    objects = args.networks + args.wlans + args.rules
+
+    executor = ConfigExecutor()
+    scenarios = (
+        ("sweep", args.devices, lambda: sweep(executor, fleet, args.concurrency)),
+        ("apply", args.sites * objects, lambda: apply(executor, gateways, config, args.concurrency)),
+        ("reapply", args.sites * objects, lambda: apply(executor, gateways, config, args.concurrency)),
+        ("apply-changed", args.sites * objects, lambda: apply(executor, gateways, changed, args.concurrency)),
+    )
+
+    try:
+        for label, items, scenario in scenarios:
+            simulator.reset_stats()
+
+            start = time.perf_counter()
+            failures = await scenario()
+            elapsed = time.perf_counter() - start
+
+            stats = simulator.stats
+            print(
+                f"{label:>13}: {elapsed:8.3f}s  "
+                f"items={items}  items/s={items / elapsed:10.1f}  failures={failures}  "
+                f"http_requests={stats['requests']}  logins={stats['logins']}  "
+                f"writes={stats['writes']}  injected_errors={stats['errors']}"
+            )
+    finally:
+        await unifi_sessions.close_all()
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=10000, help="Size of the swept fleet")
+    parser.add_argument("--sites", type=int, default=50, help="Gateways (controller sites) in the bulk apply")
+    parser.add_argument("--networks", type=int, default=10, help="Networks per pushed config")
+    parser.add_argument("--wlans", type=int, default=5, help="WLANs per pushed config")
+    parser.add_argument("--rules", type=int, default=20, help="Firewall rules per pushed config")
+    parser.add_argument("--latency", type=float, default=0.005, help="Emulated per-request latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--concurrency", type=int, default=20, help="Devices handled at the same time")
+    parser.add_argument("--stat-ttl", type=float, default=15, help="stat/device snapshot TTL (seconds)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: per-operation UniFi logins vs shared controller sessions
+
+Starts the local UniFi controller simulator (benchmarks.unifi_simulator),
+then runs a status sweep over --devices UniFi devices through
+ConfigExecutor.get_device_status, first with a fresh login per device (the
+old behaviour) and then with the shared session registry, which also
+serves every device from one stat/device snapshot per --stat-ttl seconds
+(with 0, only lookups made while a fetch is in flight share it).
+
+Each request is delayed by --latency seconds to emulate the round trip to
+a remote controller. --session-requests expires the session cookie after
+that many requests, to exercise re-login on HTTP 401.
+
+Usage (from backend/):
+    python -m benchmarks.bench_unifi_sessions --devices 200 --latency 0.01
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from app.models.device import Device, DeviceVendor
+from app.services.config_executor import ConfigExecutor
+from app.services.unifi_controller import UniFiController, unifi_sessions
+
+from .unifi_simulator import UniFiSimulator
+
+
+class PerOperationExecutor(ConfigExecutor):
+    """ConfigExecutor that logs in and out around every call (old behaviour)"""
+
+    async def get_device_status(self, device: Device):
+        async with UniFiController(
+            controller_url=device.api_url,
+            username=device.ssh_username,
+            password=device.ssh_password
+        ) as controller:
+            status = await controller.get_device_status(device.mac_address)
+        return self.translators[device.vendor].parse_device_status(str(status))
+
+
+async def sweep(executor: ConfigExecutor, devices, concurrency: int) -> int:
+    """Collect the status of every device; returns the number of failures"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(device):
+        async with semaphore:
+            result = await executor.get_device_status(device)
+            return isinstance(result, dict) and result.get("status") == "error"
+
+    return sum(await asyncio.gather(*(one(device) for device in devices)))
+
+
+async def run(devices: int, latency: float, concurrency: int, session_requests: int, stat_ttl: float) -> None:
+    unifi_sessions.stat_ttl = stat_ttl
+    simulator = UniFiSimulator(devices=devices, latency=latency, session_requests=session_requests)
+    url = await simulator.start()
+
+    fleet = [
+        Device(
+            id=i,
+            name=f"ap-{i}",
+            vendor=DeviceVendor.UBIQUITI,
+            mac_address=UniFiSimulator.mac(i),
+            api_url=url,
+            ssh_username="admin",
+            ssh_password="admin",
+        )
+        for i in range(devices)
+    ]
+
+    try:
+        for label, executor in (("per-operation", PerOperationExecutor()), ("shared", ConfigExecutor())):
+            simulator.reset_stats()
+
+            start = time.perf_counter()
+            failures = await sweep(executor, fleet, concurrency)
+            elapsed = time.perf_counter() - start
+
+            stats = simulator.stats
+            print(
+                f"{label:>13}: {elapsed:8.3f}s  "
+                f"devices={devices}  failures={failures}  "
+                f"http_requests={stats['requests']}  logins={stats['logins']}  "
+                f"logouts={stats['logouts']}  401s={stats['unauthorized']}"
+            )
+    finally:
+        await unifi_sessions.close_all()
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--devices", type=int, default=200, help="Number of UniFi devices to sweep")
+    parser.add_argument("--latency", type=float, default=0.01, help="Emulated per-request latency (seconds)")
+    parser.add_argument("--concurrency", type=int, default=10, help="Devices queried at the same time")
+    parser.add_argument(
+        "--session-requests", type=int, default=0,
+        help="Expire the session cookie after this many requests (0: never)"
+    )
+    parser.add_argument("--stat-ttl", type=float, default=15, help="stat/device snapshot TTL (seconds)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.devices, args.latency, args.concurrency, args.session_requests, args.stat_ttl))
+
+
+if __name__ == "__main__":
+    main()
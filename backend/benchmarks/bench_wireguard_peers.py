@@ -0,0 +1,128 @@
+"""
+Benchmark: per-peer shell edits vs the batched WireGuard peer table
+
+Adds --peers peers to a WireGuard config in a temporary directory, first
+the old way (every add_peer pipes the peer through `sudo tee -a`, checks
+`ip link show` and runs `wg set` for that peer), then through the peer
+table with concurrent add_peer calls and with one add_peers call, and
+finally removes half of them again with remove_peers.
+
+`sudo` and `wg` are replaced by shims on PATH (sudo runs its arguments,
+wg succeeds without doing anything), and the interface is treated as up
+(the old check's `ip link show` is counted, not run), so the numbers are
+process spawns and their cost on this machine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_wireguard_peers --peers 1000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.wireguard_manager import WireGuardManager
+
+SHIMS = {
+    "sudo": '#!/bin/sh\nexec "$@"\n',
+    "wg": "#!/bin/sh\nexit 0\n",
+}
+
+
+class BenchManager(WireGuardManager):
+    """Manager whose interface is always up"""
+
+    async def _is_interface_up(self) -> bool:
+        return True
+
+
+class ShellManager(BenchManager):
+    """Manager that edits the config with a shell pipeline per peer (old behaviour)"""
+
+    async def add_peer(self, peer_name, peer_public_key, peer_ip, allowed_ips=None):
+        allowed_ips = allowed_ips or f"{peer_ip}/32"
+        peer_config = f"\n# {peer_name}\n[Peer]\nPublicKey = {peer_public_key}\nAllowedIPs = {allowed_ips}\n\n"
+        await self._run_command(f"echo '{peer_config}' | sudo tee -a {self.config_file} > /dev/null")
+        self.commands += 1  # `ip link show`
+        if await self._is_interface_up():
+            await self._run_command(f"sudo wg set {self.interface} peer {peer_public_key} allowed-ips {allowed_ips}")
+        return True
+
+
+def install_shims(directory: Path):
+    for name, script in SHIMS.items():
+        path = directory / name
+        path.write_text(script)
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    os.environ["PATH"] = f"{directory}{os.pathsep}{os.environ['PATH']}"
+
+
+def peers(count: int) -> list:
+    return [
+        {"name": f"device-{i}", "public_key": f"{i:043d}=", "ip": f"10.99.{i // 250}.{i % 250 + 2}"}
+        for i in range(count)
+    ]
+
+
+async def run(count: int, concurrency: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        install_shims(tmp)
+        batch = peers(count)
+
+        async def concurrent_adds(manager):
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(peer):
+                async with semaphore:
+                    await manager.add_peer(peer["name"], peer["public_key"], peer["ip"])
+
+            await asyncio.gather(*(one(peer) for peer in batch))
+
+        scenarios = (
+            ("shell", ShellManager, concurrent_adds),
+            ("add_peer", BenchManager, concurrent_adds),
+            ("add_peers", BenchManager, lambda manager: manager.add_peers(batch)),
+        )
+
+        for label, manager_class, scenario in scenarios:
+            config_path = tmp / label
+            config_path.mkdir()
+            manager = manager_class(config_path=str(config_path))
+
+            start = time.perf_counter()
+            await scenario(manager)
+            elapsed = time.perf_counter() - start
+
+            configured = (config_path / "wg0.conf").read_text().count("[Peer]")
+            print(
+                f"{label:>12}: {elapsed:8.3f}s  peers={count}  "
+                f"configured={configured}  process_spawns={manager.commands}"
+            )
+
+        manager.commands = 0
+        start = time.perf_counter()
+        await manager.remove_peers([peer["public_key"] for peer in batch[::2]])
+        elapsed = time.perf_counter() - start
+        configured = (tmp / "add_peers" / "wg0.conf").read_text().count("[Peer]")
+        print(
+            f"{'remove_peers':>12}: {elapsed:8.3f}s  peers={len(batch[::2])}  "
+            f"configured={configured}  process_spawns={manager.commands}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peers", type=int, default=1000, help="Peers to provision")
+    parser.add_argument("--concurrency", type=int, default=50, help="add_peer calls in flight at once")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.peers, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
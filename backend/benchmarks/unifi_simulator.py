@@ -0,0 +1,343 @@
+"""
+Local UniFi controller simulator for benchmarks and regression runs
+
+Emulates the parts of the classic controller API that UniFiController
+uses: cookie login/logout, stat/device, the networkconf / wlanconf /
+firewallrule REST collections (plus portforward and routing, which
+get_running_config reads), cmd/devmgr and the site event websocket.
+
+The device fleet is synthetic (--devices access points, switches and
+gateways, all reported by every site); REST objects are kept in memory
+per site, so pushes, re-pushes and upserts can be inspected afterwards.
+Every request can be delayed (--latency, --jitter), and a fraction of
+non-login requests fails with HTTP 500 (--error-rate).
+
+Usage (from backend/):
+    python -m benchmarks.unifi_simulator --devices 10000 --port 8443
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import secrets
+import time
+from collections import Counter
+from typing import Optional, List, Dict, Any
+
+from aiohttp import web
+
+# REST collections served; others answer 404 like an unknown endpoint
+REST_COLLECTIONS = ("networkconf", "wlanconf", "firewallrule", "portforward", "routing")
+
+# Device states reported in stat/device
+STATE_DISCONNECTED = 0
+STATE_CONNECTED = 1
+STATE_PROVISIONING = 5
+
+
+def _ok(data: Optional[List[Dict[str, Any]]] = None) -> web.Response:
+    return web.json_response({"meta": {"rc": "ok"}, "data": data or []})
+
+
+def _error(status: int, msg: str) -> web.Response:
+    return web.json_response({"meta": {"rc": "error", "msg": msg}, "data": []}, status=status)
+
+
+class UniFiSimulator:
+    """
+    In-process mock UniFi controller.
+
+    Counters in `stats` (requests, logins, logouts, unauthorized, errors,
+    reads, writes, commands, ws_connections) can be reset between runs
+    with reset_stats().
+    """
+
+    def __init__(
+        self,
+        devices: int = 100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        session_requests: int = 0,
+        offline_ratio: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize simulator.
+
+        Args:
+            devices: Size of the synthetic fleet
+            latency: Delay added to every request (seconds)
+            jitter: Extra random delay of up to this many seconds
+            error_rate: Fraction of requests (except login/logout) failing with HTTP 500
+            session_requests: Expire a session cookie after this many
+                authenticated requests (0: never)
+            offline_ratio: Fraction of the fleet reported disconnected
+            seed: Random seed for the fleet, jitter and error injection
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.session_requests = session_requests
+        self._random = random.Random(seed)
+
+        self.fleet = [self._make_device(i, offline_ratio) for i in range(devices)]
+        self._by_mac = {device["mac"]: device for device in self.fleet}
+        self.objects: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}  # site -> collection -> _id -> object
+        self.stats: Counter = Counter()
+        self._sessions: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._sockets: List[web.WebSocketResponse] = []
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    @staticmethod
+    def mac(index: int) -> str:
+        """MAC address of the fleet's index-th device"""
+        return f"f0:9f:c2:{index >> 16 & 255:02x}:{index >> 8 & 255:02x}:{index & 255:02x}"
+
+    def _make_device(self, index: int, offline_ratio: float) -> Dict[str, Any]:
+        if index % 50 == 0:
+            kind, model = "ugw", "UXGPRO"
+        elif index % 10 == 0:
+            kind, model = "usw", "US48PRO"
+        else:
+            kind, model = "uap", "U7PG2"
+        connected = self._random.random() >= offline_ratio
+        return {
+            "_id": f"{index:024x}",
+            "mac": self.mac(index),
+            "type": kind,
+            "model": model,
+            "name": f"{kind}-{index}",
+            "ip": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255 or 254}",
+            "version": "6.6.55",
+            "adopted": True,
+            "state": STATE_CONNECTED if connected else STATE_DISCONNECTED,
+            "uptime": self._random.randint(60, 10_000_000) if connected else 0,
+            "last_seen": int(time.time()),
+        }
+
+    def collection(self, site: str, name: str) -> Dict[str, Dict[str, Any]]:
+        """Objects of a site's REST collection, keyed by _id"""
+        return self.objects.setdefault(site, {}).setdefault(name, {})
+
+    def reset_stats(self):
+        """Zero all counters"""
+        self.stats.clear()
+
+    # ===== Server =====
+
+    def make_app(self) -> web.Application:
+        """Build the aiohttp application"""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/api/login", self._login)
+        app.router.add_post("/api/logout", self._logout)
+        app.router.add_get("/api/s/{site}/stat/device", self._stat_device)
+        app.router.add_post("/api/s/{site}/cmd/devmgr", self._devmgr)
+        app.router.add_route("*", "/api/s/{site}/rest/{collection}", self._rest)
+        app.router.add_route("*", "/api/s/{site}/rest/{collection}/{id}", self._rest)
+        app.router.add_get("/wss/s/{site}/events", self._events)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the controller URL"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        """Close event sockets and stop serving"""
+        for ws in list(self._sockets):
+            await ws.close()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.stats["requests"] += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if request.path in ("/api/login", "/api/logout"):
+            return await handler(request)
+
+        token = request.cookies.get("unifises")
+        if token not in self._sessions:
+            self.stats["unauthorized"] += 1
+            if request.path.startswith("/wss/"):
+                return web.Response(status=401)
+            return _error(401, "api.err.LoginRequired")
+
+        self._sessions[token] += 1
+        if self.session_requests and self._sessions[token] >= self.session_requests:
+            del self._sessions[token]
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return _error(500, "api.err.Internal")
+
+        return await handler(request)
+
+    async def _login(self, request: web.Request) -> web.Response:
+        self.stats["logins"] += 1
+        token = secrets.token_hex(16)
+        self._sessions[token] = 0
+        response = _ok()
+        response.set_cookie("unifises", token)
+        return response
+
+    async def _logout(self, request: web.Request) -> web.Response:
+        self.stats["logouts"] += 1
+        self._sessions.pop(request.cookies.get("unifises"), None)
+        return _ok()
+
+    async def _stat_device(self, request: web.Request) -> web.Response:
+        self.stats["reads"] += 1
+        return _ok(self.fleet)
+
+    async def _devmgr(self, request: web.Request) -> web.Response:
+        self.stats["commands"] += 1
+        body = await request.json()
+        device = self._by_mac.get((body.get("mac") or "").lower())
+        if device is None:
+            return _error(400, "api.err.UnknownDevice")
+
+        cmd = body.get("cmd")
+        if cmd == "adopt":
+            device["adopted"] = True
+            device["state"] = STATE_PROVISIONING
+        elif cmd in ("restart", "force-provision"):
+            device["state"] = STATE_PROVISIONING
+        else:
+            return _error(400, "api.err.InvalidCommand")
+
+        await self.broadcast({"meta": {"message": "device:update"}, "data": [{"mac": device["mac"], "state": device["state"]}]})
+        return _ok()
+
+    async def _rest(self, request: web.Request) -> web.Response:
+        name = request.match_info["collection"]
+        if name not in REST_COLLECTIONS:
+            return _error(404, "api.err.NotFound")
+
+        objects = self.collection(request.match_info["site"], name)
+        object_id = request.match_info.get("id")
+
+        if request.method == "GET":
+            self.stats["reads"] += 1
+            if object_id is None:
+                return _ok(list(objects.values()))
+            if object_id not in objects:
+                return _error(400, "api.err.IdInvalid")
+            return _ok([objects[object_id]])
+
+        self.stats["writes"] += 1
+
+        if request.method == "POST" and object_id is None:
+            data = await request.json()
+            obj = {**data, "_id": f"{next(self._ids):024x}", "site_id": request.match_info["site"]}
+            objects[obj["_id"]] = obj
+            return _ok([obj])
+
+        if object_id not in objects:
+            return _error(400, "api.err.IdInvalid")
+
+        if request.method == "PUT":
+            objects[object_id].update(await request.json())
+            objects[object_id]["_id"] = object_id
+            return _ok([objects[object_id]])
+
+        if request.method == "DELETE":
+            del objects[object_id]
+            return _ok()
+
+        return _error(405, "api.err.MethodNotAllowed")
+
+    async def _events(self, request: web.Request) -> web.WebSocketResponse:
+        self.stats["ws_connections"] += 1
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self._sockets.append(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._sockets.remove(ws)
+        return ws
+
+    async def broadcast(self, message: Dict[str, Any]):
+        """Send a message to every connected event websocket"""
+        data = json.dumps(message)
+        for ws in list(self._sockets):
+            if not ws.closed:
+                await ws.send_str(data)
+
+    async def set_state(self, index: int, state: int):
+        """Change a fleet device's state and announce it as device:update"""
+        device = self.fleet[index]
+        device["state"] = state
+        device["last_seen"] = int(time.time())
+        await self.broadcast({
+            "meta": {"message": "device:update"},
+            "data": [{"mac": device["mac"], "state": state, "last_seen": device["last_seen"]}]
+        })
+
+
+async def serve(args) -> None:
+    simulator = UniFiSimulator(
+        devices=args.devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        session_requests=args.session_requests,
+        offline_ratio=args.offline_ratio,
+        seed=args.seed
+    )
+    url = await simulator.start(args.host, args.port)
+    print(f"UniFi simulator listening on {url} ({args.devices} devices)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="Listen address")
+    parser.add_argument("--port", type=int, default=8443, help="Listen port")
+    parser.add_argument("--devices", type=int, default=10000, help="Size of the synthetic fleet")
+    parser.add_argument("--latency", type=float, default=0.0, help="Per-request latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument(
+        "--session-requests", type=int, default=0,
+        help="Expire the session cookie after this many requests (0: never)"
+    )
+    parser.add_argument("--offline-ratio", type=float, default=0.0, help="Fraction of devices reported disconnected")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()